@@ -2,6 +2,9 @@
 ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Run it with ASYNC_VIEWS=True so the hot endpoints use the native async views:
+
+    ASYNC_VIEWS=True gunicorn -k uvicorn.workers.UvicornWorker backend.asgi:application
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
@@ -0,0 +1,44 @@
+import json
+from django.http import JsonResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def json_response(data, status=200, headers=None):
+    """JsonResponse rendered like DRF's JSONRenderer, so sync and async views return the same JSON"""
+    return JsonResponse(
+        data,
+        status=status,
+        headers=headers,
+        encoder=JSONEncoder,
+        safe=False,
+        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')}
+    )
+
+
+class AsyncAPIView(View):
+    """
+    Base class for the native async versions of the hot APIViews.
+
+    Handlers are coroutines that return json_response(). As with DRF,
+    request.data holds the parsed JSON body and request.query_params holds
+    the query string. Like every APIView here, the views are CSRF exempt.
+    """
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # csrf_exempt() would wrap the coroutine function in a sync function
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.query_params = request.GET
+        request.data = {}
+        if request.method in ('POST', 'PUT', 'PATCH') and request.body:
+            try:
+                request.data = json.loads(request.body)
+            except ValueError as e:
+                return json_response({'detail': f'JSON parse error - {e}'}, status=400)
+        return await super().dispatch(request, *args, **kwargs)
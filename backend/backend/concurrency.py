@@ -0,0 +1,191 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from django.conf import settings
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """Process-wide thread pool for blocking I/O such as Firestore calls"""
+    global _executor, _executor_pid
+    if _executor is not None and _executor_pid == os.getpid():
+        return _executor
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            # Threads do not survive fork; a worker process builds its own pool
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'IO_POOL_WORKERS', 16),
+                thread_name_prefix='io'
+            )
+            _executor_pid = os.getpid()
+    return _executor
+
+
+class FanOutResult:
+    """Outcome of fan_out(): values of the calls that succeeded, errors of the rest"""
+
+    def __init__(self, results: dict, errors: dict, elapsed_ms: float):
+        self.results = results
+        self.errors = errors
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def __getitem__(self, name):
+        return self.results[name]
+
+    def get(self, name, default=None):
+        return self.results.get(name, default)
+
+
+def fan_out(calls: dict, timeout: float = None) -> FanOutResult:
+    """
+    Run independent callables concurrently on the shared I/O pool.
+
+    calls maps a name to a zero-argument callable. Each call runs in a copy
+    of the caller's context, so request-scoped state (the storage identity
+    map) is shared with the request. Calls still running when the deadline
+    passes are reported as timed out; their threads are left to finish on
+    their own.
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'IO_FANOUT_TIMEOUT', 5.0)
+    started = time.monotonic()
+    executor = get_io_executor()
+    futures = {
+        executor.submit(contextvars.copy_context().run, call): name
+        for name, call in calls.items()
+    }
+    done, not_done = wait(futures, timeout=timeout)
+
+    results, errors = {}, {}
+    for future in done:
+        name = futures[future]
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            errors[name] = str(e) or e.__class__.__name__
+    for future in not_done:
+        future.cancel()
+        errors[futures[future]] = f'timed out after {timeout:g}s'
+
+    return FanOutResult(results, errors, (time.monotonic() - started) * 1000)
+
+
+async def afan_out(calls: dict, timeout: float = None) -> FanOutResult:
+    """
+    Await independent coroutines concurrently; the async form of fan_out().
+
+    calls maps a name to a zero-argument coroutine function. Coroutines still
+    pending when the deadline passes are cancelled and reported as timed out.
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'IO_FANOUT_TIMEOUT', 5.0)
+    started = time.monotonic()
+    tasks = {asyncio.ensure_future(call()): name for name, call in calls.items()}
+    done, not_done = await asyncio.wait(tasks, timeout=timeout)
+
+    results, errors = {}, {}
+    for task in done:
+        name = tasks[task]
+        try:
+            results[name] = task.result()
+        except Exception as e:
+            errors[name] = str(e) or e.__class__.__name__
+    for task in not_done:
+        task.cancel()
+        errors[tasks[task]] = f'timed out after {timeout:g}s'
+
+    return FanOutResult(results, errors, (time.monotonic() - started) * 1000)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one.
+
+    The first caller for a key runs the function; callers arriving while it
+    runs wait for it and share its result or exception instead of making
+    the same backend call again. A waiter gives up after timeout seconds
+    and calls the function itself. do() is for threads, ado() for
+    coroutines on one event loop; both return (result, shared).
+    """
+
+    def __init__(self, timeout: float = None):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            try:
+                result = future.result(self.timeout)
+            except FutureTimeout:
+                return fn(), False
+            self.shared += 1
+            return result, True
+
+        self.calls += 1
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    async def ado(self, key, fn):
+        flight = (asyncio.get_running_loop(), key)
+        future = self._async_calls.get(flight)
+        if future is not None:
+            try:
+                result = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+            except asyncio.TimeoutError:
+                return await fn(), False
+            except asyncio.CancelledError:
+                # Only the leader was cancelled, not this caller
+                if not future.cancelled():
+                    raise
+                return await fn(), False
+            self.shared += 1
+            return result, True
+
+        future = self._async_calls[flight] = flight[0].create_future()
+        self.calls += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Retrieved here so an exception nobody waited for is not logged as lost
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self._async_calls[flight]
+
+    def stats(self) -> dict:
+        return {'in_flight': len(self._calls) + len(self._async_calls), 'calls': self.calls, 'shared': self.shared}
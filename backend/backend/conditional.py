@@ -0,0 +1,75 @@
+"""
+Conditional GET (ETag / Last-Modified) for responses built from documents
+that carry updated_at.
+
+Validators come from what identifies a response, not from its body: the
+documents' ids and update times plus the request parameters that shape
+it. A view can therefore answer 304 Not Modified before it builds or
+serializes anything, and before reading the store at all when the update
+times are known in memory (the doctors replica). Every write to a doctor
+or patient document sets updated_at, so equal validators mean an
+identical body and the ETags are strong.
+"""
+
+import hashlib
+from datetime import datetime
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+# Read alongside a ?fields= projection so validators can be computed
+VALIDATOR_FIELDS = ['uid', 'updated_at']
+
+
+def with_validator_fields(fields):
+    """A projection extended with VALIDATOR_FIELDS (None stays all fields)"""
+    if fields is None:
+        return None
+    return list(fields) + [field for field in VALIDATOR_FIELDS if field not in fields]
+
+
+def strip_fields(doc: dict, fields) -> dict:
+    """Drop the keys a with_validator_fields() read added to doc"""
+    if fields is not None:
+        for field in VALIDATOR_FIELDS:
+            if field not in fields:
+                doc.pop(field, None)
+    return doc
+
+
+def validators(stamps, *variant):
+    """
+    (etag, last_modified) for a response built from documents given as
+    (doc_id, updated_at) pairs, in response order, and shaped by variant.
+    None when a document has no updated_at, as its changes could go unseen.
+    """
+    parts, latest = [], None
+    for doc_id, updated_at in stamps:
+        if not isinstance(updated_at, datetime):
+            return None
+        parts.append((doc_id, updated_at.isoformat()))
+        latest = updated_at if latest is None or updated_at > latest else latest
+    digest = hashlib.blake2b(repr((parts, variant)).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"', (int(latest.timestamp()) if latest is not None else None)
+
+
+def not_modified(request, current):
+    """The 304 answer when the request's If-None-Match / If-Modified-Since match current, else None"""
+    if current is None:
+        return None
+    etag, last_modified = current
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    return add_validators(response, current) if response is not None else None
+
+
+def add_validators(response, current):
+    """
+    Send current's ETag and Last-Modified with Cache-Control: no-cache, so
+    clients keep a copy but revalidate it on every use
+    """
+    if current is not None:
+        etag, last_modified = current
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, no_cache=True)
+    return response
@@ -1,7 +1,13 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
+import asyncio
+import logging
 import os
+import threading
 from pathlib import Path
+import firebase_admin
+from firebase_admin import credentials
+from google.cloud import firestore as google_firestore
+
+logger = logging.getLogger(__name__)
 
 # Get the directory where this file is located
 BACKEND_DIR = Path(__file__).resolve().parent
@@ -9,10 +15,80 @@ BACKEND_DIR = Path(__file__).resolve().parent
 # Path to service account key
 cred_path = os.getenv("FIREBASE_CREDENTIALS") or BACKEND_DIR / "serviceAccountKey.json"
 
-db = None
-if Path(cred_path).exists():
-    cred = credentials.Certificate(str(cred_path))
-    firebase_admin.initialize_app(cred)
-    db = firestore.client()
-else:
-    print(f"Warning: Firebase credentials not found at {cred_path}")
+_app = None
+_app_checked = False
+_client = None
+_client_pid = None
+_async_client = None
+_async_client_key = None
+_lock = threading.Lock()
+
+
+def get_app():
+    """The firebase_admin app, initialized on first use; None without credentials"""
+    global _app, _app_checked
+    if _app_checked:
+        return _app
+    with _lock:
+        if not _app_checked:
+            if Path(cred_path).exists():
+                _app = firebase_admin.initialize_app(credentials.Certificate(str(cred_path)))
+            else:
+                logger.warning('Firebase credentials not found at %s', cred_path)
+            _app_checked = True
+    return _app
+
+
+def get_db():
+    """
+    Firestore client for the current process, or None without credentials.
+
+    Nothing is created at import time, so management commands stay fast and
+    gunicorn can preload the app. gRPC channels do not survive fork: a
+    client inherited from the master is replaced by a fresh one in the worker.
+    """
+    global _client, _client_pid
+    if _client is not None and _client_pid == os.getpid():
+        return _client
+    app = get_app()
+    if app is None:
+        return None
+    with _lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = google_firestore.Client(
+                project=app.project_id,
+                credentials=app.credential.get_credential()
+            )
+            _client_pid = os.getpid()
+    return _client
+
+
+def get_async_db():
+    """
+    Firestore AsyncClient for the running event loop, or None without credentials.
+
+    gRPC aio channels are bound to the loop that created them, so a client is
+    kept per process and event loop.
+    """
+    global _async_client, _async_client_key
+    key = (os.getpid(), id(asyncio.get_running_loop()))
+    if _async_client is not None and _async_client_key == key:
+        return _async_client
+    app = get_app()
+    if app is None:
+        return None
+    with _lock:
+        if _async_client is None or _async_client_key != key:
+            _async_client = google_firestore.AsyncClient(
+                project=app.project_id,
+                credentials=app.credential.get_credential()
+            )
+            _async_client_key = key
+    return _async_client
+
+
+def __getattr__(name):
+    # `from backend.firebase_init import db` keeps working, lazily
+    if name == 'db':
+        return get_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,345 @@
+"""
+Response cache for the read endpoints.
+
+@cache_response(ttl, tags) on a view handler (a sync DRF method or an
+async view's coroutine) keeps its 200 responses in the 'responses' cache
+(settings.CACHES) for ttl seconds, keyed by the view, the request path and
+query string and the authenticated principal. Tags name the documents a
+response was built from: format strings filled in with the URL kwargs
+('doctor:{uid}'), or a callable(request, **kwargs) returning them. The
+write paths call invalidate() with the tags of what they changed. A view
+passes a 200 response it should not be served again, such as one degraded
+by a failed read, through uncacheable().
+
+Invalidation is generational. Each tag has a version stored in the same
+cache and the versions of a response's tags are part of its key, so
+invalidate() only replaces versions: older entries are no longer found and
+expire on their own. With a shared backend (RESPONSE_CACHE_BACKEND 'file',
+'memcached' or 'redis') an invalidation reaches every worker; with
+'locmem' a write made by another process shows after at most ttl seconds.
+
+Concurrent misses for the same key are coalesced: one request per process
+runs the view and the others wait for its response (single-flight). With
+stale_ttl, an entry past its ttl is still served for up to stale_ttl more
+seconds while one background refresh, claimed across workers through the
+cache, replaces it. Invalidation changes the key instead, so a write is
+never hidden behind a stale entry; only other processes' writes with the
+'locmem' backend and edits made outside the API are.
+
+A cache that cannot be reached is treated as a miss; the view still answers.
+"""
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import logging
+import secrets
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+from django.utils.http import parse_http_date_safe
+from rest_framework.request import Request
+from rest_framework.response import Response
+from backend.concurrency import SingleFlight, get_io_executor
+from backend.conditional import not_modified
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = 'responses'
+
+# Headers kept with a cached response; Content-Type is added for plain responses
+STORED_HEADERS = ('ETag', 'Last-Modified', 'Cache-Control')
+
+# Conditional requests may be answered 304 by the view, leaving nothing to store
+CONDITIONAL_HEADERS = ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE')
+
+
+class ResponseCacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.refreshes = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    def as_dict(self) -> dict:
+        return {
+            'backend': settings.CACHES[CACHE_ALIAS]['BACKEND'],
+            'enabled': getattr(settings, 'RESPONSE_CACHE_ENABLED', True),
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'stores': self.stores,
+            'refreshes': self.refreshes,
+            'invalidations': self.invalidations,
+            'errors': self.errors,
+            'loads': _flights.stats()
+        }
+
+
+_stats = ResponseCacheStats()
+# Seconds a coalesced request waits for the one loading its response, and
+# for which a stale entry's refresh stays claimed
+_load_timeout = getattr(settings, 'RESPONSE_CACHE_LOAD_TIMEOUT', 10.0)
+_flights = SingleFlight(timeout=_load_timeout)
+# Background refreshes of the async views, referenced until they finish
+_refresh_tasks = set()
+
+
+def get_response_cache_stats() -> dict:
+    return _stats.as_dict()
+
+
+def uncacheable(response):
+    """Mark response as not to be stored by cache_response(); returns it"""
+    response.uncacheable = True
+    return response
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _tag_key(tag: str) -> str:
+    return f'tag:{tag}'
+
+
+def _new_version() -> str:
+    return secrets.token_hex(8)
+
+
+def invalidate(*tags) -> None:
+    """Stop serving every cached response built from any of tags"""
+    if not tags:
+        return
+    try:
+        _cache().set_many({_tag_key(tag): _new_version() for tag in tags}, timeout=None)
+        _stats.invalidations += len(tags)
+    except Exception:
+        _stats.errors += 1
+        logger.exception('Response cache invalidation failed for %s', tags)
+
+
+async def ainvalidate(*tags) -> None:
+    """invalidate() for async code"""
+    await _run(invalidate, *tags)
+
+
+def _versions(cache, tags) -> list:
+    keys = [_tag_key(tag) for tag in tags]
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        # add() keeps a version another worker set in the meantime
+        created = {key: _new_version() for key in missing}
+        for key, version in created.items():
+            cache.add(key, version, timeout=None)
+        found.update(created)
+        found.update(cache.get_many(missing))
+    return [found[key] for key in keys]
+
+
+def _principal(request) -> str:
+    # DRF authenticated the request before the handler ran; the async views
+    # do not authenticate, and touching their lazy request.user would hit
+    # the session store
+    user = request.user if isinstance(request, Request) else None
+    return getattr(user, 'uid', None) or '-'
+
+
+def _key(view: str, request, tags, versions) -> str:
+    raw = repr((view, request.path, sorted(request.GET.lists()), _principal(request), list(zip(tags, versions))))
+    return 'response:' + hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+def _lookup(view, request, tags):
+    """(key, cached entry or None)"""
+    try:
+        cache = _cache()
+        key = _key(view, request, tags, _versions(cache, tags))
+        entry = cache.get(key)
+    except Exception:
+        _stats.errors += 1
+        logger.exception('Response cache lookup failed')
+        return None, None
+    if entry is None:
+        _stats.misses += 1
+    elif _is_stale(entry):
+        _stats.stale_hits += 1
+    else:
+        _stats.hits += 1
+    return key, entry
+
+
+def _store(key, entry, ttl, stale_ttl) -> None:
+    try:
+        _cache().set(key, entry, timeout=ttl + stale_ttl)
+        _stats.stores += 1
+    except Exception:
+        _stats.errors += 1
+        logger.exception('Response cache store failed')
+
+
+def _freeze(response, ttl):
+    """The cache entry for a 200 response, fresh for ttl seconds, else None"""
+    if response.status_code != 200 or getattr(response, 'uncacheable', False):
+        return None
+    fresh_until = time.time() + ttl
+    headers = {name: response[name] for name in STORED_HEADERS if response.has_header(name)}
+    if isinstance(response, Response):
+        # DRF renders on the way out, so the data is kept and content negotiation still applies
+        return 'data', response.data, response.status_code, headers, fresh_until
+    headers['Content-Type'] = response['Content-Type']
+    return 'content', response.content, response.status_code, headers, fresh_until
+
+
+def _is_stale(entry) -> bool:
+    return entry[4] <= time.time()
+
+
+def _thaw(request, entry):
+    kind, body, status, headers, _ = entry
+    if 'ETag' in headers:
+        current = headers['ETag'], parse_http_date_safe(headers.get('Last-Modified', ''))
+        response = not_modified(request, current)
+        if response is not None:
+            return response
+    response = Response(body, status=status) if kind == 'data' else HttpResponse(body, status=status)
+    for name, value in headers.items():
+        response[name] = value
+    return response
+
+
+def _claim_refresh(request, key) -> bool:
+    """True for the one request, across workers, that should refresh the stale entry under key"""
+    if any(header in request.META for header in CONDITIONAL_HEADERS):
+        return False
+    try:
+        return _cache().add(f'{key}:refresh', 1, timeout=_load_timeout)
+    except Exception:
+        _stats.errors += 1
+        logger.exception('Response cache refresh claim failed')
+        return False
+
+
+def _refreshed(key, response, ttl, stale_ttl) -> None:
+    entry = _freeze(response, ttl)
+    if entry is not None:
+        _store(key, entry, ttl, stale_ttl)
+        _stats.refreshes += 1
+        try:
+            _cache().delete(f'{key}:refresh')
+        except Exception:
+            pass
+
+
+def _refresh(key, load, ttl, stale_ttl) -> None:
+    try:
+        _refreshed(key, load(), ttl, stale_ttl)
+    except Exception:
+        _stats.errors += 1
+        logger.exception('Response cache refresh failed')
+
+
+async def _arefresh(key, load, ttl, stale_ttl) -> None:
+    try:
+        response = await load()
+        await _run(_refreshed, key, response, ttl, stale_ttl)
+    except Exception:
+        _stats.errors += 1
+        logger.exception('Response cache refresh failed')
+
+
+def _tags(tags, request, kwargs) -> list:
+    if callable(tags):
+        return list(tags(request, **kwargs))
+    return [tag.format(**kwargs) for tag in tags]
+
+
+async def _run(fn, *args):
+    # The local-memory cache never blocks; other backends do network or disk I/O
+    if isinstance(_cache(), LocMemCache):
+        return fn(*args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_io_executor(), functools.partial(fn, *args))
+
+
+def cache_response(ttl: float, tags=(), stale_ttl: float = 0):
+    """
+    Cache the decorated view handler's 200 responses for ttl seconds,
+    until one of tags is invalidated; with stale_ttl, serve them that much
+    longer while a background refresh runs
+    """
+    def decorator(handler):
+        view = f'{handler.__module__}.{handler.__qualname__}'
+
+        if inspect.iscoroutinefunction(handler):
+            @functools.wraps(handler)
+            async def async_wrapper(self, request, *args, **kwargs):
+                if not getattr(settings, 'RESPONSE_CACHE_ENABLED', True):
+                    return await handler(self, request, *args, **kwargs)
+                key, entry = await _run(_lookup, view, request, _tags(tags, request, kwargs))
+                if key is None:
+                    return await handler(self, request, *args, **kwargs)
+
+                async def load():
+                    return await handler(self, request, *args, **kwargs)
+
+                if entry is not None:
+                    if _is_stale(entry) and await _run(_claim_refresh, request, key):
+                        task = asyncio.ensure_future(_arefresh(key, load, ttl, stale_ttl))
+                        _refresh_tasks.add(task)
+                        task.add_done_callback(_refresh_tasks.discard)
+                    return _thaw(request, entry)
+
+                async def load_and_store():
+                    response = await load()
+                    entry = _freeze(response, ttl)
+                    if entry is not None:
+                        await _run(_store, key, entry, ttl, stale_ttl)
+                    return response, entry
+
+                (response, entry), shared = await _flights.ado(key, load_and_store)
+                if not shared:
+                    return response
+                return _thaw(request, entry) if entry is not None else await load()
+            return async_wrapper
+
+        @functools.wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            if not getattr(settings, 'RESPONSE_CACHE_ENABLED', True):
+                return handler(self, request, *args, **kwargs)
+            key, entry = _lookup(view, request, _tags(tags, request, kwargs))
+            if key is None:
+                return handler(self, request, *args, **kwargs)
+
+            def load():
+                return handler(self, request, *args, **kwargs)
+
+            if entry is not None:
+                if _is_stale(entry) and _claim_refresh(request, key):
+                    # Outside the request's context, so its identity map is not used after it ends
+                    get_io_executor().submit(_refresh, key, load, ttl, stale_ttl)
+                return _thaw(request, entry)
+
+            def load_and_store():
+                response = load()
+                entry = _freeze(response, ttl)
+                if entry is not None:
+                    _store(key, entry, ttl, stale_ttl)
+                return response, entry
+
+            (response, entry), shared = _flights.do(key, load_and_store)
+            if not shared:
+                return response
+            # The first request's response is shared as its cache entry; a
+            # non-200 one (a 304 for its conditional request) is not
+            return _thaw(request, entry) if entry is not None else load()
+        return wrapper
+
+    return decorator
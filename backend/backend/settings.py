@@ -47,8 +47,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "backend.middleware.AsyncWhiteNoiseMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    "backend.storage.middleware.IdentityMapMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -136,3 +137,147 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True  # Allow all origins in development
 CORS_ALLOW_CREDENTIALS = True
+
+
+# Authentication caches (per process)
+AUTH_TOKEN_CACHE_SIZE = int(os.environ.get('AUTH_TOKEN_CACHE_SIZE', 4096))
+AUTH_TOKEN_CACHE_TTL = int(os.environ.get('AUTH_TOKEN_CACHE_TTL', 300))
+AUTH_PRINCIPAL_CACHE_SIZE = int(os.environ.get('AUTH_PRINCIPAL_CACHE_SIZE', 1024))
+AUTH_PRINCIPAL_CACHE_TTL = int(os.environ.get('AUTH_PRINCIPAL_CACHE_TTL', 60))
+
+# When True, JWTAuthentication trusts the role/active/version claims signed
+# into access tokens and authenticates without reading Firestore. Revoked
+# token versions are picked up by each process within the refresh interval.
+JWT_STATELESS_AUTH = os.environ.get('JWT_STATELESS_AUTH', 'False') == 'True'
+JWT_REVOCATION_REFRESH_SECONDS = int(os.environ.get('JWT_REVOCATION_REFRESH_SECONDS', 30))
+
+# bcrypt process pool. 0 keeps hashing inline on the request thread.
+BCRYPT_POOL_WORKERS = int(os.environ.get('BCRYPT_POOL_WORKERS', 0))
+BCRYPT_POOL_QUEUE_DEPTH = int(os.environ.get('BCRYPT_POOL_QUEUE_DEPTH', 8))
+BCRYPT_POOL_TIMEOUT = float(os.environ.get('BCRYPT_POOL_TIMEOUT', 2.0))
+
+# bcrypt cost. BCRYPT_ROUNDS pins it; otherwise the value written by
+# `manage.py calibrate_bcrypt` for BCRYPT_LATENCY_BUDGET_MS is used.
+# Stored hashes with a different cost are rehashed after a successful login.
+BCRYPT_ROUNDS = int(os.environ['BCRYPT_ROUNDS']) if os.environ.get('BCRYPT_ROUNDS') else None
+BCRYPT_LATENCY_BUDGET_MS = float(os.environ.get('BCRYPT_LATENCY_BUDGET_MS', 250))
+BCRYPT_CALIBRATION_FILE = os.environ.get('BCRYPT_CALIBRATION_FILE', str(BASE_DIR / 'bcrypt_calibration.json'))
+
+# Logins and registrations resolve emails through the email_index collection.
+# Keep the legacy email query as a fallback until `manage.py
+# backfill_email_index` has indexed every existing doctor and patient.
+EMAIL_INDEX_FALLBACK = os.environ.get('EMAIL_INDEX_FALLBACK', 'True') == 'True'
+
+# Storage backend for the repository layer: 'firestore', 'memory' or a
+# dotted path to a DocumentStore class. The memory store can be seeded
+# from a JSON fixture of {collection: {doc_id: document}}.
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'firestore')
+STORAGE_MEMORY_FIXTURE = os.environ.get('STORAGE_MEMORY_FIXTURE')
+# Simulated per-call round trip of the memory store, for benchmarks
+STORAGE_MEMORY_LATENCY_MS = float(os.environ.get('STORAGE_MEMORY_LATENCY_MS', 0))
+# Request-scoped identity map: each document is fetched at most once per request
+STORAGE_IDENTITY_MAP = os.environ.get('STORAGE_IDENTITY_MAP', 'True') == 'True'
+
+# Shared thread pool for concurrent storage reads (backend.concurrency.fan_out)
+# and the default per-request deadline for a fan-out, in seconds.
+IO_POOL_WORKERS = int(os.environ.get('IO_POOL_WORKERS', 16))
+IO_FANOUT_TIMEOUT = float(os.environ.get('IO_FANOUT_TIMEOUT', 5.0))
+
+# Read-write transactions (booking, cancellation): attempts before giving up
+# on contention, and the base of the jittered exponential backoff between them
+TRANSACTION_MAX_ATTEMPTS = int(os.environ.get('TRANSACTION_MAX_ATTEMPTS', 5))
+TRANSACTION_RETRY_DELAY_MS = float(os.environ.get('TRANSACTION_RETRY_DELAY_MS', 10))
+
+# Layout of doctors' time slots for schedules written from now on:
+# 'embedded' (inside the doctor's availability array) or 'documents' (one
+# document per slot under doctors/{uid}/slots). `manage.py migrate_slots`
+# converts existing doctors.
+SLOT_STORAGE = os.environ.get('SLOT_STORAGE', 'embedded')
+
+# Per-process bitmap index of doctors' weekly availability
+# (doctors/availability_index.py): minutes per bit, doctors held, and
+# seconds before an entry is reloaded to pick up other processes' writes
+AVAILABILITY_INDEX_RESOLUTION = int(os.environ.get('AVAILABILITY_INDEX_RESOLUTION', 15))
+AVAILABILITY_INDEX_SIZE = int(os.environ.get('AVAILABILITY_INDEX_SIZE', 10000))
+AVAILABILITY_INDEX_TTL = float(os.environ.get('AVAILABILITY_INDEX_TTL', 30))
+
+# Dated calendar (doctors/dated_slots.py): days of slot instances kept
+# materialized from today, and deletes per batched write in the nightly
+# `manage.py extend_calendar`
+CALENDAR_HORIZON_DAYS = int(os.environ.get('CALENDAR_HORIZON_DAYS', 28))
+CALENDAR_BATCH_SIZE = int(os.environ.get('CALENDAR_BATCH_SIZE', 400))
+
+# Seconds between full rebuilds of the cross-doctor slot search index
+# (doctors/slot_search.py), which picks up other processes' writes
+SLOT_SEARCH_REFRESH_SECONDS = float(os.environ.get('SLOT_SEARCH_REFRESH_SECONDS', 60))
+
+# Seconds between full rebuilds of the doctor search index
+# (doctors/doctor_search.py)
+DOCTOR_SEARCH_REFRESH_SECONDS = float(os.environ.get('DOCTOR_SEARCH_REFRESH_SECONDS', 300))
+
+# Per-process replica of the doctors collection (backend/storage/replica.py),
+# kept current by a Firestore on_snapshot listener. Doctor listings,
+# availability checks and token authentication read from it once it is
+# ready; writes still go to Firestore. Seconds the warm-up waits for the
+# first snapshot, and between checks that the listener is still running.
+DOCTOR_REPLICA = os.environ.get('DOCTOR_REPLICA', 'False') == 'True'
+DOCTOR_REPLICA_READY_TIMEOUT = float(os.environ.get('DOCTOR_REPLICA_READY_TIMEOUT', 10))
+DOCTOR_REPLICA_CHECK_SECONDS = float(os.environ.get('DOCTOR_REPLICA_CHECK_SECONDS', 5))
+
+# Response cache of the read endpoints (backend/response_cache.py), which the
+# write views invalidate by tag. RESPONSE_CACHE_BACKEND is 'locmem' (per
+# process), 'file' (shared by the workers of one host, a stand-in for a
+# cache server), 'memcached', 'redis' or a dotted path to a Django cache
+# backend; RESPONSE_CACHE_LOCATION is its directory or server address.
+RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'True') == 'True'
+RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'locmem')
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 10000))
+# Seconds a request waits for a concurrent one loading the same response
+# (and that a stale entry's background refresh stays claimed) before
+# loading it itself
+RESPONSE_CACHE_LOAD_TIMEOUT = float(os.environ.get('RESPONSE_CACHE_LOAD_TIMEOUT', 10))
+_RESPONSE_CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'responses'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / '.response_cache')),
+    'memcached': ('django.core.cache.backends.memcached.PyMemcacheCache', '127.0.0.1:11211'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379'),
+}
+_backend, _location = _RESPONSE_CACHE_BACKENDS.get(RESPONSE_CACHE_BACKEND, (RESPONSE_CACHE_BACKEND, ''))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': _backend,
+        'LOCATION': os.environ.get('RESPONSE_CACHE_LOCATION', _location),
+        # Entries are written with their view's TTL; tag versions never expire
+        'TIMEOUT': None,
+        'OPTIONS': (
+            {'MAX_ENTRIES': RESPONSE_CACHE_MAX_ENTRIES}
+            if RESPONSE_CACHE_BACKEND in ('locmem', 'file') else {}
+        ),
+    },
+}
+
+# Keyset pagination for list endpoints (?limit= and ?cursor=)
+PAGINATION_DEFAULT_LIMIT = int(os.environ.get('PAGINATION_DEFAULT_LIMIT', 50))
+PAGINATION_MAX_LIMIT = int(os.environ.get('PAGINATION_MAX_LIMIT', 200))
+
+# Called by gunicorn's post_worker_init (gunicorn.conf.py) before a worker
+# accepts traffic. Set WARMUP_ON_START=False to skip.
+WARMUP_ON_START = os.environ.get('WARMUP_ON_START', 'True') == 'True'
+WARMUP_HOOKS = [
+    'backend.storage.warm_up',
+    'backend.storage.warm_up_replica',
+    'backend.concurrency.get_io_executor',
+    'doctors.revocation.warm_up',
+    'doctors.auth.warm_up',
+    'doctors.availability.warm_up',
+    'doctors.doctor_search.warm_up',
+]
+
+# Route the hot endpoints to the native async views (*/async_views.py).
+# Only useful under an ASGI server, e.g.
+# gunicorn -k uvicorn.workers.UvicornWorker backend.asgi:application
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'False') == 'True'
@@ -0,0 +1,173 @@
+"""
+Storage layer used by every view.
+
+Views talk to the repositories below; the repositories talk to a
+DocumentStore chosen by settings.STORAGE_BACKEND:
+
+    'firestore'  Cloud Firestore (default)
+    'memory'     thread-safe in-process store, optionally seeded from
+                 settings.STORAGE_MEMORY_FIXTURE (a JSON file)
+    dotted path  any DocumentStore subclass, e.g. a cached or batched wrapper
+
+Unless STORAGE_IDENTITY_MAP is False the store is wrapped in an
+IdentityMapStore, so with IdentityMapMiddleware installed each document is
+read at most once per request.
+
+Async views use get_async_store() through the repositories' a-prefixed
+methods (aget, apage, ...): the Firestore AsyncClient for 'firestore', an
+asyncio view of the memory store for 'memory', and the sync store run on
+the shared I/O pool for anything else. The identity map is sync-only.
+
+With DOCTOR_REPLICA enabled, doctor_replica keeps a per-process copy of the
+doctors collection current through the store's change feed, and
+doctor_repo reads made with replica=True are served from memory.
+"""
+
+import threading
+from django.conf import settings
+from django.utils.module_loading import import_string
+from .base import (
+    DocumentStore,
+    AsyncDocumentStore,
+    ThreadedAsyncStore,
+    Transaction,
+    Snapshot,
+    StorageError,
+    AlreadyExistsError,
+    NotFoundError,
+    TransactionConflict,
+    ASCENDING,
+    DESCENDING,
+    DOCUMENT_ID
+)
+from .pagination import Page, InvalidCursor, encode_cursor, decode_cursor, paginate, parse_page_params
+from .identity_map import IdentityMapStore
+from .replica import CollectionReplica
+from .repositories import (
+    EmailAlreadyRegistered,
+    normalize_email,
+    email_index_id,
+    email_index_entry,
+    EMAIL_INDEX_COLLECTION,
+    DoctorRepository,
+    PatientRepository,
+    AppointmentRepository,
+    HealthRepository,
+    SlotRepository,
+    CalendarRepository,
+    TokenVersionRepository
+)
+
+_store = None
+_async_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> DocumentStore:
+    """Process-wide DocumentStore, created on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = _build_store(getattr(settings, 'STORAGE_BACKEND', 'firestore'))
+                if getattr(settings, 'STORAGE_IDENTITY_MAP', True):
+                    store = IdentityMapStore(store)
+                _store = store
+    return _store
+
+
+def get_async_store() -> AsyncDocumentStore:
+    """
+    Process-wide AsyncDocumentStore for the async views.
+
+    Firestore uses the AsyncClient. The memory store is shared with
+    get_store(), so sync and async views see the same documents; any other
+    backend is driven from the I/O thread pool.
+    """
+    global _async_store
+    if _async_store is None:
+        store = get_store()
+        with _store_lock:
+            if _async_store is None:
+                _async_store = _build_async_store(getattr(store, 'inner', store))
+    return _async_store
+
+
+def set_store(store: DocumentStore) -> None:
+    """Replace the active store (benchmarks, local tooling)"""
+    global _store, _async_store
+    with _store_lock:
+        _store = store
+        _async_store = None
+
+
+def run_transaction(fn):
+    """
+    Run fn(transaction) as a read-write transaction on the active store,
+    retrying on contention per TRANSACTION_MAX_ATTEMPTS and
+    TRANSACTION_RETRY_DELAY_MS (see DocumentStore.run_transaction).
+    """
+    return get_store().run_transaction(fn, **_transaction_options())
+
+
+async def arun_transaction(fn):
+    """run_transaction() for the async views; fn is the same blocking function"""
+    return await get_async_store().run_transaction(fn, **_transaction_options())
+
+
+def _transaction_options() -> dict:
+    return {
+        'max_attempts': getattr(settings, 'TRANSACTION_MAX_ATTEMPTS', 5),
+        'retry_delay': getattr(settings, 'TRANSACTION_RETRY_DELAY_MS', 10) / 1000
+    }
+
+
+def warm_up() -> None:
+    """Warm-up hook: create the store and open its connection"""
+    get_store().warm_up()
+
+
+def warm_up_replica() -> None:
+    """Warm-up hook: wait up to DOCTOR_REPLICA_READY_TIMEOUT seconds for the doctors replica"""
+    if doctor_replica is not None:
+        if not doctor_replica.wait_ready(getattr(settings, 'DOCTOR_REPLICA_READY_TIMEOUT', 10)):
+            raise RuntimeError('Doctors replica not ready, reads go to the store until it is')
+
+
+def _build_store(backend: str) -> DocumentStore:
+    if backend == 'firestore':
+        from .firestore_store import FirestoreStore
+        return FirestoreStore()
+    if backend == 'memory':
+        from .memory_store import MemoryStore
+        store = MemoryStore(latency=getattr(settings, 'STORAGE_MEMORY_LATENCY_MS', 0) / 1000)
+        fixture = getattr(settings, 'STORAGE_MEMORY_FIXTURE', None)
+        if fixture:
+            store.load_file(fixture)
+        return store
+    return import_string(backend)()
+
+
+def _build_async_store(store: DocumentStore) -> AsyncDocumentStore:
+    from .firestore_store import FirestoreStore, AsyncFirestoreStore
+    from .memory_store import MemoryStore, AsyncMemoryStore
+    if isinstance(store, FirestoreStore):
+        return AsyncFirestoreStore()
+    if isinstance(store, MemoryStore):
+        return AsyncMemoryStore(store)
+    return ThreadedAsyncStore(store)
+
+
+doctor_replica = CollectionReplica(
+    get_store,
+    DoctorRepository.collection,
+    check_interval=getattr(settings, 'DOCTOR_REPLICA_CHECK_SECONDS', 5)
+) if getattr(settings, 'DOCTOR_REPLICA', False) else None
+
+doctor_repo = DoctorRepository(get_store, get_async_store, replica=doctor_replica)
+patient_repo = PatientRepository(get_store, get_async_store)
+appointment_repo = AppointmentRepository(get_store, get_async_store)
+health_repo = HealthRepository(get_store, get_async_store)
+slot_repo = SlotRepository(get_store, get_async_store)
+calendar_repo = CalendarRepository(get_store, get_async_store)
+token_version_repo = TokenVersionRepository(get_store, get_async_store)
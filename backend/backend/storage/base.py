@@ -0,0 +1,254 @@
+import asyncio
+import functools
+import random
+import time
+from collections import namedtuple
+
+# A stored document as returned by queries
+Snapshot = namedtuple('Snapshot', ['id', 'data'])
+
+ASCENDING = 'ASCENDING'
+DESCENDING = 'DESCENDING'
+
+# Pseudo-field for ordering by document id, as Firestore's FieldPath.document_id()
+DOCUMENT_ID = '__name__'
+
+
+class StorageError(Exception):
+    """Base class for storage backend errors"""
+
+
+class AlreadyExistsError(StorageError):
+    """Raised by create() when the document already exists"""
+
+
+class NotFoundError(StorageError):
+    """Raised by update() when the document does not exist"""
+
+
+class TransactionConflict(StorageError):
+    """Raised by run_transaction() when every attempt lost to a concurrent write"""
+
+
+class Transaction:
+    """
+    One attempt of a run_transaction() body.
+
+    get() reads through the transaction, so the commit fails if the document
+    changed since. Writes are buffered in self.writes as commit() tuples and
+    applied together when the body returns; all reads must come first.
+    """
+
+    def __init__(self):
+        self.writes = []
+
+    def get(self, collection: str, doc_id: str):
+        raise NotImplementedError
+
+    def get_many(self, collection: str, doc_ids) -> dict:
+        """{doc_id: document} for the ids that exist, read through the transaction"""
+        found = {}
+        for doc_id in dict.fromkeys(doc_ids):
+            doc = self.get(collection, doc_id)
+            if doc is not None:
+                found[doc_id] = doc
+        return found
+
+    def create(self, collection: str, doc_id: str, data: dict) -> None:
+        self.writes.append(('create', collection, doc_id, data))
+
+    def set(self, collection: str, doc_id: str, data: dict) -> None:
+        self.writes.append(('set', collection, doc_id, data))
+
+    def update(self, collection: str, doc_id: str, data: dict) -> None:
+        self.writes.append(('update', collection, doc_id, data))
+
+    def delete(self, collection: str, doc_id: str) -> None:
+        self.writes.append(('delete', collection, doc_id, None))
+
+
+def retry_delays(max_attempts: int, retry_delay: float):
+    """
+    Sleep intervals between transaction attempts: exponential backoff with
+    full jitter, so contending writers spread out instead of retrying in step.
+    """
+    for attempt in range(max_attempts - 1):
+        yield random.uniform(0, retry_delay * 2 ** attempt)
+
+
+def retry_transaction(attempt, max_attempts: int = 5, retry_delay: float = 0.01):
+    """Call attempt() until it does not raise TransactionConflict, at most max_attempts times"""
+    for delay in retry_delays(max_attempts, retry_delay):
+        try:
+            return attempt()
+        except TransactionConflict:
+            time.sleep(delay)
+    return attempt()
+
+
+class DocumentStore:
+    """
+    Minimal document-database interface shared by every storage backend.
+
+    Collections are addressed by slash-separated paths ('doctors' or
+    'doctors/<uid>/slots'). Documents are plain dicts; write payloads may
+    contain firestore.SERVER_TIMESTAMP and firestore.Increment values, which
+    each backend resolves with Firestore semantics.
+
+    query() filters are (field, op, value) tuples using Firestore operators,
+    order_by is a sequence of (field, ASCENDING|DESCENDING) pairs and fields
+    restricts the returned keys. start_after is a list of values aligned
+    with order_by; results begin after the first document matching them.
+    """
+
+    def get(self, collection: str, doc_id: str, fields=None):
+        """Return the document dict, or None if it does not exist"""
+        raise NotImplementedError
+
+    def warm_up(self) -> None:
+        """Open connections ahead of the first request (no-op by default)"""
+
+    def get_many(self, collection: str, doc_ids, fields=None) -> dict:
+        """Fetch several documents at once, returning {doc_id: document} for those that exist"""
+        raise NotImplementedError
+
+    def set(self, collection: str, doc_id: str, data: dict, merge: bool = False) -> None:
+        raise NotImplementedError
+
+    def create(self, collection: str, doc_id: str, data: dict) -> None:
+        """Write a new document, raising AlreadyExistsError if it exists"""
+        raise NotImplementedError
+
+    def update(self, collection: str, doc_id: str, data: dict) -> None:
+        """Merge fields into an existing document, raising NotFoundError if missing"""
+        raise NotImplementedError
+
+    def delete(self, collection: str, doc_id: str) -> None:
+        raise NotImplementedError
+
+    def query(self, collection: str, filters=(), order_by=(), limit=None, fields=None, start_after=None):
+        """Return a list of Snapshot matching every filter"""
+        raise NotImplementedError
+
+    def commit(self, writes) -> None:
+        """
+        Apply (op, collection, doc_id, data) writes atomically.
+
+        op is 'create', 'set', 'update' or 'delete'. A failing create or
+        update aborts the whole batch.
+        """
+        raise NotImplementedError
+
+    def run_transaction(self, fn, max_attempts: int = 5, retry_delay: float = 0.01):
+        """
+        Run fn(transaction) as one read-write transaction and return its result.
+
+        The reads and the buffered writes commit atomically. When another
+        write touched a document read by fn, the whole function runs again
+        after a jittered backoff; TransactionConflict is raised once
+        max_attempts are used up. Exceptions from fn abort without retrying.
+        """
+        raise NotImplementedError
+
+    def watch(self, collection: str, on_change):
+        """
+        Subscribe to the changes of a top-level collection.
+
+        on_change(changes, read_time) receives [(doc_id, document or None
+        when deleted)], first for every document of the collection, then
+        for each batch of changes, on a thread of the backend's choosing.
+        Returns a handle with unsubscribe() and an is_active property.
+        Backends without a change feed raise NotImplementedError.
+        """
+        raise NotImplementedError
+
+
+class AsyncDocumentStore:
+    """
+    Coroutine counterpart of DocumentStore, used by the async views.
+
+    Same methods and semantics; every call must be awaited.
+    """
+
+    async def warm_up(self) -> None:
+        """Open connections ahead of the first request (no-op by default)"""
+
+    async def get(self, collection: str, doc_id: str, fields=None):
+        raise NotImplementedError
+
+    async def get_many(self, collection: str, doc_ids, fields=None) -> dict:
+        raise NotImplementedError
+
+    async def set(self, collection: str, doc_id: str, data: dict, merge: bool = False) -> None:
+        raise NotImplementedError
+
+    async def create(self, collection: str, doc_id: str, data: dict) -> None:
+        raise NotImplementedError
+
+    async def update(self, collection: str, doc_id: str, data: dict) -> None:
+        raise NotImplementedError
+
+    async def delete(self, collection: str, doc_id: str) -> None:
+        raise NotImplementedError
+
+    async def query(self, collection: str, filters=(), order_by=(), limit=None, fields=None, start_after=None):
+        raise NotImplementedError
+
+    async def commit(self, writes) -> None:
+        raise NotImplementedError
+
+    async def run_transaction(self, fn, max_attempts: int = 5, retry_delay: float = 0.01):
+        """
+        Await DocumentStore.run_transaction() semantics.
+
+        fn is the same blocking function the sync views use, so transaction
+        bodies are written once; it runs on the shared I/O pool.
+        """
+        raise NotImplementedError
+
+
+class ThreadedAsyncStore(AsyncDocumentStore):
+    """
+    AsyncDocumentStore adapter for any blocking DocumentStore.
+
+    Calls run on the shared I/O thread pool, so a dotted-path storage
+    backend can serve the async views without an async implementation.
+    """
+
+    def __init__(self, inner: DocumentStore):
+        self.inner = inner
+
+    async def _call(self, method, *args, **kwargs):
+        from backend.concurrency import get_io_executor
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_io_executor(), functools.partial(method, *args, **kwargs))
+
+    async def warm_up(self):
+        await self._call(self.inner.warm_up)
+
+    async def get(self, collection, doc_id, fields=None):
+        return await self._call(self.inner.get, collection, doc_id, fields=fields)
+
+    async def get_many(self, collection, doc_ids, fields=None):
+        return await self._call(self.inner.get_many, collection, list(doc_ids), fields=fields)
+
+    async def set(self, collection, doc_id, data, merge=False):
+        await self._call(self.inner.set, collection, doc_id, data, merge=merge)
+
+    async def create(self, collection, doc_id, data):
+        await self._call(self.inner.create, collection, doc_id, data)
+
+    async def update(self, collection, doc_id, data):
+        await self._call(self.inner.update, collection, doc_id, data)
+
+    async def delete(self, collection, doc_id):
+        await self._call(self.inner.delete, collection, doc_id)
+
+    async def query(self, collection, filters=(), order_by=(), limit=None, fields=None, start_after=None):
+        return await self._call(self.inner.query, collection, filters, order_by, limit, fields, start_after)
+
+    async def commit(self, writes):
+        await self._call(self.inner.commit, writes)
+
+    async def run_transaction(self, fn, max_attempts=5, retry_delay=0.01):
+        return await self._call(self.inner.run_transaction, fn, max_attempts=max_attempts, retry_delay=retry_delay)
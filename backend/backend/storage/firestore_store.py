@@ -0,0 +1,252 @@
+from google.api_core.exceptions import AlreadyExists, Aborted, NotFound
+from firebase_admin import firestore
+from backend.firebase_init import get_db, get_async_db
+from .base import (
+    DocumentStore,
+    AsyncDocumentStore,
+    ThreadedAsyncStore,
+    Transaction,
+    Snapshot,
+    AlreadyExistsError,
+    NotFoundError,
+    TransactionConflict,
+    retry_transaction,
+    DESCENDING
+)
+
+GET_ALL_CHUNK_SIZE = 100
+
+
+def build_query(collection_ref, filters=(), order_by=(), limit=None, fields=None, start_after=None):
+    """Apply query() arguments to a sync or async Firestore collection reference"""
+    query = collection_ref
+    for field, op, value in filters:
+        query = query.where(field, op, value)
+    for field, direction in order_by:
+        query = query.order_by(
+            field,
+            direction=firestore.Query.DESCENDING if direction == DESCENDING else firestore.Query.ASCENDING
+        )
+    if start_after is not None:
+        # A '__name__' value given as a plain id is turned into a reference by the client
+        query = query.start_after(list(start_after))
+    if fields is not None:
+        query = query.select(list(fields))
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def build_batch(client, writes):
+    """WriteBatch for commit() writes on a sync or async client"""
+    batch = client.batch()
+    for op, collection, doc_id, data in writes:
+        ref = client.collection(collection).document(doc_id)
+        if op == 'create':
+            batch.create(ref, data)
+        elif op == 'set':
+            batch.set(ref, data)
+        elif op == 'update':
+            batch.update(ref, data)
+        elif op == 'delete':
+            batch.delete(ref)
+        else:
+            raise ValueError(f'Unknown write operation: {op}')
+    return batch
+
+
+class FirestoreTransaction(Transaction):
+    """Transaction attempt on a google.cloud.firestore Transaction"""
+
+    def __init__(self, client, transaction):
+        super().__init__()
+        self.client = client
+        self.transaction = transaction
+
+    def get(self, collection, doc_id):
+        doc = self.client.collection(collection).document(doc_id).get(transaction=self.transaction)
+        return doc.to_dict() if doc.exists else None
+
+    def get_many(self, collection, doc_ids):
+        collection_ref = self.client.collection(collection)
+        refs = [collection_ref.document(doc_id) for doc_id in dict.fromkeys(doc_ids)]
+        found = {}
+        for start in range(0, len(refs), GET_ALL_CHUNK_SIZE):
+            for doc in self.client.get_all(refs[start:start + GET_ALL_CHUNK_SIZE], transaction=self.transaction):
+                if doc.exists:
+                    found[doc.id] = doc.to_dict()
+        return found
+
+    def flush(self):
+        """Hand the buffered writes to the Firestore transaction, which commits them"""
+        for op, collection, doc_id, data in self.writes:
+            ref = self.client.collection(collection).document(doc_id)
+            if op == 'delete':
+                self.transaction.delete(ref)
+            else:
+                getattr(self.transaction, op)(ref, data)
+
+
+class FirestoreStore(DocumentStore):
+    """DocumentStore backed by the Cloud Firestore client"""
+
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self):
+        client = self._client or get_db()
+        if client is None:
+            raise RuntimeError('Firestore is not configured (missing Firebase credentials)')
+        return client
+
+    def warm_up(self):
+        # A keys-only single-document query opens the gRPC channel and authenticates
+        list(self.client.collection('doctors').select([]).limit(1).stream())
+
+    def get(self, collection, doc_id, fields=None):
+        doc = self.client.collection(collection).document(doc_id).get(field_paths=fields)
+        return doc.to_dict() if doc.exists else None
+
+    def get_many(self, collection, doc_ids, fields=None):
+        collection_ref = self.client.collection(collection)
+        refs = [collection_ref.document(doc_id) for doc_id in dict.fromkeys(doc_ids)]
+        found = {}
+        # One BatchGetDocuments round trip per chunk
+        for start in range(0, len(refs), GET_ALL_CHUNK_SIZE):
+            for doc in self.client.get_all(refs[start:start + GET_ALL_CHUNK_SIZE], field_paths=fields):
+                if doc.exists:
+                    found[doc.id] = doc.to_dict()
+        return found
+
+    def set(self, collection, doc_id, data, merge=False):
+        self.client.collection(collection).document(doc_id).set(data, merge=merge)
+
+    def create(self, collection, doc_id, data):
+        try:
+            self.client.collection(collection).document(doc_id).create(data)
+        except AlreadyExists as e:
+            raise AlreadyExistsError(str(e))
+
+    def update(self, collection, doc_id, data):
+        try:
+            self.client.collection(collection).document(doc_id).update(data)
+        except NotFound as e:
+            raise NotFoundError(str(e))
+
+    def delete(self, collection, doc_id):
+        self.client.collection(collection).document(doc_id).delete()
+
+    def query(self, collection, filters=(), order_by=(), limit=None, fields=None, start_after=None):
+        query = build_query(self.client.collection(collection), filters, order_by, limit, fields, start_after)
+        return [Snapshot(doc.id, doc.to_dict()) for doc in query.stream()]
+
+    def commit(self, writes):
+        try:
+            build_batch(self.client, writes).commit()
+        except AlreadyExists as e:
+            raise AlreadyExistsError(str(e))
+        except NotFound as e:
+            raise NotFoundError(str(e))
+
+    def run_transaction(self, fn, max_attempts=5, retry_delay=0.01):
+        return retry_transaction(lambda: self._run_attempt(fn), max_attempts, retry_delay)
+
+    def watch(self, collection, on_change):
+        # The listener's first snapshot reports every document as ADDED;
+        # the returned Watch has unsubscribe() and is_active
+        def on_snapshot(docs, changes, read_time):
+            on_change([
+                (change.document.id, None if change.type.name == 'REMOVED' else change.document.to_dict())
+                for change in changes
+            ], read_time)
+
+        return self.client.collection(collection).on_snapshot(on_snapshot)
+
+    def _run_attempt(self, fn):
+        client = self.client
+
+        @firestore.transactional
+        def attempt(transaction):
+            wrapper = FirestoreTransaction(client, transaction)
+            result = fn(wrapper)
+            wrapper.flush()
+            return result
+
+        # One attempt per Firestore transaction: retries are ours, with jitter
+        try:
+            return attempt(client.transaction(max_attempts=1))
+        except Aborted as e:
+            raise TransactionConflict(str(e))
+        except ValueError as e:
+            # The client wraps a commit that lost to contention in a ValueError
+            if isinstance(e.__cause__, Aborted):
+                raise TransactionConflict(str(e.__cause__))
+            raise
+        except AlreadyExists as e:
+            raise AlreadyExistsError(str(e))
+        except NotFound as e:
+            raise NotFoundError(str(e))
+
+
+class AsyncFirestoreStore(AsyncDocumentStore):
+    """AsyncDocumentStore backed by the Firestore AsyncClient of the running event loop"""
+
+    @property
+    def client(self):
+        client = get_async_db()
+        if client is None:
+            raise RuntimeError('Firestore is not configured (missing Firebase credentials)')
+        return client
+
+    async def warm_up(self):
+        async for _ in self.client.collection('doctors').select([]).limit(1).stream():
+            pass
+
+    async def get(self, collection, doc_id, fields=None):
+        doc = await self.client.collection(collection).document(doc_id).get(field_paths=fields)
+        return doc.to_dict() if doc.exists else None
+
+    async def get_many(self, collection, doc_ids, fields=None):
+        client = self.client
+        collection_ref = client.collection(collection)
+        refs = [collection_ref.document(doc_id) for doc_id in dict.fromkeys(doc_ids)]
+        found = {}
+        for start in range(0, len(refs), GET_ALL_CHUNK_SIZE):
+            async for doc in client.get_all(refs[start:start + GET_ALL_CHUNK_SIZE], field_paths=fields):
+                if doc.exists:
+                    found[doc.id] = doc.to_dict()
+        return found
+
+    async def set(self, collection, doc_id, data, merge=False):
+        await self.client.collection(collection).document(doc_id).set(data, merge=merge)
+
+    async def create(self, collection, doc_id, data):
+        try:
+            await self.client.collection(collection).document(doc_id).create(data)
+        except AlreadyExists as e:
+            raise AlreadyExistsError(str(e))
+
+    async def update(self, collection, doc_id, data):
+        try:
+            await self.client.collection(collection).document(doc_id).update(data)
+        except NotFound as e:
+            raise NotFoundError(str(e))
+
+    async def delete(self, collection, doc_id):
+        await self.client.collection(collection).document(doc_id).delete()
+
+    async def query(self, collection, filters=(), order_by=(), limit=None, fields=None, start_after=None):
+        query = build_query(self.client.collection(collection), filters, order_by, limit, fields, start_after)
+        return [Snapshot(doc.id, doc.to_dict()) async for doc in query.stream()]
+
+    async def commit(self, writes):
+        try:
+            await build_batch(self.client, writes).commit()
+        except AlreadyExists as e:
+            raise AlreadyExistsError(str(e))
+        except NotFound as e:
+            raise NotFoundError(str(e))
+
+    async def run_transaction(self, fn, max_attempts=5, retry_delay=0.01):
+        return await ThreadedAsyncStore(FirestoreStore()).run_transaction(fn, max_attempts, retry_delay)
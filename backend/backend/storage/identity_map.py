@@ -0,0 +1,172 @@
+import contextvars
+import threading
+from .base import DocumentStore
+from .memory_store import apply_write, project
+
+_MISSING = object()
+_current = contextvars.ContextVar('storage_identity_map', default=None)
+
+
+class IdentityMap:
+    """
+    Documents already fetched during one request, keyed by (collection, doc_id).
+
+    Only full-document reads are recorded. A key mapped to _MISSING is a
+    document known not to exist.
+    """
+
+    def __init__(self):
+        self.docs = {}
+        self.reads = 0
+        self.reads_saved = 0
+        self.lock = threading.Lock()
+
+    def report(self) -> dict:
+        return {
+            'reads': self.reads,
+            'reads_saved': self.reads_saved,
+            'documents': len(self.docs)
+        }
+
+
+def begin_request() -> contextvars.Token:
+    """Start an identity map for the current request; pass the token to end_request()"""
+    return _current.set(IdentityMap())
+
+
+def end_request(token: contextvars.Token) -> IdentityMap:
+    identity_map = _current.get()
+    _current.reset(token)
+    return identity_map
+
+
+def current_identity_map():
+    return _current.get()
+
+
+class IdentityMapStore(DocumentStore):
+    """
+    DocumentStore wrapper that fetches each document at most once per request.
+
+    Outside a request (no active identity map) every call passes straight
+    through. Writes are applied to the cached copy with the same sentinel
+    resolution as the memory store, so a read after an update is served
+    locally; server timestamps are approximated by the local clock.
+    """
+
+    def __init__(self, inner: DocumentStore):
+        self.inner = inner
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    def warm_up(self):
+        self.inner.warm_up()
+
+    def get(self, collection, doc_id, fields=None):
+        identity_map = _current.get()
+        if identity_map is None:
+            return self.inner.get(collection, doc_id, fields=fields)
+
+        key = (collection, doc_id)
+        with identity_map.lock:
+            cached = identity_map.docs.get(key)
+            if cached is not None:
+                identity_map.reads_saved += 1
+                return None if cached is _MISSING else project(cached, fields)
+
+        doc = self.inner.get(collection, doc_id, fields=fields)
+        with identity_map.lock:
+            identity_map.reads += 1
+            if fields is None:
+                identity_map.docs[key] = _MISSING if doc is None else project(doc, None)
+        return doc
+
+    def get_many(self, collection, doc_ids, fields=None):
+        identity_map = _current.get()
+        if identity_map is None:
+            return self.inner.get_many(collection, doc_ids, fields=fields)
+
+        found, pending = {}, []
+        with identity_map.lock:
+            for doc_id in dict.fromkeys(doc_ids):
+                cached = identity_map.docs.get((collection, doc_id))
+                if cached is None:
+                    pending.append(doc_id)
+                    continue
+                identity_map.reads_saved += 1
+                if cached is not _MISSING:
+                    found[doc_id] = project(cached, fields)
+
+        if pending:
+            fetched = self.inner.get_many(collection, pending, fields=fields)
+            found.update(fetched)
+            with identity_map.lock:
+                identity_map.reads += len(pending)
+                if fields is None:
+                    for doc_id in pending:
+                        doc = fetched.get(doc_id)
+                        identity_map.docs[(collection, doc_id)] = _MISSING if doc is None else project(doc, None)
+        return found
+
+    def query(self, collection, filters=(), order_by=(), limit=None, fields=None, start_after=None):
+        results = self.inner.query(collection, filters, order_by, limit, fields, start_after)
+        identity_map = _current.get()
+        if identity_map is not None:
+            with identity_map.lock:
+                identity_map.reads += len(results)
+                if fields is None:
+                    for snapshot in results:
+                        identity_map.docs[(collection, snapshot.id)] = project(snapshot.data, None)
+        return results
+
+    def set(self, collection, doc_id, data, merge=False):
+        self.inner.set(collection, doc_id, data, merge=merge)
+        self._apply('set_merge' if merge else 'set', collection, doc_id, data)
+
+    def create(self, collection, doc_id, data):
+        self.inner.create(collection, doc_id, data)
+        self._apply('create', collection, doc_id, data)
+
+    def update(self, collection, doc_id, data):
+        self.inner.update(collection, doc_id, data)
+        self._apply('update', collection, doc_id, data)
+
+    def delete(self, collection, doc_id):
+        self.inner.delete(collection, doc_id)
+        self._apply('delete', collection, doc_id, None)
+
+    def commit(self, writes):
+        self.inner.commit(writes)
+        for op, collection, doc_id, data in writes:
+            self._apply(op, collection, doc_id, data)
+
+    def run_transaction(self, fn, max_attempts=5, retry_delay=0.01):
+        # Transaction reads go to the backend; the writes of the attempt
+        # that committed are then applied to the cached documents
+        committed = []
+
+        def recorded(transaction):
+            result = fn(transaction)
+            committed[:] = transaction.writes
+            return result
+
+        result = self.inner.run_transaction(recorded, max_attempts, retry_delay)
+        for op, collection, doc_id, data in committed:
+            self._apply(op, collection, doc_id, data)
+        return result
+
+    def _apply(self, op, collection, doc_id, data):
+        identity_map = _current.get()
+        if identity_map is None:
+            return
+        key = (collection, doc_id)
+        with identity_map.lock:
+            cached = identity_map.docs.get(key)
+            if op in ('update', 'set_merge') and cached is None:
+                # Partial write to a document we never read: nothing to keep in sync
+                identity_map.docs.pop(key, None)
+                return
+            updated = apply_write(op, None if cached is _MISSING else cached, data)
+            identity_map.docs[key] = _MISSING if updated is None else updated
+
@@ -0,0 +1,41 @@
+"""
+Composite Firestore indexes required by the repository queries.
+
+Each repository lists the shapes of the queries it issues in
+``query_shapes``: (collection, equality fields, order_by). Range filters
+are always on the first order_by field, so they need no extra index.
+`manage.py firestore_indexes` turns the shapes into firestore.indexes.json
+for `firebase deploy --only firestore:indexes`.
+"""
+
+import json
+from .base import ASCENDING, DOCUMENT_ID
+
+
+def composite_index(collection: str, equality_fields, order_by):
+    """
+    Index definition for one query shape, or None when Firestore's
+    automatic single-field indexes already serve it.
+    """
+    order_by = [(field, direction) for field, direction in order_by if field != DOCUMENT_ID]
+    if not order_by or len(list(equality_fields)) + len(order_by) < 2:
+        return None
+    fields = [{'fieldPath': field, 'order': ASCENDING} for field in equality_fields]
+    fields += [{'fieldPath': field, 'order': direction} for field, direction in order_by]
+    return {
+        'collectionGroup': collection.rsplit('/', 1)[-1],
+        'queryScope': 'COLLECTION',
+        'fields': fields
+    }
+
+
+def build_index_file(repositories) -> dict:
+    """firestore.indexes.json content for every shape declared by repositories"""
+    indexes = []
+    for repository in repositories:
+        for collection, equality_fields, order_by in getattr(repository, 'query_shapes', ()):
+            index = composite_index(collection, equality_fields, order_by)
+            if index is not None and index not in indexes:
+                indexes.append(index)
+    indexes.sort(key=lambda index: json.dumps(index, sort_keys=True))
+    return {'indexes': indexes, 'fieldOverrides': []}
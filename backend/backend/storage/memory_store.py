@@ -0,0 +1,437 @@
+import asyncio
+import copy
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from firebase_admin import firestore
+from .base import (
+    DocumentStore,
+    AsyncDocumentStore,
+    ThreadedAsyncStore,
+    Transaction,
+    Snapshot,
+    AlreadyExistsError,
+    NotFoundError,
+    TransactionConflict,
+    retry_transaction,
+    DESCENDING,
+    DOCUMENT_ID
+)
+
+# Firestore's cross-type ordering: null < bool < number < timestamp < string < bytes < array < map
+_TYPE_RANK = [
+    (type(None), 0),
+    (bool, 1),
+    ((int, float), 2),
+    (datetime, 3),
+    (str, 4),
+    (bytes, 5),
+    ((list, tuple), 6),
+    (dict, 7)
+]
+
+
+def _rank(value):
+    for types, rank in _TYPE_RANK:
+        if isinstance(value, types):
+            return rank
+    return len(_TYPE_RANK)
+
+
+def _sort_key(value):
+    rank = _rank(value)
+    if rank == 6:
+        return (rank, tuple(_sort_key(item) for item in value))
+    if rank == 7:
+        return (rank, tuple(sorted((k, _sort_key(v)) for k, v in value.items())))
+    if rank == 0:
+        return (rank, 0)
+    return (rank, value)
+
+
+def _is_after(values, cursor, order_by):
+    """True when order values sort strictly after a start_after cursor prefix"""
+    for value, bound, (_, direction) in zip(values, cursor, order_by):
+        left, right = _sort_key(value), _sort_key(bound)
+        if left != right:
+            return left < right if direction == DESCENDING else left > right
+    return False
+
+
+def _get_field(data, field):
+    value = data
+    for part in field.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            raise KeyError(field)
+        value = value[part]
+    return value
+
+
+def _compare(op, actual, expected):
+    if op == '==':
+        return _rank(actual) == _rank(expected) and actual == expected
+    if op == '!=':
+        return actual is not None and not (_rank(actual) == _rank(expected) and actual == expected)
+    if op in ('<', '<=', '>', '>='):
+        # Range filters only match values of the same type class
+        if _rank(actual) != _rank(expected):
+            return False
+        left, right = _sort_key(actual), _sort_key(expected)
+        return {
+            '<': left < right,
+            '<=': left <= right,
+            '>': left > right,
+            '>=': left >= right
+        }[op]
+    if op == 'in':
+        return any(_compare('==', actual, item) for item in expected)
+    if op == 'not-in':
+        return actual is not None and not any(_compare('==', actual, item) for item in expected)
+    if op == 'array_contains':
+        return isinstance(actual, list) and any(_compare('==', item, expected) for item in actual)
+    if op == 'array_contains_any':
+        return isinstance(actual, list) and any(_compare('==', item, e) for item in actual for e in expected)
+    raise ValueError(f'Unsupported filter operator: {op}')
+
+
+def _resolve(value, current):
+    """Replace write sentinels with the values Firestore would store"""
+    if value is firestore.SERVER_TIMESTAMP:
+        return datetime.now(timezone.utc)
+    if isinstance(value, firestore.Increment):
+        return (current if isinstance(current, (int, float)) and not isinstance(current, bool) else 0) + value.value
+    if isinstance(value, dict):
+        base = current if isinstance(current, dict) else {}
+        return {k: _resolve(v, base.get(k)) for k, v in value.items()}
+    return copy.deepcopy(value)
+
+
+def _merge(current, data):
+    """Deep-merge a set(merge=True) payload the way Firestore merges maps"""
+    merged = copy.deepcopy(current) if isinstance(current, dict) else {}
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = _resolve(value, merged.get(key))
+    return merged
+
+
+def match_filters(doc, filters) -> bool:
+    """True when doc satisfies every (field, op, value) filter; a missing field never matches"""
+    try:
+        return all(_compare(op, _get_field(doc, field), value) for field, op, value in filters)
+    except KeyError:
+        return False
+
+
+def project(doc, fields):
+    """Copy of doc restricted to the given top-level fields (all fields if None)"""
+    if fields is None:
+        return copy.deepcopy(doc)
+    return {field: copy.deepcopy(doc[field]) for field in fields if field in doc}
+
+
+def apply_write(op, current, data):
+    """
+    Document contents after applying one write to current (None if absent).
+
+    Returns None when the write deletes the document. Shared by MemoryStore
+    and the request identity map so both resolve writes identically.
+    """
+    if op == 'delete':
+        return None
+    if op in ('create', 'set'):
+        return _resolve(data, None)
+    if op == 'set_merge':
+        return _merge(current, data)
+    if op == 'update':
+        updated = copy.deepcopy(current)
+        for path, value in data.items():
+            target = updated
+            parts = path.split('.')
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = _resolve(value, target.get(parts[-1]))
+        return updated
+    raise ValueError(f'Unknown write operation: {op}')
+
+
+class MemoryStore(DocumentStore):
+    """
+    Thread-safe in-process DocumentStore with Firestore query semantics.
+
+    Used for local development, load tests and profiling without a Firebase
+    project. Documents are copied on every read and write so callers can
+    never mutate stored state, mirroring a real round trip. latency (seconds)
+    adds a simulated network round trip to every operation for benchmarks.
+
+    Every write bumps a per-document version; transactions record the
+    versions they read and only commit if none has moved (optimistic
+    concurrency, like Firestore's commit-time contention checks).
+
+    watch() listeners are called synchronously by the writing thread, after
+    the write and before it returns, with a copy of the document.
+    """
+
+    def __init__(self, data=None, latency: float = 0.0):
+        self._collections = {}
+        self._versions = {}
+        self._watches = []
+        self._lock = threading.RLock()
+        self.latency = latency
+        if data:
+            self.load(data)
+
+    def without_latency(self) -> 'MemoryStore':
+        """A view of the same documents whose operations never sleep"""
+        view = copy.copy(self)
+        view.latency = 0.0
+        return view
+
+    def load(self, data: dict) -> None:
+        """Bulk-load {collection: {doc_id: document}} fixtures"""
+        with self._lock:
+            for collection, docs in data.items():
+                for doc_id, doc in docs.items():
+                    self._collections.setdefault(collection, {})[doc_id] = _resolve(doc, None)
+                    self._bump(collection, doc_id)
+                    self._notify(collection, doc_id)
+
+    def load_file(self, path) -> None:
+        with open(path, encoding='utf-8') as f:
+            self.load(json.load(f))
+
+    def clear(self) -> None:
+        with self._lock:
+            collections, self._collections = self._collections, {}
+            for collection, docs in collections.items():
+                for doc_id in docs:
+                    self._bump(collection, doc_id)
+                    self._notify(collection, doc_id)
+
+    def get(self, collection, doc_id, fields=None):
+        self._simulate_latency()
+        with self._lock:
+            doc = self._collections.get(collection, {}).get(doc_id)
+            return project(doc, fields) if doc is not None else None
+
+    def get_many(self, collection, doc_ids, fields=None):
+        self._simulate_latency()
+        with self._lock:
+            docs = self._collections.get(collection, {})
+            return {
+                doc_id: project(docs[doc_id], fields)
+                for doc_id in dict.fromkeys(doc_ids)
+                if doc_id in docs
+            }
+
+    def set(self, collection, doc_id, data, merge=False):
+        self._simulate_latency()
+        with self._lock:
+            self._write('set_merge' if merge else 'set', collection, doc_id, data)
+
+    def create(self, collection, doc_id, data):
+        self._simulate_latency()
+        with self._lock:
+            self._write('create', collection, doc_id, data)
+
+    def update(self, collection, doc_id, data):
+        self._simulate_latency()
+        with self._lock:
+            self._write('update', collection, doc_id, data)
+
+    def delete(self, collection, doc_id):
+        self._simulate_latency()
+        with self._lock:
+            self._write('delete', collection, doc_id, None)
+
+    def query(self, collection, filters=(), order_by=(), limit=None, fields=None, start_after=None):
+        self._simulate_latency()
+        with self._lock:
+            docs = list(self._collections.get(collection, {}).items())
+
+        matches = []
+        for doc_id, doc in docs:
+            if not match_filters(doc, filters):
+                continue
+            try:
+                # Firestore omits documents that lack an ordered-by field
+                order_values = [
+                    doc_id if field == DOCUMENT_ID else _get_field(doc, field)
+                    for field, _ in order_by
+                ]
+            except KeyError:
+                continue
+            matches.append((doc_id, doc, order_values))
+
+        # Stable multi-key sort, always ending with the document id like __name__
+        matches.sort(key=lambda m: m[0])
+        for index in reversed(range(len(order_by))):
+            matches.sort(key=lambda m: _sort_key(m[2][index]), reverse=order_by[index][1] == DESCENDING)
+
+        if start_after is not None:
+            matches = [m for m in matches if _is_after(m[2], start_after, order_by)]
+        if limit is not None:
+            matches = matches[:limit]
+        return [Snapshot(doc_id, project(doc, fields)) for doc_id, doc, _ in matches]
+
+    def commit(self, writes):
+        self._simulate_latency()
+        with self._lock:
+            self._commit_locked(writes)
+
+    def run_transaction(self, fn, max_attempts=5, retry_delay=0.01):
+        return retry_transaction(lambda: self._run_attempt(fn), max_attempts, retry_delay)
+
+    def watch(self, collection, on_change):
+        handle = MemoryWatch(self, collection, on_change)
+        with self._lock:
+            self._watches.append(handle)
+            docs = self._collections.get(collection, {})
+            handle.push([(doc_id, copy.deepcopy(doc)) for doc_id, doc in docs.items()])
+        return handle
+
+    def _run_attempt(self, fn):
+        transaction = MemoryTransaction(self)
+        result = fn(transaction)
+        self._simulate_latency()
+        with self._lock:
+            for (collection, doc_id), version in transaction.read_versions.items():
+                if self._versions.get((collection, doc_id), 0) != version:
+                    raise TransactionConflict(f'{collection}/{doc_id} changed during the transaction')
+            self._commit_locked(transaction.writes)
+        return result
+
+    def _commit_locked(self, writes):
+        for op, collection, doc_id, _ in writes:
+            exists = doc_id in self._collections.get(collection, {})
+            if op == 'create' and exists:
+                raise AlreadyExistsError(f'{collection}/{doc_id} already exists')
+            if op == 'update' and not exists:
+                raise NotFoundError(f'{collection}/{doc_id} not found')
+        for op, collection, doc_id, data in writes:
+            self._write(op, collection, doc_id, data)
+
+    def _simulate_latency(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _bump(self, collection, doc_id):
+        key = (collection, doc_id)
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    def _write(self, op, collection, doc_id, data):
+        docs = self._collections.setdefault(collection, {})
+        current = docs.get(doc_id)
+
+        if op == 'create' and current is not None:
+            raise AlreadyExistsError(f'{collection}/{doc_id} already exists')
+        if op == 'update' and current is None:
+            raise NotFoundError(f'{collection}/{doc_id} not found')
+
+        updated = apply_write(op, current, data)
+        if updated is None:
+            docs.pop(doc_id, None)
+        else:
+            docs[doc_id] = updated
+        self._bump(collection, doc_id)
+        self._notify(collection, doc_id)
+
+    def _notify(self, collection, doc_id):
+        # Caller holds the lock
+        for handle in self._watches:
+            if handle.collection == collection:
+                doc = self._collections.get(collection, {}).get(doc_id)
+                handle.push([(doc_id, copy.deepcopy(doc))])
+
+
+class MemoryWatch:
+    """Handle returned by MemoryStore.watch()"""
+
+    def __init__(self, store: MemoryStore, collection: str, on_change):
+        self.store = store
+        self.collection = collection
+        self.on_change = on_change
+        self.is_active = True
+
+    def push(self, changes):
+        self.on_change(changes, datetime.now(timezone.utc))
+
+    def unsubscribe(self):
+        with self.store._lock:
+            if self in self.store._watches:
+                self.store._watches.remove(self)
+        self.is_active = False
+
+
+class MemoryTransaction(Transaction):
+    """MemoryStore transaction attempt: remembers the version of each document read"""
+
+    def __init__(self, store: MemoryStore):
+        super().__init__()
+        self.store = store
+        self.read_versions = {}
+
+    def get(self, collection, doc_id):
+        self.store._simulate_latency()
+        with self.store._lock:
+            key = (collection, doc_id)
+            self.read_versions.setdefault(key, self.store._versions.get(key, 0))
+            doc = self.store._collections.get(collection, {}).get(doc_id)
+            return project(doc, None) if doc is not None else None
+
+
+class AsyncMemoryStore(AsyncDocumentStore):
+    """
+    Async view of a MemoryStore, sharing its documents.
+
+    The simulated latency is awaited instead of slept, so concurrent
+    requests overlap their round trips on one event loop like they do with
+    the Firestore AsyncClient.
+    """
+
+    def __init__(self, store: MemoryStore):
+        self.latency = store.latency
+        self.store = store.without_latency()
+        self._threaded = ThreadedAsyncStore(store)
+
+    async def get(self, collection, doc_id, fields=None):
+        await self._simulate_latency()
+        return self.store.get(collection, doc_id, fields)
+
+    async def get_many(self, collection, doc_ids, fields=None):
+        await self._simulate_latency()
+        return self.store.get_many(collection, doc_ids, fields)
+
+    async def set(self, collection, doc_id, data, merge=False):
+        await self._simulate_latency()
+        self.store.set(collection, doc_id, data, merge=merge)
+
+    async def create(self, collection, doc_id, data):
+        await self._simulate_latency()
+        self.store.create(collection, doc_id, data)
+
+    async def update(self, collection, doc_id, data):
+        await self._simulate_latency()
+        self.store.update(collection, doc_id, data)
+
+    async def delete(self, collection, doc_id):
+        await self._simulate_latency()
+        self.store.delete(collection, doc_id)
+
+    async def query(self, collection, filters=(), order_by=(), limit=None, fields=None, start_after=None):
+        await self._simulate_latency()
+        return self.store.query(collection, filters, order_by, limit, fields, start_after)
+
+    async def commit(self, writes):
+        await self._simulate_latency()
+        self.store.commit(writes)
+
+    async def run_transaction(self, fn, max_attempts=5, retry_delay=0.01):
+        return await self._threaded.run_transaction(fn, max_attempts, retry_delay)
+
+    async def _simulate_latency(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
@@ -0,0 +1,47 @@
+import logging
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from .identity_map import begin_request, end_request
+
+logger = logging.getLogger(__name__)
+
+
+class IdentityMapMiddleware:
+    """
+    Give each request its own storage identity map.
+
+    The per-request read report is returned in the X-Storage-Reads and
+    X-Storage-Reads-Saved headers and logged at DEBUG level.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = begin_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            identity_map = end_request(token)
+        return self._report(request, identity_map, response)
+
+    async def __acall__(self, request):
+        token = begin_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            identity_map = end_request(token)
+        return self._report(request, identity_map, response)
+
+    def _report(self, request, identity_map, response):
+        report = identity_map.report()
+        response['X-Storage-Reads'] = str(report['reads'])
+        response['X-Storage-Reads-Saved'] = str(report['reads_saved'])
+        logger.debug('%s %s storage reads=%d saved=%d', request.method, request.path, report['reads'], report['reads_saved'])
+        return response
@@ -0,0 +1,125 @@
+import base64
+import binascii
+import json
+from collections import namedtuple
+from datetime import datetime
+from django.conf import settings
+from .base import ASCENDING, DOCUMENT_ID
+
+# One page of query results; next_cursor is None on the last page
+Page = namedtuple('Page', ['items', 'next_cursor'])
+
+
+class InvalidCursor(ValueError):
+    """Raised for cursors that are malformed or belong to a different ordering"""
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'$ts': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and '$ts' in value:
+        return datetime.fromisoformat(value['$ts'])
+    return value
+
+
+def encode_cursor(order_by, values) -> str:
+    """Opaque cursor for the position after a document with the given order values"""
+    payload = {
+        'k': [field for field, _ in order_by],
+        'v': [_encode_value(value) for value in values]
+    }
+    raw = json.dumps(payload, separators=(',', ':'), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(order_by, cursor: str) -> list:
+    """start_after values for cursor, which must come from the same ordering"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        keys, values = payload['k'], payload['v']
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise InvalidCursor('Invalid cursor')
+    if keys != [field for field, _ in order_by] or len(values) != len(keys):
+        raise InvalidCursor('Cursor does not match this listing')
+    return [_decode_value(value) for value in values]
+
+
+def parse_page_params(query_params):
+    """
+    Read ?limit= and ?cursor= from a request.
+
+    limit defaults to PAGINATION_DEFAULT_LIMIT and is capped at
+    PAGINATION_MAX_LIMIT. Raises InvalidCursor for a non-positive or
+    non-numeric limit.
+    """
+    default_limit = getattr(settings, 'PAGINATION_DEFAULT_LIMIT', 50)
+    max_limit = getattr(settings, 'PAGINATION_MAX_LIMIT', 200)
+    try:
+        limit = int(query_params.get('limit', default_limit))
+    except (TypeError, ValueError):
+        raise InvalidCursor('limit must be an integer')
+    if limit < 1:
+        raise InvalidCursor('limit must be positive')
+    return min(limit, max_limit), query_params.get('cursor') or None
+
+
+def paginate(store, collection, filters=(), order_by=(), limit=50, cursor=None, fields=None) -> Page:
+    """
+    Fetch one page of a keyset-paginated query.
+
+    The ordering is made total by appending the document id in the
+    direction of the last order key, so pages never skip or repeat
+    documents that share an order value. One extra document is read to
+    decide whether another page exists.
+    """
+    order_by, select, start_after = _page_query(order_by, cursor, fields)
+    snapshots = store.query(collection, filters, order_by, limit + 1, select, start_after)
+    return _build_page(snapshots, order_by, limit, fields, select)
+
+
+async def apaginate(store, collection, filters=(), order_by=(), limit=50, cursor=None, fields=None) -> Page:
+    """paginate() on an AsyncDocumentStore"""
+    order_by, select, start_after = _page_query(order_by, cursor, fields)
+    snapshots = await store.query(collection, filters, order_by, limit + 1, select, start_after)
+    return _build_page(snapshots, order_by, limit, fields, select)
+
+
+def _page_query(order_by, cursor, fields):
+    order_by = list(order_by)
+    if DOCUMENT_ID not in [field for field, _ in order_by]:
+        direction = order_by[-1][1] if order_by else ASCENDING
+        order_by.append((DOCUMENT_ID, direction))
+
+    select = None
+    if fields is not None:
+        # Order fields are needed to build the next cursor
+        select = list(dict.fromkeys(
+            list(fields) + [field for field, _ in order_by if field != DOCUMENT_ID]
+        ))
+
+    start_after = decode_cursor(order_by, cursor) if cursor else None
+    return order_by, select, start_after
+
+
+def _build_page(snapshots, order_by, limit, fields, select) -> Page:
+    next_cursor = None
+    if len(snapshots) > limit:
+        snapshots = snapshots[:limit]
+        last = snapshots[-1]
+        next_cursor = encode_cursor(order_by, [
+            last.id if field == DOCUMENT_ID else last.data.get(field)
+            for field, _ in order_by
+        ])
+
+    items = []
+    for snapshot in snapshots:
+        data = snapshot.data
+        if fields is not None and select != list(fields):
+            data = {key: value for key, value in data.items() if key in fields}
+        items.append(data)
+    return Page(items, next_cursor)
@@ -0,0 +1,209 @@
+"""
+Per-process read replica of one collection.
+
+The replica subscribes to the store's change feed (DocumentStore.watch():
+an on_snapshot listener on Firestore, write hooks on the memory store) and
+keeps every document of the collection in a dict, so a read is a lookup
+instead of a round trip. Writes still go to the store and reach the
+replica through the feed, usually within milliseconds; reads that must see
+their own write (transactions, the re-read after a profile update) keep
+going to the store.
+
+Reads are only served once the listener has delivered the full collection
+and while it is still active; until then available() is False and callers
+read the store. A supervisor thread subscribes on first use in each
+process and resubscribes when the listener stops. stats() reports
+readiness, the read time of the last change and how late it arrived.
+"""
+
+import bisect
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from itertools import islice
+from .base import Snapshot
+from .memory_store import match_filters, project
+from .pagination import Page, _page_query, _build_page
+
+logger = logging.getLogger(__name__)
+
+
+class CollectionReplica:
+    """
+    store_provider returns the DocumentStore to watch (the identity map
+    wrapper is looked through); check_interval is how often, in seconds,
+    the supervisor checks that the listener is still active.
+    """
+
+    def __init__(self, store_provider, collection: str, check_interval: float = 5.0):
+        self._store_provider = store_provider
+        self.collection = collection
+        self.check_interval = check_interval
+        self._docs = {}
+        # Document ids in order, replaced whole when documents come or go
+        self._ids = []
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._handle = None
+        self._generation = 0
+        self._pid = None
+        self._thread = None
+        self._subscriptions = 0
+        self._changes = 0
+        self._read_time = None
+        self._received_at = None
+        self._lag = None
+        self._error = None
+        self.reads = 0
+        self.fallbacks = 0
+
+    @property
+    def ready(self) -> bool:
+        """True once the full collection arrived, while the listener is active"""
+        self._ensure_running()
+        handle = self._handle
+        return self._ready.is_set() and handle is not None and handle.is_active
+
+    def available(self) -> bool:
+        """ready, counting the reads that have to fall back to the store"""
+        if self.ready:
+            return True
+        self.fallbacks += 1
+        return False
+
+    def wait_ready(self, timeout: float = None) -> bool:
+        """Block until the first full snapshot has been applied, at most timeout seconds"""
+        self._ensure_running()
+        return self._ready.wait(timeout)
+
+    def get(self, doc_id: str, fields=None):
+        """The replicated document (a copy), or None if it does not exist"""
+        self.reads += 1
+        doc = self._docs.get(doc_id)
+        return project(doc, fields) if doc is not None else None
+
+    def page(self, filters=(), limit: int = 50, cursor=None, fields=None) -> Page:
+        """
+        paginate() in document id order over the replica; cursors are
+        interchangeable with the store's
+        """
+        self.reads += 1
+        order_by, select, start_after = _page_query((), cursor, fields)
+        ids, docs = self._ids, self._docs
+        first = bisect.bisect_right(ids, start_after[0]) if start_after else 0
+        snapshots = []
+        for doc_id in islice(ids, first, None):
+            doc = docs.get(doc_id)
+            if doc is None or not match_filters(doc, filters):
+                continue
+            snapshots.append(Snapshot(doc_id, project(doc, select)))
+            if len(snapshots) > limit:
+                break
+        return _build_page(snapshots, order_by, limit, fields, select)
+
+    def start(self) -> None:
+        """Subscribe in this process; reads are served once ready"""
+        self._ensure_running()
+
+    def stats(self) -> dict:
+        received_at = self._received_at
+        return {
+            'collection': self.collection,
+            'ready': self.ready,
+            'documents': len(self._docs),
+            'subscriptions': self._subscriptions,
+            'changes': self._changes,
+            'reads': self.reads,
+            'fallbacks': self.fallbacks,
+            'read_time': self._read_time.isoformat() if self._read_time else None,
+            'last_change_age_seconds': (
+                (datetime.now(timezone.utc) - received_at).total_seconds() if received_at else None
+            ),
+            'last_change_lag_ms': self._lag * 1e3 if self._lag is not None else None,
+            'error': self._error
+        }
+
+    def _apply(self, generation, changes, read_time):
+        received_at = datetime.now(timezone.utc)
+        with self._lock:
+            if generation != self._generation:
+                return
+            if not self._ready.is_set():
+                # The first snapshot of a subscription is the whole collection
+                docs = {doc_id: doc for doc_id, doc in changes if doc is not None}
+                self._docs, self._ids = docs, sorted(docs)
+                self._ready.set()
+            else:
+                docs, ids = self._docs, None
+                for doc_id, doc in changes:
+                    if doc is None:
+                        if docs.pop(doc_id, None) is not None:
+                            ids = ids or list(self._ids)
+                            ids.remove(doc_id)
+                    else:
+                        if doc_id not in docs:
+                            ids = ids or list(self._ids)
+                            bisect.insort(ids, doc_id)
+                        docs[doc_id] = doc
+                if ids is not None:
+                    self._ids = ids
+            self._changes += len(changes)
+            self._read_time, self._received_at = read_time, received_at
+            if isinstance(read_time, datetime) and read_time.tzinfo is not None:
+                self._lag = max((received_at - read_time).total_seconds(), 0.0)
+
+    def _subscribe(self):
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self._ready.clear()
+            old, self._handle = self._handle, None
+        if old is not None:
+            try:
+                old.unsubscribe()
+            except Exception:
+                pass
+
+        store = self._store_provider()
+        handle = getattr(store, 'inner', store).watch(
+            self.collection,
+            lambda changes, read_time: self._apply(generation, changes, read_time)
+        )
+        with self._lock:
+            if generation == self._generation:
+                self._handle = handle
+        self._subscriptions += 1
+        self._error = None
+
+    def _ensure_running(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # A forked worker inherits the documents but not the listener
+            self._pid = os.getpid()
+            self._handle = None
+            self._ready.clear()
+        self._thread = threading.Thread(target=self._run, name=f'{self.collection}-replica', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        pid = self._pid
+        while self._pid == pid:
+            handle = self._handle
+            if handle is None or not handle.is_active:
+                if handle is not None:
+                    logger.warning('%s replica listener stopped, resubscribing', self.collection)
+                try:
+                    self._subscribe()
+                except NotImplementedError:
+                    self._error = 'The storage backend has no change feed'
+                    logger.warning('%s replica disabled: the storage backend has no change feed', self.collection)
+                    return
+                except Exception as e:
+                    self._error = str(e)
+                    logger.exception('%s replica subscription failed', self.collection)
+            time.sleep(self.check_interval)
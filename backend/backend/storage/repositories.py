@@ -0,0 +1,596 @@
+from django.conf import settings
+from firebase_admin import firestore
+from datetime import datetime, time, timedelta, timezone
+from .base import AlreadyExistsError, ASCENDING, DESCENDING, DOCUMENT_ID
+from .pagination import paginate, apaginate
+
+EMAIL_INDEX_COLLECTION = 'email_index'
+
+
+class EmailAlreadyRegistered(Exception):
+    """Raised when registration hits an existing email_index entry"""
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+def email_index_id(role: str, email: str) -> str:
+    # Doctors and patients register independently, so the same address may
+    # hold one account per role. ':' cannot appear in a validated email.
+    return f'{role}:{normalize_email(email)}'
+
+
+def _time_id(value: str) -> str:
+    # '9:00' and '09:00' name the same slot document
+    return value.replace(':', '').zfill(4)
+
+
+def _legacy_email_filter(email: str) -> tuple:
+    # Users registered before the index may have stored the address as typed
+    candidates = list(dict.fromkeys([email, normalize_email(email)]))
+    return ('email', 'in', candidates) if len(candidates) > 1 else ('email', '==', email)
+
+
+def email_index_entry(role: str, uid: str, email: str) -> dict:
+    return {
+        'role': role,
+        'uid': uid,
+        'email': normalize_email(email),
+        'created_at': firestore.SERVER_TIMESTAMP
+    }
+
+
+class Repository:
+    """
+    Base repository bound to one collection of a DocumentStore.
+
+    Methods prefixed with 'a' are coroutines running against the
+    AsyncDocumentStore, for the async views.
+    """
+    collection = None
+
+    def __init__(self, store_provider, async_store_provider=None):
+        self._store_provider = store_provider
+        self._async_store_provider = async_store_provider
+
+    @property
+    def store(self):
+        return self._store_provider()
+
+    @property
+    def astore(self):
+        return self._async_store_provider()
+
+    def get(self, doc_id: str, fields=None):
+        return self.store.get(self.collection, doc_id, fields=fields)
+
+    def get_many(self, doc_ids, fields=None) -> dict:
+        return self.store.get_many(self.collection, doc_ids, fields=fields)
+
+    def set(self, doc_id: str, data: dict, merge: bool = False) -> None:
+        self.store.set(self.collection, doc_id, data, merge=merge)
+
+    def create(self, doc_id: str, data: dict) -> None:
+        self.store.create(self.collection, doc_id, data)
+
+    def update(self, doc_id: str, data: dict) -> None:
+        self.store.update(self.collection, doc_id, data)
+
+    def _list(self, filters=(), order_by=(), limit=None, fields=None):
+        return [
+            snapshot.data
+            for snapshot in self.store.query(self.collection, filters, order_by, limit, fields)
+        ]
+
+    def _page(self, filters=(), order_by=(), limit=50, cursor=None, fields=None):
+        return paginate(self.store, self.collection, filters, order_by, limit, cursor, fields)
+
+    async def aget(self, doc_id: str, fields=None):
+        return await self.astore.get(self.collection, doc_id, fields=fields)
+
+    async def aget_many(self, doc_ids, fields=None) -> dict:
+        return await self.astore.get_many(self.collection, doc_ids, fields=fields)
+
+    async def aset(self, doc_id: str, data: dict, merge: bool = False) -> None:
+        await self.astore.set(self.collection, doc_id, data, merge=merge)
+
+    async def aupdate(self, doc_id: str, data: dict) -> None:
+        await self.astore.update(self.collection, doc_id, data)
+
+    async def _alist(self, filters=(), order_by=(), limit=None, fields=None):
+        return [
+            snapshot.data
+            for snapshot in await self.astore.query(self.collection, filters, order_by, limit, fields)
+        ]
+
+    async def _apage(self, filters=(), order_by=(), limit=50, cursor=None, fields=None):
+        return await apaginate(self.astore, self.collection, filters, order_by, limit, cursor, fields)
+
+
+class UserRepository(Repository):
+    """Doctors and patients: user documents plus their email_index entries"""
+    role = None
+
+    def register(self, uid: str, user_data: dict) -> None:
+        """
+        Create the user document and its email_index entry in one atomic batch.
+
+        The index entry is written with create(), so a concurrent or repeated
+        registration for the same email fails the whole batch. While
+        EMAIL_INDEX_FALLBACK is on (the default until backfill_email_index
+        has run) the legacy email query still runs first, since users
+        registered before the index have no entry for create() to hit; that
+        check stays racy against concurrent registrations.
+        """
+        email = user_data['email']
+        if getattr(settings, 'EMAIL_INDEX_FALLBACK', True) and self._query_by_email(email) is not None:
+            raise EmailAlreadyRegistered(email)
+
+        try:
+            self.store.commit([
+                ('create', EMAIL_INDEX_COLLECTION, email_index_id(self.role, email),
+                 email_index_entry(self.role, uid, email)),
+                ('set', self.collection, uid, user_data)
+            ])
+        except AlreadyExistsError:
+            raise EmailAlreadyRegistered(email)
+
+    def find_by_email(self, email: str):
+        """
+        Resolve an email to its user document with point reads.
+
+        Falls back to the legacy email query when no index entry exists and
+        EMAIL_INDEX_FALLBACK is enabled (until backfill_email_index has run).
+        """
+        entry = self.store.get(EMAIL_INDEX_COLLECTION, email_index_id(self.role, email))
+        if entry is not None:
+            return self.get(entry['uid'])
+
+        if getattr(settings, 'EMAIL_INDEX_FALLBACK', True):
+            return self._query_by_email(email)
+        return None
+
+    async def afind_by_email(self, email: str):
+        entry = await self.astore.get(EMAIL_INDEX_COLLECTION, email_index_id(self.role, email))
+        if entry is not None:
+            return await self.aget(entry['uid'])
+
+        if getattr(settings, 'EMAIL_INDEX_FALLBACK', True):
+            matches = await self._alist(filters=[_legacy_email_filter(email)], limit=1)
+            return matches[0] if matches else None
+        return None
+
+    def _query_by_email(self, email: str):
+        matches = self._list(filters=[_legacy_email_filter(email)], limit=1)
+        return matches[0] if matches else None
+
+
+class DoctorRepository(UserRepository):
+    """
+    With a replica (a CollectionReplica of this collection), reads passing
+    replica=True are served from it while it is ready. Only use that where
+    a read may trail this process's own writes by the listener's delay.
+    """
+    collection = 'doctors'
+    role = 'doctor'
+
+    def __init__(self, store_provider, async_store_provider=None, replica=None):
+        super().__init__(store_provider, async_store_provider)
+        self.replica = replica
+
+    def get(self, doc_id: str, fields=None, replica: bool = False):
+        if replica and self._replica_available():
+            return self.replica.get(doc_id, fields)
+        return super().get(doc_id, fields)
+
+    async def aget(self, doc_id: str, fields=None, replica: bool = False):
+        if replica and self._replica_available():
+            return self.replica.get(doc_id, fields)
+        return await super().aget(doc_id, fields)
+
+    def list(self, active_only: bool = False, fields=None):
+        filters = [('is_active', '==', True)] if active_only else []
+        return self._list(filters=filters, fields=fields)
+
+    def page(self, active_only: bool = False, fields=None, limit: int = 50, cursor=None, replica: bool = False):
+        """Doctors in document id order"""
+        filters = [('is_active', '==', True)] if active_only else []
+        if replica and self._replica_available():
+            return self.replica.page(filters=filters, limit=limit, cursor=cursor, fields=fields)
+        return self._page(filters=filters, limit=limit, cursor=cursor, fields=fields)
+
+    async def apage(self, active_only: bool = False, fields=None, limit: int = 50, cursor=None,
+                    replica: bool = False):
+        filters = [('is_active', '==', True)] if active_only else []
+        if replica and self._replica_available():
+            return self.replica.page(filters=filters, limit=limit, cursor=cursor, fields=fields)
+        return await self._apage(filters=filters, limit=limit, cursor=cursor, fields=fields)
+
+    def _replica_available(self) -> bool:
+        return self.replica is not None and self.replica.available()
+
+
+class PatientRepository(UserRepository):
+    collection = 'patients'
+    role = 'patient'
+
+
+class AppointmentRepository(Repository):
+    collection = 'appointments'
+    statuses = ('confirmed', 'cancelled')
+
+    query_shapes = [
+        ('appointments', fields, [('created_at', DESCENDING)])
+        for owner in ('doctor_uid', 'patient_uid')
+        for fields in ([owner], [owner, 'status'])
+    ] + [
+        ('appointments', ['status'], [('date', ASCENDING)])
+    ]
+
+    def confirmed_from(self, date_from, fields=None) -> list:
+        """Confirmed appointments for a calendar date on or after date_from"""
+        return [
+            snapshot.data
+            for snapshot in self.store.query(
+                self.collection,
+                filters=[('status', '==', 'confirmed'), ('date', '>=', date_from.isoformat())],
+                order_by=[('date', ASCENDING)],
+                fields=fields
+            )
+        ]
+
+    def page_for_doctor(self, doctor_uid: str, status=None, date_from=None, date_to=None,
+                        limit: int = 50, cursor=None):
+        """A doctor's appointments, newest first"""
+        return self._page(
+            filters=self._filters('doctor_uid', doctor_uid, status, date_from, date_to),
+            order_by=[('created_at', DESCENDING)],
+            limit=limit,
+            cursor=cursor
+        )
+
+    def page_for_patient(self, patient_uid: str, status=None, date_from=None, date_to=None,
+                         limit: int = 50, cursor=None):
+        """A patient's appointments, newest first"""
+        return self._page(
+            filters=self._filters('patient_uid', patient_uid, status, date_from, date_to),
+            order_by=[('created_at', DESCENDING)],
+            limit=limit,
+            cursor=cursor
+        )
+
+    async def apage_for_doctor(self, doctor_uid: str, status=None, date_from=None, date_to=None,
+                               limit: int = 50, cursor=None):
+        return await self._apage(
+            filters=self._filters('doctor_uid', doctor_uid, status, date_from, date_to),
+            order_by=[('created_at', DESCENDING)],
+            limit=limit,
+            cursor=cursor
+        )
+
+    async def apage_for_patient(self, patient_uid: str, status=None, date_from=None, date_to=None,
+                                limit: int = 50, cursor=None):
+        return await self._apage(
+            filters=self._filters('patient_uid', patient_uid, status, date_from, date_to),
+            order_by=[('created_at', DESCENDING)],
+            limit=limit,
+            cursor=cursor
+        )
+
+    @staticmethod
+    def _filters(owner_field, owner_uid, status, date_from, date_to):
+        filters = [(owner_field, '==', owner_uid)]
+        if status:
+            filters.append(('status', '==', status))
+        # created_at is a timestamp: the dates bound whole UTC days
+        if date_from:
+            filters.append(('created_at', '>=', datetime.combine(date_from, time.min, timezone.utc)))
+        if date_to:
+            filters.append(('created_at', '<', datetime.combine(date_to + timedelta(days=1), time.min, timezone.utc)))
+        return filters
+
+
+class HealthRepository:
+    """Health tracking, medical tests and preventive checkups for patients"""
+    tracking_collection = 'health_tracking'
+    tests_collection = 'medical_tests'
+    checkups_collection = 'preventive_checkups'
+
+    date_fields = {
+        tracking_collection: 'date',
+        tests_collection: 'test_date',
+        checkups_collection: 'checkup_date'
+    }
+
+    query_shapes = [
+        (collection, ['patient_uid'], [(date_field, DESCENDING)])
+        for collection, date_field in date_fields.items()
+    ]
+
+    def __init__(self, store_provider, async_store_provider=None):
+        self._store_provider = store_provider
+        self._async_store_provider = async_store_provider
+
+    @property
+    def store(self):
+        return self._store_provider()
+
+    @property
+    def astore(self):
+        return self._async_store_provider()
+
+    @staticmethod
+    def tracking_id(patient_uid: str, tracking_date: str) -> str:
+        return f'{patient_uid}_{tracking_date}'
+
+    def save_tracking(self, patient_uid: str, tracking_date: str, data: dict) -> None:
+        self.store.set(self.tracking_collection, self.tracking_id(patient_uid, tracking_date), data, merge=True)
+
+    def get_tracking(self, patient_uid: str, tracking_date: str):
+        return self.store.get(self.tracking_collection, self.tracking_id(patient_uid, tracking_date))
+
+    def list_tracking(self, patient_uid: str):
+        return self._list_for_patient(self.tracking_collection, patient_uid)
+
+    def page_tracking(self, patient_uid: str, date_from=None, date_to=None, limit: int = 50, cursor=None):
+        return self._page_for_patient(self.tracking_collection, patient_uid, date_from, date_to, limit, cursor)
+
+    def add_test(self, test_id: str, data: dict) -> None:
+        self.store.set(self.tests_collection, test_id, data)
+
+    def list_tests(self, patient_uid: str):
+        return self._list_for_patient(self.tests_collection, patient_uid)
+
+    def page_tests(self, patient_uid: str, date_from=None, date_to=None, limit: int = 50, cursor=None):
+        return self._page_for_patient(self.tests_collection, patient_uid, date_from, date_to, limit, cursor)
+
+    def add_checkup(self, checkup_id: str, data: dict) -> None:
+        self.store.set(self.checkups_collection, checkup_id, data)
+
+    def list_checkups(self, patient_uid: str):
+        return self._list_for_patient(self.checkups_collection, patient_uid)
+
+    def page_checkups(self, patient_uid: str, date_from=None, date_to=None, limit: int = 50, cursor=None):
+        return self._page_for_patient(self.checkups_collection, patient_uid, date_from, date_to, limit, cursor)
+
+    def _list_for_patient(self, collection, patient_uid):
+        """Every entry for one patient, most recent date first"""
+        return [
+            snapshot.data
+            for snapshot in self.store.query(
+                collection,
+                filters=[('patient_uid', '==', patient_uid)],
+                order_by=[(self.date_fields[collection], DESCENDING)]
+            )
+        ]
+
+    async def alist_tracking(self, patient_uid: str):
+        return await self._alist_for_patient(self.tracking_collection, patient_uid)
+
+    async def alist_tests(self, patient_uid: str):
+        return await self._alist_for_patient(self.tests_collection, patient_uid)
+
+    async def alist_checkups(self, patient_uid: str):
+        return await self._alist_for_patient(self.checkups_collection, patient_uid)
+
+    async def _alist_for_patient(self, collection, patient_uid):
+        return [
+            snapshot.data
+            for snapshot in await self.astore.query(
+                collection,
+                filters=[('patient_uid', '==', patient_uid)],
+                order_by=[(self.date_fields[collection], DESCENDING)]
+            )
+        ]
+
+    def _page_for_patient(self, collection, patient_uid, date_from, date_to, limit, cursor):
+        """One patient's entries, most recent date first"""
+        date_field = self.date_fields[collection]
+        filters = [('patient_uid', '==', patient_uid)]
+        # Dates are stored as ISO strings, which compare in date order
+        if date_from:
+            filters.append((date_field, '>=', date_from.isoformat()))
+        if date_to:
+            filters.append((date_field, '<=', date_to.isoformat()))
+        return paginate(
+            self.store,
+            collection,
+            filters=filters,
+            order_by=[(date_field, DESCENDING)],
+            limit=limit,
+            cursor=cursor
+        )
+
+
+class SlotRepository:
+    """
+    Time slots stored as one document each under doctors/{uid}/slots.
+
+    A doctor whose document has slot_storage == 'documents' keeps only the
+    day entries (day, is_available) in its availability array; every slot
+    is a separate document, so booking one slot never writes the doctor
+    document. Other doctors keep the slots embedded in availability.
+    """
+    parent_collection = 'doctors'
+    storage_field = 'slot_storage'
+    documents = 'documents'
+
+    query_shapes = [
+        ('doctors/{uid}/slots', ['day'], [('position', ASCENDING)])
+    ]
+
+    def __init__(self, store_provider, async_store_provider=None):
+        self._store_provider = store_provider
+        self._async_store_provider = async_store_provider
+
+    @property
+    def store(self):
+        return self._store_provider()
+
+    @property
+    def astore(self):
+        return self._async_store_provider()
+
+    @staticmethod
+    def collection_for(doctor_uid: str) -> str:
+        return f'doctors/{doctor_uid}/slots'
+
+    @staticmethod
+    def slot_id(day: str, start_time: str, end_time: str) -> str:
+        return f"{day}-{_time_id(start_time)}-{_time_id(end_time)}"
+
+    def uses_documents(self, doctor_data) -> bool:
+        return doctor_data.get(self.storage_field) == self.documents
+
+    @classmethod
+    def split(cls, availability) -> tuple:
+        """
+        Embedded availability as (day entries without time_slots, {slot_id: slot document}).
+
+        position keeps the original slot order across the whole week.
+        """
+        days, slots = [], {}
+        for day_avail in availability:
+            days.append({k: v for k, v in day_avail.items() if k != 'time_slots'})
+            for slot in day_avail.get('time_slots', []):
+                slot_id = cls.slot_id(day_avail['day'], slot['start_time'], slot['end_time'])
+                slots[slot_id] = dict(slot, day=day_avail['day'], position=len(slots))
+        return days, slots
+
+    @staticmethod
+    def merge(days, slots) -> list:
+        """Inverse of split(): day entries plus position-ordered slot documents"""
+        time_slots = {}
+        for slot in slots:
+            time_slots.setdefault(slot['day'], []).append(
+                {k: v for k, v in slot.items() if k not in ('day', 'position')}
+            )
+        return [dict(day_avail, time_slots=time_slots.get(day_avail['day'], [])) for day_avail in days]
+
+    def list_slots(self, doctor_uid: str, day: str = None) -> list:
+        """A doctor's slot documents in schedule order, optionally for one day"""
+        filters = [('day', '==', day)] if day else []
+        return [
+            snapshot.data
+            for snapshot in self.store.query(
+                self.collection_for(doctor_uid), filters=filters, order_by=[('position', ASCENDING)]
+            )
+        ]
+
+    async def alist_slots(self, doctor_uid: str, day: str = None) -> list:
+        filters = [('day', '==', day)] if day else []
+        return [
+            snapshot.data
+            for snapshot in await self.astore.query(
+                self.collection_for(doctor_uid), filters=filters, order_by=[('position', ASCENDING)]
+            )
+        ]
+
+    def slot_ids(self, doctor_uid: str) -> list:
+        return [snapshot.id for snapshot in self.store.query(self.collection_for(doctor_uid), fields=[])]
+
+    def replace_writes(self, doctor_uid: str, slots: dict, existing_ids=()) -> list:
+        """commit() writes that make the slot subcollection hold exactly slots"""
+        collection = self.collection_for(doctor_uid)
+        writes = [('set', collection, slot_id, slot) for slot_id, slot in slots.items()]
+        writes += [('delete', collection, slot_id, None) for slot_id in existing_ids if slot_id not in slots]
+        return writes
+
+
+class CalendarRepository:
+    """
+    Dated slot instances stored as one document each under doctors/{uid}/calendar.
+
+    Document ids are '<date>-<start>-<end>' ('2026-03-02-0900-1000'), so
+    ordering by id within a date follows the start times. Every instance
+    carries date (ISO string), day, start_time, end_time and is_available,
+    plus booked_by and booking_id once booked.
+    """
+    parent_collection = 'doctors'
+    horizon_field = 'calendar_until'
+
+    # Date ranges order by date and then id; neither needs a composite index
+    query_shapes = [
+        ('doctors/{uid}/calendar', [], [('date', ASCENDING), (DOCUMENT_ID, ASCENDING)])
+    ]
+
+    def __init__(self, store_provider, async_store_provider=None):
+        self._store_provider = store_provider
+        self._async_store_provider = async_store_provider
+
+    @property
+    def store(self):
+        return self._store_provider()
+
+    @property
+    def astore(self):
+        return self._async_store_provider()
+
+    @staticmethod
+    def collection_for(doctor_uid: str) -> str:
+        return f'doctors/{doctor_uid}/calendar'
+
+    @staticmethod
+    def instance_id(slot_date: str, start_time: str, end_time: str) -> str:
+        return f"{slot_date}-{_time_id(start_time)}-{_time_id(end_time)}"
+
+    def list_range(self, doctor_uid: str, date_from, date_to, fields=None) -> dict:
+        """{instance_id: instance} for the inclusive date range, in date and time order"""
+        return {
+            snapshot.id: snapshot.data
+            for snapshot in self.store.query(
+                self.collection_for(doctor_uid),
+                filters=self._range(date_from, date_to),
+                order_by=[('date', ASCENDING), (DOCUMENT_ID, ASCENDING)],
+                fields=fields
+            )
+        }
+
+    async def alist_range(self, doctor_uid: str, date_from, date_to, fields=None) -> dict:
+        return {
+            snapshot.id: snapshot.data
+            for snapshot in await self.astore.query(
+                self.collection_for(doctor_uid),
+                filters=self._range(date_from, date_to),
+                order_by=[('date', ASCENDING), (DOCUMENT_ID, ASCENDING)],
+                fields=fields
+            )
+        }
+
+    def ids_before(self, doctor_uid: str, before) -> list:
+        """Ids of the instances dated before the given date (keys-only query)"""
+        return [
+            snapshot.id
+            for snapshot in self.store.query(
+                self.collection_for(doctor_uid), filters=[('date', '<', before.isoformat())], fields=[]
+            )
+        ]
+
+    @staticmethod
+    def _range(date_from, date_to):
+        # Dates are stored as ISO strings, which compare in date order
+        return [('date', '>=', date_from.isoformat()), ('date', '<=', date_to.isoformat())]
+
+
+class TokenVersionRepository(Repository):
+    """Minimum accepted JWT 'ver' claim per uid"""
+    collection = 'token_versions'
+
+    def bump(self, uid: str) -> int:
+        self.set(uid, {
+            'uid': uid,
+            'version': firestore.Increment(1),
+            'updated_at': firestore.SERVER_TIMESTAMP
+        }, merge=True)
+        return self.get(uid).get('version', 0)
+
+    def changed_since(self, updated_after=None):
+        """
+        All version documents, or only those updated at or after the given timestamp.
+
+        The bound is inclusive so a bump sharing the last seen timestamp is not
+        missed; callers skip versions they have already applied.
+        """
+        filters = [('updated_at', '>=', updated_after)] if updated_after is not None else []
+        return self.store.query(self.collection, filters=filters)
@@ -0,0 +1,199 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+from backend.response_cache import cache_response, get_response_cache_stats, invalidate, uncacheable
+from backend.storage.base import DESCENDING
+from backend.storage.memory_store import MemoryStore
+from backend.storage.pagination import InvalidCursor, paginate
+
+START = datetime(2026, 3, 2, 9, 0, tzinfo=timezone.utc)
+
+
+class PaginationTests(SimpleTestCase):
+    """Keyset pages stay stable while the collection changes between requests"""
+
+    ORDER = [('created_at', DESCENDING)]
+
+    def setUp(self):
+        self.store = MemoryStore()
+        # Pairs of documents share a timestamp, so only the id tie-break orders them
+        self.store.load({'appointments': {
+            f'a{n}': {'n': n, 'created_at': START - timedelta(minutes=n // 2)} for n in range(7)
+        }})
+
+    def page(self, cursor=None, limit=2):
+        return paginate(self.store, 'appointments', order_by=self.ORDER, limit=limit, cursor=cursor)
+
+    def walk(self, limit=2, between_pages=None):
+        seen, cursor = [], None
+        while True:
+            page = self.page(cursor, limit)
+            seen += [item['n'] for item in page.items]
+            if page.next_cursor is None:
+                return seen
+            if between_pages is not None:
+                between_pages()
+            cursor = page.next_cursor
+
+    def test_pages_cover_every_document_once(self):
+        for limit in (1, 2, 3, 7, 50):
+            with self.subTest(limit=limit):
+                self.assertEqual(sorted(self.walk(limit)), list(range(7)))
+
+    def test_insertions_before_the_cursor_do_not_shift_later_pages(self):
+        inserted = []
+
+        def insert_newest():
+            doc_id = f'new{len(inserted)}'
+            self.store.set('appointments', doc_id, {'n': doc_id, 'created_at': START + timedelta(minutes=1)})
+            inserted.append(doc_id)
+
+        self.assertEqual(sorted(self.walk(between_pages=insert_newest)), list(range(7)))
+        self.assertEqual(len(inserted), 3)
+
+    def test_deleting_the_cursor_document_does_not_skip_the_next(self):
+        first = self.page()
+        # Ties follow the direction of the last order key
+        self.assertEqual([item['n'] for item in first.items], [1, 0])
+        self.store.delete('appointments', 'a0')
+
+        self.assertEqual([item['n'] for item in self.page(first.next_cursor).items], [3, 2])
+
+    def test_cursor_is_tied_to_its_ordering(self):
+        cursor = self.page().next_cursor
+        with self.assertRaises(InvalidCursor):
+            paginate(self.store, 'appointments', order_by=[('n', DESCENDING)], cursor=cursor)
+        with self.assertRaises(InvalidCursor):
+            self.page('not-a-cursor')
+
+
+class CountingView:
+    """A view handler that answers with how many times it ran"""
+
+    def __init__(self, status=200, mark_uncacheable=False):
+        self.calls = 0
+        self.status = status
+        self.mark_uncacheable = mark_uncacheable
+
+    def respond(self):
+        self.calls += 1
+        response = HttpResponse(str(self.calls), status=self.status)
+        return uncacheable(response) if self.mark_uncacheable else response
+
+    @cache_response(ttl=60, tags=('doctor:{uid}', 'doctors'))
+    def get(self, request, uid):
+        return self.respond()
+
+    @cache_response(ttl=0.05, tags=('doctor:{uid}',), stale_ttl=60)
+    def get_stale(self, request, uid):
+        return self.respond()
+
+
+class SlowView(CountingView):
+    """CountingView whose handler runs until released"""
+
+    def __init__(self):
+        super().__init__()
+        self.running = threading.Event()
+        self.release = threading.Event()
+
+    def respond(self):
+        self.running.set()
+        self.release.wait(5)
+        return super().respond()
+
+
+class ResponseCacheTests(SimpleTestCase):
+    """Cached responses are reused until one of their tags is invalidated"""
+
+    def setUp(self):
+        caches['responses'].clear()
+        self.view = CountingView()
+
+    def get(self, uid='1', view=None, path='/doctors/'):
+        return (view or self.view).get(RequestFactory().get(path), uid=uid).content.decode()
+
+    def test_response_is_served_from_cache(self):
+        self.assertEqual([self.get(), self.get()], ['1', '1'])
+        self.assertEqual(self.view.calls, 1)
+
+    def test_query_string_is_part_of_the_key(self):
+        self.get()
+        self.assertEqual(self.get(path='/doctors/?limit=5'), '2')
+
+    def test_invalidating_a_tag_drops_the_responses_built_from_it(self):
+        self.assertEqual((self.get('1'), self.get('2')), ('1', '2'))
+
+        invalidate('doctor:1')
+        self.assertEqual((self.get('1'), self.get('2')), ('3', '2'))
+
+        invalidate('doctors')
+        self.assertEqual((self.get('1'), self.get('2')), ('4', '5'))
+
+    def test_unrelated_tags_keep_the_response(self):
+        self.get()
+        invalidate('doctor:2', 'patients')
+        self.assertEqual(self.get(), '1')
+
+    def test_error_and_uncacheable_responses_are_not_stored(self):
+        for view in (CountingView(status=404), CountingView(mark_uncacheable=True)):
+            with self.subTest(status=view.status):
+                self.assertEqual([self.get(view=view), self.get(view=view)], ['1', '2'])
+
+
+class ResponseCacheLoadingTests(SimpleTestCase):
+    """Concurrent misses share one handler run; stale entries are refreshed in the background"""
+
+    def setUp(self):
+        caches['responses'].clear()
+
+    def get_stale(self, view, uid='1'):
+        return view.get_stale(RequestFactory().get('/doctors/'), uid=uid).content.decode()
+
+    def wait_for_refreshes(self, count):
+        deadline = time.monotonic() + 5
+        while get_response_cache_stats()['refreshes'] < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_concurrent_misses_run_the_handler_once(self):
+        view = SlowView()
+        shared = get_response_cache_stats()['loads']['shared']
+        bodies = []
+
+        def get():
+            bodies.append(view.get(RequestFactory().get('/doctors/'), uid='1').content.decode())
+
+        threads = [threading.Thread(target=get) for _ in range(5)]
+        threads[0].start()
+        self.assertTrue(view.running.wait(5))
+        for thread in threads[1:]:
+            thread.start()
+        # Give the followers time to reach the flight the leader holds
+        time.sleep(0.2)
+        view.release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual((view.calls, bodies), (1, ['1'] * 5))
+        self.assertEqual(get_response_cache_stats()['loads']['shared'] - shared, 4)
+
+    def test_stale_entry_is_served_while_it_is_refreshed(self):
+        view = CountingView()
+        refreshes = get_response_cache_stats()['refreshes']
+        self.assertEqual(self.get_stale(view), '1')
+        time.sleep(0.1)
+
+        self.assertEqual(self.get_stale(view), '1')
+        self.wait_for_refreshes(refreshes + 1)
+        self.assertEqual((view.calls, self.get_stale(view)), (2, '2'))
+
+    def test_invalidation_is_not_hidden_by_a_stale_entry(self):
+        view = CountingView()
+        self.get_stale(view)
+        time.sleep(0.1)
+
+        invalidate('doctor:1')
+        self.assertEqual(self.get_stale(view), '2')
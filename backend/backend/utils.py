@@ -0,0 +1,113 @@
+import threading
+import time
+from datetime import date
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe bounded LRU cache whose entries expire after a TTL"""
+
+    _MISSING = object()
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, self._MISSING)
+            if entry is self._MISSING or entry[1] <= now:
+                if entry is not self._MISSING:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl: float = None):
+        """Store value under key, evicting the least recently used entry if full"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Remove key from the cache and return its value"""
+        with self._lock:
+            entry = self._data.pop(key, self._MISSING)
+        return default if entry is self._MISSING else entry[0]
+
+    def discard_where(self, predicate):
+        """Remove every entry whose value matches predicate"""
+        with self._lock:
+            stale = [key for key, (value, _) in self._data.items() if predicate(value)]
+            for key in stale:
+                del self._data[key]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def values(self) -> list:
+        """Snapshot of the cached values, expired entries included"""
+        with self._lock:
+            return [value for value, _ in self._data.values()]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+
+def parse_fields(raw, allowed, default=None):
+    """
+    Parse a comma-separated ?fields= value into a projection list.
+
+    Returns default when raw is empty and raises ValueError for fields not
+    in allowed, so callers can never select fields such as the password hash.
+    """
+    if not raw:
+        return default
+    fields = list(dict.fromkeys(field.strip() for field in raw.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def parse_date_range(query_params):
+    """
+    Read the inclusive ?from= and ?to= dates (YYYY-MM-DD) of a list request.
+
+    Returns (date_from, date_to), either of which may be None. Raises
+    ValueError for malformed dates or an empty range.
+    """
+    bounds = []
+    for name in ('from', 'to'):
+        raw = query_params.get(name)
+        try:
+            bounds.append(date.fromisoformat(raw) if raw else None)
+        except ValueError:
+            raise ValueError(f"'{name}' must be a date in YYYY-MM-DD format")
+    date_from, date_to = bounds
+    if date_from and date_to and date_from > date_to:
+        raise ValueError("'from' must not be after 'to'")
+    return date_from, date_to
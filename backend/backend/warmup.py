@@ -0,0 +1,31 @@
+import logging
+import time
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def run_warmup(hooks=None) -> dict:
+    """
+    Call each warm-up hook (dotted paths to zero-argument callables).
+
+    Used by gunicorn's post_worker_init so a fresh worker opens its
+    Firestore channel and loads its in-process tables before accepting
+    traffic. A failing hook is logged and skipped; the worker still starts.
+    Returns {hook: elapsed ms, or the error message}.
+    """
+    if hooks is None:
+        hooks = getattr(settings, 'WARMUP_HOOKS', [])
+    report = {}
+    for path in hooks:
+        started = time.perf_counter()
+        try:
+            import_string(path)()
+        except Exception as e:
+            logger.exception('Warm-up hook %s failed', path)
+            report[path] = str(e)
+            continue
+        report[path] = round((time.perf_counter() - started) * 1000, 1)
+    logger.info('Worker warm-up finished: %s', report)
+    return report
@@ -0,0 +1,232 @@
+"""
+Benchmark requests per second of one worker under WSGI and under ASGI.
+
+Seeds a JSON fixture (doctors with a week of slots, patients, appointments
+and health records) and starts one gunicorn worker per variant on the
+memory store, with every store call delayed by --latency ms to stand in
+for a Firestore round trip:
+
+    wsgi-sync     gunicorn sync worker (the render.yaml default)
+    wsgi-gthread  gunicorn gthread worker with --threads threads
+    asgi          uvicorn worker with ASYNC_VIEWS=True
+
+Each variant is driven by --concurrency keep-alive connections cycling
+through the doctor list, availability check, appointment list and the
+doctor's patient health view for --duration seconds. Reports RPS, latency
+percentiles and non-2xx responses.
+
+Run from the backend directory:
+    python benchmarks/asgi_throughput.py --concurrency 200 --latency 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def build_fixture(doctors, patients):
+    data = {'doctors': {}, 'patients': {}, 'appointments': {}, 'health_tracking': {}}
+    for i in range(doctors):
+        uid = f'doctor-{i:04d}'
+        data['doctors'][uid] = {
+            'uid': uid,
+            'email': f'doctor{i}@example.com',
+            'password': '$2b$12$' + 'x' * 53,
+            'first_name': f'First{i}',
+            'last_name': f'Last{i}',
+            'specialization': ['Cardiologist', 'Dermatologist', 'Pediatrician'][i % 3],
+            'years_of_experience': i % 30,
+            'is_verified': True,
+            'is_active': True,
+            'availability': [
+                {
+                    'day': day,
+                    'is_available': True,
+                    'time_slots': [
+                        {'start_time': f'{h:02d}:00', 'end_time': f'{h + 1:02d}:00', 'is_available': True}
+                        for h in range(9, 17)
+                    ]
+                }
+                for day in DAYS
+            ]
+        }
+    for i in range(patients):
+        uid = f'patient-{i:04d}'
+        doctor_uid = f'doctor-{i % doctors:04d}'
+        data['patients'][uid] = {
+            'uid': uid,
+            'email': f'patient{i}@example.com',
+            'first_name': f'Patient{i}',
+            'last_name': 'Example',
+            'phone_number': '+1 555 0100'
+        }
+        for j in range(3):
+            booking_id = f'booking-{i:04d}-{j}'
+            data['appointments'][booking_id] = {
+                'booking_id': booking_id,
+                'doctor_uid': doctor_uid,
+                'patient_uid': uid,
+                'day': DAYS[j],
+                'start_time': '09:00',
+                'end_time': '10:00',
+                'status': 'confirmed',
+                'created_at': f'2026-01-{j + 1:02d}T09:00:00+00:00'
+            }
+        for j in range(7):
+            data['health_tracking'][f'tracking-{i:04d}-{j}'] = {
+                'patient_uid': uid,
+                'date': f'2026-01-{j + 1:02d}',
+                'steps_taken': 5000 + j * 100,
+                'hours_sleep': 7
+            }
+    return data
+
+
+def request_paths(doctors, patients):
+    paths = []
+    for i in range(min(doctors, patients)):
+        doctor_uid = f'doctor-{i:04d}'
+        paths.extend([
+            '/api/doctors/list/?limit=20',
+            f'/api/doctors/check-availability/{doctor_uid}/?day=monday',
+            f'/api/doctors/appointments/{doctor_uid}/',
+            f'/api/health-goals/doctor-view/patient-{i:04d}/',
+        ])
+    return paths
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(variant, port, fixture, latency, threads):
+    env = dict(
+        os.environ,
+        STORAGE_BACKEND='memory',
+        STORAGE_MEMORY_FIXTURE=fixture,
+        STORAGE_MEMORY_LATENCY_MS=str(latency),
+        ALLOWED_HOSTS='127.0.0.1',
+        DEBUG='False',
+        ASYNC_VIEWS='True' if variant == 'asgi' else 'False'
+    )
+    command = [sys.executable, '-m', 'gunicorn', '-w', '1', '-b', f'127.0.0.1:{port}', '--log-level', 'warning']
+    if variant == 'asgi':
+        command += ['-k', 'uvicorn.workers.UvicornWorker', 'backend.asgi:application']
+    elif variant == 'wsgi-gthread':
+        command += ['-k', 'gthread', '--threads', str(threads), 'backend.wsgi:application']
+    else:
+        command += ['backend.wsgi:application']
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/api/doctors/list/?limit=1', timeout=5).read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'{variant} server did not start')
+
+
+async def connection(port, paths, offset, stop, latencies, failures):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    i = offset
+    try:
+        while time.monotonic() < stop:
+            path = paths[i % len(paths)]
+            i += 1
+            started = time.perf_counter()
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n'.encode())
+            await writer.drain()
+            head = await reader.readuntil(b'\r\n\r\n')
+            status_code = int(head.split(b' ', 2)[1])
+            length = 0
+            for line in head.split(b'\r\n'):
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':', 1)[1])
+            await reader.readexactly(length)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if not 200 <= status_code < 300:
+                failures.append(status_code)
+            if b'connection: close' in head.lower():
+                writer.close()
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    finally:
+        writer.close()
+
+
+async def drive(port, paths, concurrency, duration):
+    stop = time.monotonic() + duration
+    latencies, failures = [], []
+    started = time.monotonic()
+    results = await asyncio.gather(
+        *(connection(port, paths, n, stop, latencies, failures) for n in range(concurrency)),
+        return_exceptions=True
+    )
+    elapsed = time.monotonic() - started
+    errors = [r for r in results if isinstance(r, Exception)]
+    return latencies, failures, errors, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--doctors', type=int, default=200)
+    parser.add_argument('--patients', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--latency', type=float, default=20, help='simulated store round trip in ms')
+    parser.add_argument('--threads', type=int, default=8, help='threads of the gthread worker')
+    parser.add_argument('--variants', default='wsgi-sync,wsgi-gthread,asgi')
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as handle:
+        json.dump(build_fixture(args.doctors, args.patients), handle)
+        fixture = handle.name
+    paths = request_paths(args.doctors, args.patients)
+
+    print(f'concurrency={args.concurrency} store latency={args.latency:g}ms duration={args.duration:g}s, 1 worker')
+    print(f'{"variant":<14}{"requests":>10}{"rps":>10}{"p50 ms":>10}{"p99 ms":>10}{"non-2xx":>10}{"conn err":>10}')
+    try:
+        for variant in args.variants.split(','):
+            port = free_port()
+            process = start_server(variant, port, fixture, args.latency, args.threads)
+            try:
+                latencies, failures, errors, elapsed = asyncio.run(
+                    drive(port, paths, args.concurrency, args.duration)
+                )
+            finally:
+                process.terminate()
+                process.wait()
+            print(
+                f'{variant:<14}{len(latencies):>10}{len(latencies) / elapsed:>10.1f}'
+                f'{percentile(latencies, 50):>10.1f}{percentile(latencies, 99):>10.1f}'
+                f'{len(failures):>10}{len(errors):>10}'
+            )
+    finally:
+        os.unlink(fixture)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark the availability bitmap index against the availability lists.
+
+Builds DOCTORS weekly schedules shaped like the ones created by
+populate_test_data.py (hourly slots 09:00-17:00, a share of them booked)
+and reports, per doctor:
+
+    memory     deep size of the availability array vs its WeekBitmap
+    slot       "is monday 14:00-15:00 free?" as a list scan vs bit masks
+    free       the free slots of a day as a list filter vs bit scanning
+
+Both sides work on data already in memory; store round trips are not
+included.
+
+Run from the backend directory:
+    python benchmarks/availability_index.py --doctors 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+os.environ.setdefault('ALLOWED_HOSTS', 'testserver')
+os.environ.setdefault('STORAGE_BACKEND', 'memory')
+
+import django
+
+django.setup()
+
+from doctors.availability import availability_index, listed_check
+from doctors.availability_index import DAYS
+
+
+def make_availability(rng, booked_share):
+    availability = []
+    for day in DAYS:
+        time_slots = []
+        for h in range(9, 17):
+            slot = {'start_time': f'{h:02d}:00', 'end_time': f'{h + 1:02d}:00', 'is_available': True}
+            if rng.random() < booked_share:
+                slot.update({'is_available': False, 'booked_by': f'patient{h}@example.com',
+                             'booking_id': '6f1c2a9e-7d4b-4c3e-9a51-0b8d2e4f6a17'})
+            time_slots.append(slot)
+        availability.append({'day': day, 'is_available': True, 'time_slots': time_slots})
+    return availability
+
+
+def deep_size(value):
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_size(k) + deep_size(v) for k, v in value.items())
+    elif isinstance(value, list):
+        size += sum(deep_size(item) for item in value)
+    return size
+
+
+def timed(fn, items):
+    started = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - started) / len(items) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--doctors', type=int, default=2000)
+    parser.add_argument('--booked', type=float, default=0.4, help='share of slots already booked')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    schedules = [make_availability(rng, args.booked) for _ in range(args.doctors)]
+    weeks = [availability_index.build({'is_active': True}, availability) for availability in schedules]
+    pairs = list(zip(schedules, weeks))
+
+    def day_of(availability, day='monday'):
+        return next(item for item in availability if item['day'] == day)
+
+    list_bytes = sum(deep_size(availability) for availability in schedules) / args.doctors
+    bitmap_bytes = sum(week.size() for week in weeks) / args.doctors
+
+    slot_lists = timed(lambda p: listed_check('u', 'monday', day_of(p[0]), '14:00', '15:00')['is_available'], pairs)
+    slot_bits = timed(lambda p: availability_index.slot_free(p[1], 'monday', '14:00', '15:00'), pairs)
+    free_lists = timed(lambda p: listed_check('u', 'monday', day_of(p[0]), free_only=True)['time_slots'], pairs)
+    free_bits = timed(lambda p: availability_index.free_slots(p[1], 'monday'), pairs)
+
+    print(f'{args.doctors} doctors, {len(DAYS) * 8} slots each, {args.booked:.0%} booked')
+    print(f'memory   lists {list_bytes:9.0f} B    bitmaps {bitmap_bytes:7.0f} B    {list_bytes / bitmap_bytes:5.1f}x')
+    print(f'slot     lists {slot_lists:9.2f} us   bitmaps {slot_bits:7.2f} us   {slot_lists / slot_bits:5.1f}x')
+    print(f'free     lists {free_lists:9.2f} us   bitmaps {free_bits:7.2f} us   {free_lists / free_bits:5.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""
+Benchmark concurrent bookings against a single doctor.
+
+Seeds one doctor with a week of hourly slots in the in-memory store (every
+store call delayed by --latency ms, standing in for a Firestore round
+trip) and fires --bookings POST /api/doctors/book-appointment/ requests
+from --threads threads, each for a random slot. Runs three modes:
+
+    legacy         the previous read, update availability, set appointment
+                   sequence with no transaction
+    transactional  the booking views (one transaction, retried with jitter)
+                   on slots embedded in the doctor document
+    slot-docs      the booking views on one document per slot
+
+and reports throughput, responses by status and the number of double
+bookings: confirmed appointments beyond one per slot, plus appointments
+whose slot does not reference them.
+
+Run from the backend directory:
+    python benchmarks/booking_contention.py --bookings 500 --threads 64
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+os.environ.setdefault('ALLOWED_HOSTS', 'testserver')
+os.environ.setdefault('STORAGE_BACKEND', 'memory')
+
+import django
+
+django.setup()
+
+from django.test import Client
+from firebase_admin import firestore
+from backend.storage import set_store, doctor_repo, appointment_repo, slot_repo
+from backend.storage.memory_store import MemoryStore
+
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+DOCTOR_UID = 'doctor-000001'
+
+
+def seed(latency, slot_documents):
+    store = MemoryStore(latency=latency)
+    doctor = {
+        'uid': DOCTOR_UID,
+        'email': 'doctor@example.com',
+        'first_name': 'Contended',
+        'last_name': 'Doctor',
+        'is_active': True,
+        'availability': [
+            {
+                'day': day,
+                'is_available': True,
+                'time_slots': [
+                    {'start_time': f'{h:02d}:00', 'end_time': f'{h + 1:02d}:00', 'is_available': True}
+                    for h in range(9, 17)
+                ]
+            }
+            for day in DAYS
+        ]
+    }
+    data = {'doctors': {DOCTOR_UID: doctor}}
+    if slot_documents:
+        doctor['availability'], slots = slot_repo.split(doctor['availability'])
+        doctor[slot_repo.storage_field] = slot_repo.documents
+        data[slot_repo.collection_for(DOCTOR_UID)] = slots
+    store.load(data)
+    set_store(store)
+    return store
+
+
+def all_slots():
+    return [(day, f'{h:02d}:00', f'{h + 1:02d}:00') for day in DAYS for h in range(9, 17)]
+
+
+def legacy_book(client, day, start_time, end_time, n):
+    """The pre-transaction booking sequence, for comparison"""
+    doctor_data = doctor_repo.get(DOCTOR_UID)
+    availability = doctor_data['availability']
+    day_avail = next(item for item in availability if item['day'] == day)
+    slot = next(s for s in day_avail['time_slots'] if s['start_time'] == start_time)
+    if not slot.get('is_available', True):
+        return 400
+
+    booking_id = str(uuid.uuid4())
+    slot.update({'is_available': False, 'booked_by': f'patient{n}@example.com', 'booking_id': booking_id})
+    doctor_repo.update(DOCTOR_UID, {'availability': availability, 'updated_at': firestore.SERVER_TIMESTAMP})
+    appointment_repo.set(booking_id, {
+        'booking_id': booking_id,
+        'doctor_uid': DOCTOR_UID,
+        'day': day,
+        'start_time': start_time,
+        'end_time': end_time,
+        'status': 'confirmed',
+        'created_at': firestore.SERVER_TIMESTAMP
+    })
+    return 201
+
+
+def view_book(client, day, start_time, end_time, n):
+    response = client.post(
+        f'/api/doctors/book-appointment/{DOCTOR_UID}/',
+        data=json.dumps({
+            'patient_name': f'Patient {n}',
+            'patient_email': f'patient{n}@example.com',
+            'patient_phone': '+1 555 0100',
+            'day': day,
+            'start_time': start_time,
+            'end_time': end_time
+        }),
+        content_type='application/json'
+    )
+    return response.status_code
+
+
+def double_bookings(store):
+    appointments = [
+        s.data for s in store.query('appointments', filters=[('status', '==', 'confirmed')])
+    ]
+    per_slot = Counter((a['day'], a['start_time'], a['end_time']) for a in appointments)
+    extra = sum(count - 1 for count in per_slot.values() if count > 1)
+
+    doctor = store.get('doctors', DOCTOR_UID)
+    if slot_repo.uses_documents(doctor):
+        slots = [s.data for s in store.query(slot_repo.collection_for(DOCTOR_UID))]
+    else:
+        slots = [slot for day_avail in doctor['availability'] for slot in day_avail['time_slots']]
+    referenced = {slot.get('booking_id') for slot in slots}
+    orphaned = sum(1 for a in appointments if a['booking_id'] not in referenced)
+    return extra, orphaned, len(appointments)
+
+
+def run(book, slot_documents, bookings, threads, latency, seed_value):
+    store = seed(latency, slot_documents)
+    rng = random.Random(seed_value)
+    slots = all_slots()
+    work = [(n, *rng.choice(slots)) for n in range(bookings)]
+    statuses = Counter()
+    lock = threading.Lock()
+    start_gate = threading.Barrier(threads)
+
+    def worker(items):
+        client = Client()
+        start_gate.wait()
+        for n, day, start_time, end_time in items:
+            code = book(client, day, start_time, end_time, n)
+            with lock:
+                statuses[code] += 1
+
+    pool = [threading.Thread(target=worker, args=(work[i::threads],)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    extra, orphaned, confirmed = double_bookings(store.without_latency())
+    return elapsed, statuses, extra, orphaned, confirmed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bookings', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=64)
+    parser.add_argument('--latency', type=float, default=5, help='simulated store round trip in ms')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f'{args.bookings} bookings, {args.threads} threads, {len(all_slots())} slots, '
+          f'store latency {args.latency:g}ms')
+    modes = (('legacy', legacy_book, False), ('transactional', view_book, False), ('slot-docs', view_book, True))
+    for name, book, slot_documents in modes:
+        elapsed, statuses, extra, orphaned, confirmed = run(
+            book, slot_documents, args.bookings, args.threads, args.latency / 1000, args.seed
+        )
+        codes = ' '.join(f'{code}:{count}' for code, count in sorted(statuses.items()))
+        print(f'{name:<14} {args.bookings / elapsed:7.1f} req/s  confirmed={confirmed:<4} '
+              f'double-booked={extra:<4} orphaned={orphaned:<4} [{codes}]')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark DoctorListView payload size and latency with and without projections.
+
+Seeds the in-memory store with DOCTORS doctor documents shaped like the ones
+created by populate_test_data.py (bcrypt hash, a week of availability with
+hourly slots) and requests /api/doctors/list/ with:
+
+    full     every public field (?fields=<all of DOCTOR_FIELDS>)
+    default  the list view's default projection
+    minimal  ?fields=uid,first_name,last_name,specialization
+
+For each variant it reports the documents' size as returned by the store
+(what Firestore would send over gRPC), the JSON response size and the
+request latency percentiles.
+
+Run from the backend directory:
+    python benchmarks/doctor_list_payload.py --doctors 2000 --requests 50
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+os.environ.setdefault('ALLOWED_HOSTS', 'testserver')
+os.environ.setdefault('STORAGE_BACKEND', 'memory')
+
+import django
+
+django.setup()
+
+from django.test import Client
+from backend.storage import set_store
+from backend.storage.memory_store import MemoryStore
+from doctors.views import DOCTOR_FIELDS, DOCTOR_LIST_FIELDS
+
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def make_doctor(i):
+    uid = f'doctor-{i:06d}'
+    return uid, {
+        'uid': uid,
+        'email': f'doctor{i}@example.com',
+        'password': '$2b$12$' + 'x' * 53,
+        'first_name': f'First{i}',
+        'last_name': f'Last{i}',
+        'phone_number': '+1 555 0100',
+        'specialization': ['Cardiologist', 'Dermatologist', 'Pediatrician'][i % 3],
+        'license_number': f'LIC-{i:06d}',
+        'years_of_experience': i % 30,
+        'bio': 'Board certified physician with a focus on preventive care.',
+        'profile_picture': '',
+        'is_verified': True,
+        'is_active': True,
+        'availability': [
+            {
+                'day': day,
+                'is_available': True,
+                'time_slots': [
+                    {'start_time': f'{h:02d}:00', 'end_time': f'{h + 1:02d}:00', 'is_available': True}
+                    for h in range(9, 17)
+                ]
+            }
+            for day in DAYS
+        ]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--doctors', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    store = MemoryStore()
+    store.load({'doctors': dict(make_doctor(i) for i in range(args.doctors))})
+    set_store(store)
+
+    variants = [
+        ('full', DOCTOR_FIELDS),
+        ('default', None),
+        ('minimal', ['uid', 'first_name', 'last_name', 'specialization'])
+    ]
+
+    client = Client()
+    print(f'{args.doctors} doctors, {args.requests} requests per variant')
+    print(f"{'variant':<10}{'store KB':>10}{'JSON KB':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, fields in variants:
+        params = {'fields': ','.join(fields)} if fields else {}
+        projected = fields or DOCTOR_LIST_FIELDS
+        store_bytes = len(json.dumps(
+            [snapshot.data for snapshot in store.query('doctors', fields=projected)], default=str
+        ))
+
+        samples, body_bytes = [], 0
+        for _ in range(args.requests):
+            started = time.perf_counter()
+            response = client.get('/api/doctors/list/', params)
+            samples.append((time.perf_counter() - started) * 1000)
+            body_bytes = len(response.content)
+
+        print(f'{name:<10}{store_bytes / 1024:>10.1f}{body_bytes / 1024:>10.1f}'
+              f'{percentile(samples, 50):>10.1f}{percentile(samples, 99):>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark doctor reads from the per-process replica against the store.
+
+Seeds the in-memory store with DOCTORS doctor documents shaped like the
+ones created by populate_test_data.py, adds a simulated round trip of
+LATENCY ms to every store call (the replica itself is fed by the change
+feed, not by reads) and reports the mean latency of:
+
+    get        a full doctor document (the auth path)
+    is_active  the ?date= availability check's projection
+    page       a default-projection list page of LIMIT active doctors
+
+Run from the backend directory:
+    python benchmarks/doctor_replica.py --doctors 5000 --latency 5
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+os.environ.setdefault('ALLOWED_HOSTS', 'testserver')
+os.environ.setdefault('STORAGE_BACKEND', 'memory')
+
+import django
+
+django.setup()
+
+from backend.storage import set_store, get_store, CollectionReplica
+from backend.storage.memory_store import MemoryStore
+from backend.storage.repositories import DoctorRepository
+from benchmarks.doctor_list_payload import make_doctor
+from doctors.views import DOCTOR_LIST_FIELDS
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--doctors', type=int, default=5000)
+    parser.add_argument('--latency', type=float, default=5.0, help='simulated store round trip in ms')
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    store = MemoryStore(latency=args.latency / 1000)
+    store.load({'doctors': dict(make_doctor(i) for i in range(args.doctors))})
+    set_store(store)
+
+    replica = CollectionReplica(get_store, DoctorRepository.collection)
+    repository = DoctorRepository(get_store, replica=replica)
+    started = time.perf_counter()
+    replica.wait_ready(30)
+    ready = (time.perf_counter() - started) * 1e3
+
+    rng = random.Random(args.seed)
+    uids = itertools.cycle([f'doctor-{rng.randrange(args.doctors):06d}' for _ in range(1000)])
+    cases = [
+        ('get', lambda replicated: repository.get(next(uids), replica=replicated)),
+        ('is_active', lambda replicated: repository.get(next(uids), fields=['is_active'], replica=replicated)),
+        ('page', lambda replicated: repository.page(active_only=True, fields=DOCTOR_LIST_FIELDS,
+                                                    limit=args.limit, replica=replicated)),
+    ]
+
+    print(f'{args.doctors} doctors replicated in {ready:.0f} ms, store round trip {args.latency} ms')
+    print(f'{"":10} {"store":>8}    {"replica":>8}')
+    for label, read in cases:
+        from_store = timed(lambda: read(False), args.repeat)
+        from_replica = timed(lambda: read(True), args.repeat)
+        print(f'{label:10} {from_store:8.3f} ms {from_replica:8.3f} ms')
+    print(f'replica stats: {replica.stats()}')
+
+
+if __name__ == '__main__':
+    main()
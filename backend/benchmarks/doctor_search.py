@@ -0,0 +1,99 @@
+"""
+Benchmark the doctor search index.
+
+Builds DOCTORS profiles from a pool of names, specializations and bio
+phrases (most last names unique, which makes short prefixes expand to
+thousands of terms) and reports the mean latency of queries, including
+facet counts, cold (the first time after the index changed) and cached:
+
+    prefix     'c', 'ca', 'car', ... 'cardiologist', as typed
+    name       'ann smi'
+    typo       'cardiolgist', 'dermatolgy'
+    listing    no query (the dropdown), first LIMIT active doctors by name
+
+Run from the backend directory:
+    python benchmarks/doctor_search.py --doctors 20000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+os.environ.setdefault('ALLOWED_HOSTS', 'testserver')
+os.environ.setdefault('STORAGE_BACKEND', 'memory')
+
+import django
+
+django.setup()
+
+from doctors.doctor_search import DoctorSearchIndex
+
+FIRST_NAMES = ['Ann', 'Bob', 'Carl', 'Diana', 'Emil', 'Fatima', 'Grace', 'Hiro', 'Ines', 'Jamal', 'Kofi', 'Lena',
+               'Maya', 'Nikhil', 'Omar', 'Priya', 'Quinn', 'Rosa', 'Sanjay', 'Tara']
+LAST_NAMES = ['Smith', 'Jones', 'Garcia', 'Kim', 'Patel', 'Nguyen', 'Okafor', 'Rossi', 'Schmidt', 'Tanaka',
+              'Silva', 'Cohen', 'Ivanova', 'Haddad', 'Mensah', 'Larsen']
+SPECIALIZATIONS = ['Cardiologist', 'Dermatologist', 'Pediatrician', 'Neurologist', 'General Physician',
+                   'Orthopedic Surgeon', 'Psychiatrist', 'Ophthalmologist', 'Gynecologist', 'Dentist']
+BIO_PHRASES = ['heart rhythm', 'skin care', 'children', 'sports injuries', 'migraine', 'family medicine',
+               'anxiety', 'cataract surgery', 'prenatal care', 'implants', 'telehealth', 'diabetes']
+
+
+def timed(index, queries, repeat, cold, **options):
+    elapsed = 0.0
+    for _ in range(repeat):
+        for query in queries:
+            if cold:
+                index._results.clear()
+            started = time.perf_counter()
+            index.search(query, **options)
+            elapsed += time.perf_counter() - started
+    return elapsed / (repeat * len(queries)) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--doctors', type=int, default=20000)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    doctors = [
+        (f'doctor{i}', {
+            'first_name': rng.choice(FIRST_NAMES),
+            'last_name': f'{rng.choice(LAST_NAMES)}{i}' if i % 3 else rng.choice(LAST_NAMES),
+            'specialization': rng.choice(SPECIALIZATIONS),
+            'bio': ', '.join(rng.sample(BIO_PHRASES, 2)),
+            'is_active': rng.random() < 0.8
+        })
+        for i in range(args.doctors)
+    ]
+    index = DoctorSearchIndex(lambda: doctors, refresh_interval=3600)
+    started = time.perf_counter()
+    index.start()
+    build = (time.perf_counter() - started) * 1e3
+
+    word = 'cardiologist'
+    cases = [
+        ('prefix', [word[:n] for n in range(1, len(word) + 1)], {}),
+        ('name', ['ann smi'], {}),
+        ('typo', ['cardiolgist', 'dermatolgy'], {}),
+        ('listing', [''], {'active_only': True}),
+    ]
+
+    print(f'{args.doctors} doctors, {index.stats()["terms"]} terms indexed in {build:.0f} ms, limit {args.limit}')
+    print(f'{"":10} {"cold":>8}    {"cached":>8}')
+    for label, queries, options in cases:
+        cold = timed(index, queries, args.repeat, True, limit=args.limit, **options)
+        cached = timed(index, queries, args.repeat, False, limit=args.limit, **options)
+        print(f'{label:10} {cold:8.3f} ms {cached:8.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
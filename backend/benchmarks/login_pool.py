@@ -0,0 +1,115 @@
+"""
+Benchmark bcrypt login verification inline vs. through the process pool.
+
+Simulates a login storm on a threaded worker: LOGIN_THREADS threads verify
+passwords back to back while one probe thread issues a cheap GET through the
+Django test client. Reports login and GET latency percentiles for both modes.
+
+Run from the backend directory:
+    python benchmarks/login_pool.py --threads 16 --duration 10
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+import bcrypt
+import django
+
+django.setup()
+
+from django.test import Client
+from doctors.password_pool import PasswordPool, PasswordPoolBusy
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(verify, threads, duration):
+    stop = time.monotonic() + duration
+    login_ms, get_ms = [], []
+    rejected = [0]
+    lock = threading.Lock()
+
+    def login_worker():
+        while time.monotonic() < stop:
+            started = time.perf_counter()
+            try:
+                verify()
+            except PasswordPoolBusy:
+                with lock:
+                    rejected[0] += 1
+                continue
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                login_ms.append(elapsed)
+
+    def get_probe():
+        client = Client()
+        while time.monotonic() < stop:
+            started = time.perf_counter()
+            client.get('/api/doctors/auth/cache-stats/')
+            get_ms.append((time.perf_counter() - started) * 1000)
+            time.sleep(0.01)
+
+    workers = [threading.Thread(target=login_worker) for _ in range(threads)]
+    workers.append(threading.Thread(target=get_probe))
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    return {
+        'logins': len(login_ms),
+        'rejected': rejected[0],
+        'login_p50': percentile(login_ms, 50),
+        'login_p99': percentile(login_ms, 99),
+        'get_p50': percentile(get_ms, 50),
+        'get_p99': percentile(get_ms, 99),
+        'get_mean': statistics.mean(get_ms) if get_ms else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=16, help='Concurrent login threads')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per mode')
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) - 1), help='Pool processes')
+    parser.add_argument('--queue-depth', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=12, help='bcrypt cost of the stored hash')
+    args = parser.parse_args()
+
+    password = b'Doctor123'
+    hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds=args.rounds))
+
+    pool = PasswordPool(workers=args.workers, queue_depth=args.queue_depth, timeout=5.0)
+    pool.check(password, hashed)  # start the pool processes before measuring
+
+    results = {
+        'inline': run(lambda: bcrypt.checkpw(password, hashed), args.threads, args.duration),
+        'pool': run(lambda: pool.check(password, hashed), args.threads, args.duration)
+    }
+
+    print(f"{'mode':<8}{'logins':>8}{'rejected':>10}{'login p50':>12}{'login p99':>12}{'GET p50':>10}{'GET p99':>10}")
+    for mode, r in results.items():
+        print(
+            f"{mode:<8}{r['logins']:>8}{r['rejected']:>10}"
+            f"{r['login_p50']:>10.1f}ms{r['login_p99']:>10.1f}ms"
+            f"{r['get_p50']:>8.1f}ms{r['get_p99']:>8.1f}ms"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark the read endpoints with and without the response cache.
+
+Seeds the in-memory store with DOCTORS doctor documents shaped like the
+ones created by populate_test_data.py, adds a simulated round trip of
+LATENCY ms to every store call and reports the mean latency of requests
+made through the Django test client, uncached and then repeated against a
+warm cache:
+
+    list      GET /api/doctors/list/ (default projection, first page)
+    profile   GET /api/doctors/profile/<uid>/
+    check     GET /api/doctors/check-availability/<uid>/?day=monday
+
+The last column invalidates one of the requested documents' tags, in turn,
+every INVALIDATE_EVERY requests, as writes would.
+
+Then CONCURRENCY threads request the doctor list at once right after it
+was invalidated, with the cache off and on, to show concurrent misses
+being coalesced into one store read (single-flight).
+
+Run from the backend directory:
+    python benchmarks/response_cache.py --doctors 2000 --latency 5
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+os.environ.setdefault('ALLOWED_HOSTS', 'testserver')
+os.environ.setdefault('STORAGE_BACKEND', 'memory')
+
+import django
+
+django.setup()
+
+from django.test import Client, override_settings
+from backend.storage import set_store
+from backend.storage.memory_store import MemoryStore
+from backend.response_cache import invalidate, get_response_cache_stats
+from benchmarks.doctor_list_payload import make_doctor
+
+
+def timed(client, urls, repeat, invalidate_every=None, tags=None):
+    started = time.perf_counter()
+    for i in range(repeat):
+        if invalidate_every and i % invalidate_every == 0:
+            invalidate(next(tags))
+        response = client.get(next(urls))
+        assert response.status_code == 200, response.content
+    return (time.perf_counter() - started) / repeat * 1e3
+
+
+class CountingStore(MemoryStore):
+    """MemoryStore counting its simulated round trips"""
+    calls = 0
+
+    def _simulate_latency(self):
+        self.calls += 1
+        super()._simulate_latency()
+
+
+def stampede(store, url, concurrency):
+    """(store calls, slowest response in ms) for concurrency simultaneous requests"""
+    barrier = threading.Barrier(concurrency)
+    latencies = []
+
+    def request():
+        client = Client()
+        barrier.wait()
+        started = time.perf_counter()
+        client.get(url)
+        latencies.append((time.perf_counter() - started) * 1e3)
+
+    calls = store.calls
+    threads = [threading.Thread(target=request) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return store.calls - calls, max(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--doctors', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=5.0, help='simulated store round trip in ms')
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--hot', type=int, default=20, help='distinct doctors requested')
+    parser.add_argument('--invalidate-every', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    store = CountingStore(latency=args.latency / 1000)
+    store.load({'doctors': dict(make_doctor(i) for i in range(args.doctors))})
+    set_store(store)
+
+    rng = random.Random(args.seed)
+    hot = [f'doctor-{rng.randrange(args.doctors):06d}' for _ in range(args.hot)]
+    cases = [
+        ('list', ['/api/doctors/list/'], ['doctors']),
+        ('profile', [f'/api/doctors/profile/{uid}/' for uid in hot], [f'doctor:{uid}' for uid in hot]),
+        ('check', [f'/api/doctors/check-availability/{uid}/?day=monday' for uid in hot],
+         [f'doctor:{uid}' for uid in hot]),
+    ]
+
+    client = Client()
+    print(f'{args.doctors} doctors, store round trip {args.latency} ms, {args.hot} hot doctors')
+    print(f'{"":10} {"uncached":>9}    {"cached":>9}    {"invalidated 1/" + str(args.invalidate_every):>16}')
+    for label, urls, tags in cases:
+        with override_settings(RESPONSE_CACHE_ENABLED=False):
+            uncached = timed(client, itertools.cycle(urls), args.repeat)
+        timed(client, iter(urls), len(urls))
+        cached = timed(client, itertools.cycle(urls), args.repeat)
+        churned = timed(client, itertools.cycle(urls), args.repeat, args.invalidate_every, itertools.cycle(tags))
+        print(f'{label:10} {uncached:9.3f} ms {cached:9.3f} ms {churned:13.3f} ms')
+
+    print(f'\n{args.concurrency} concurrent requests for the doctor list')
+    with override_settings(RESPONSE_CACHE_ENABLED=False):
+        calls, slowest = stampede(store, '/api/doctors/list/', args.concurrency)
+    print(f'{"uncached":10} {calls:4} store calls, slowest {slowest:8.3f} ms')
+    invalidate('doctors')
+    calls, slowest = stampede(store, '/api/doctors/list/', args.concurrency)
+    print(f'{"coalesced":10} {calls:4} store calls, slowest {slowest:8.3f} ms')
+    print(f'response cache stats: {get_response_cache_stats()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark the cross-doctor slot search index.
+
+Builds DOCTORS weekly schedules shaped like the ones created by
+populate_test_data.py (hourly slots 09:00-17:00, a share of them booked)
+across a few specializations and reports the latency of:
+
+    day        the first LIMIT free Monday slots of any doctor
+    spec       the same for one specialization
+    window     one specialization, 14:00-16:00 only
+    next       the first LIMIT free dated slots of one specialization
+               from now on (next-available)
+    per-doctor the same window as one availability check per doctor,
+               the way clients had to before (lists in memory, no store
+               round trips)
+
+Run from the backend directory:
+    python benchmarks/slot_search.py --doctors 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+os.environ.setdefault('ALLOWED_HOSTS', 'testserver')
+os.environ.setdefault('STORAGE_BACKEND', 'memory')
+
+import django
+
+django.setup()
+
+from doctors.availability import listed_check
+from doctors.availability_index import DAYS
+from doctors.slot_search import SlotSearchIndex
+
+SPECIALIZATIONS = ['Cardiologist', 'Dermatologist', 'Pediatrician', 'Neurologist', 'General Physician']
+
+
+def make_availability(rng, booked_share):
+    availability = []
+    for day in DAYS:
+        time_slots = []
+        for h in range(9, 17):
+            slot = {'start_time': f'{h:02d}:00', 'end_time': f'{h + 1:02d}:00', 'is_available': True}
+            if rng.random() < booked_share:
+                slot.update({'is_available': False, 'booked_by': f'patient{h}@example.com',
+                             'booking_id': '6f1c2a9e-7d4b-4c3e-9a51-0b8d2e4f6a17'})
+            time_slots.append(slot)
+        availability.append({'day': day, 'is_available': True, 'time_slots': time_slots})
+    return availability
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--doctors', type=int, default=2000)
+    parser.add_argument('--booked', type=float, default=0.4, help='share of slots already booked')
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    start = date(2026, 3, 2)
+    horizon = start + timedelta(days=27)
+    doctors = [
+        (f'doctor{i}', {'first_name': 'Doctor', 'last_name': str(i), 'is_active': True,
+                        'specialization': rng.choice(SPECIALIZATIONS), 'calendar_until': horizon.isoformat()},
+         make_availability(rng, args.booked))
+        for i in range(args.doctors)
+    ]
+    index = SlotSearchIndex(lambda: (doctors, []), refresh_interval=3600)
+    started = time.perf_counter()
+    index.start()
+    build = (time.perf_counter() - started) * 1e3
+
+    def per_doctor():
+        free = []
+        for uid, doctor_data, availability in doctors:
+            if doctor_data['specialization'] != 'Cardiologist':
+                continue
+            monday = next(item for item in availability if item['day'] == 'monday')
+            free += [
+                (slot['start_time'], uid)
+                for slot in listed_check(uid, 'monday', monday, free_only=True)['time_slots']
+                if '14:00' <= slot['start_time'] and slot['end_time'] <= '16:00'
+            ]
+        return sorted(free)[:args.limit]
+
+    day = timed(lambda: index.search('monday', limit=args.limit), args.repeat)
+    spec = timed(lambda: index.search('monday', 'Cardiologist', limit=args.limit), args.repeat)
+    window = timed(lambda: index.search('monday', 'Cardiologist', start_time='14:00', end_time='16:00',
+                                        limit=args.limit), args.repeat)
+    earliest = timed(lambda: index.earliest(start, horizon, after='12:00', specialization='Cardiologist',
+                                            limit=args.limit), args.repeat)
+    scan = timed(per_doctor, max(args.repeat // 20, 1))
+
+    print(f'{args.doctors} doctors, {index.stats()["slots"]} slots indexed in {build:.0f} ms, '
+          f'{args.booked:.0%} booked, limit {args.limit}')
+    print(f'day        {day:8.3f} ms')
+    print(f'spec       {spec:8.3f} ms')
+    print(f'window     {window:8.3f} ms')
+    print(f'next       {earliest:8.3f} ms')
+    print(f'per-doctor {scan:8.3f} ms   {scan / window:5.0f}x')
+
+
+if __name__ == '__main__':
+    main()
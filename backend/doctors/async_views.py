@@ -0,0 +1,332 @@
+"""
+Native async versions of the hot doctor endpoints.
+
+Served instead of the APIViews in views.py when settings.ASYNC_VIEWS is
+True (ASGI deployments). They run on the AsyncDocumentStore, so one worker
+overlaps many requests' Firestore round trips on its event loop. bcrypt is
+awaited on the process pool or the I/O thread pool.
+"""
+
+from datetime import date
+from rest_framework import status
+from firebase_admin import firestore
+from backend.async_views import AsyncAPIView, json_response
+from backend.storage import (
+    doctor_repo,
+    patient_repo,
+    appointment_repo,
+    calendar_repo,
+    slot_repo,
+    InvalidCursor,
+    parse_page_params
+)
+from backend.utils import parse_fields, parse_date_range
+from backend.conditional import with_validator_fields, strip_fields, not_modified, add_validators
+from backend.response_cache import cache_response
+from .serializers import DoctorLoginSerializer, BookAppointmentSerializer
+from .auth import (
+    averify_password,
+    password_needs_rehash,
+    schedule_password_rehash,
+    generate_jwt_token
+)
+from .password_pool import PasswordPoolBusy
+from .availability import (
+    with_storage_field,
+    aget_availability,
+    aexpand_availability,
+    availability_index,
+    indexed_check,
+    listed_check,
+    dated_check,
+    doctor_validators
+)
+from .dated_slots import weekday
+from .booking import abook_slot, BookingError
+from .views import DOCTOR_FIELDS, DOCTOR_LIST_FIELDS, PATIENT_DETAIL_FIELDS, doctor_list_tags
+
+
+class DoctorLoginView(AsyncAPIView):
+
+    async def post(self, request):
+        serializer = DoctorLoginSerializer(data=request.data)
+        if not serializer.is_valid():
+            return json_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        email = serializer.validated_data['email']
+        password = serializer.validated_data['password']
+
+        try:
+            doctor_data = await doctor_repo.afind_by_email(email)
+
+            if not doctor_data:
+                return json_response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+
+            if not await averify_password(password, doctor_data['password']):
+                return json_response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+
+            if password_needs_rehash(doctor_data['password']):
+                schedule_password_rehash('doctor', doctor_data['uid'], password)
+
+            tokens = generate_jwt_token(
+                doctor_data['uid'], email, role='doctor', is_active=doctor_data.get('is_active', True)
+            )
+            doctor_data.pop('password')
+            await aexpand_availability(doctor_data['uid'], doctor_data)
+
+            return json_response({
+                'message': 'Login successful',
+                'doctor': doctor_data,
+                'tokens': tokens
+            }, status=status.HTTP_200_OK)
+
+        except PasswordPoolBusy:
+            return json_response(
+                {'error': 'Server is busy, please retry shortly'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': '1'}
+            )
+        except Exception as e:
+            return json_response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class DoctorListView(AsyncAPIView):
+
+    @cache_response(ttl=30, tags=doctor_list_tags, stale_ttl=60)
+    async def get(self, request):
+        try:
+            fields = parse_fields(request.query_params.get('fields'), DOCTOR_FIELDS, DOCTOR_LIST_FIELDS)
+        except ValueError as e:
+            return json_response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            active_only = request.query_params.get('active_only', 'false').lower() == 'true'
+            limit, cursor = parse_page_params(request.query_params)
+
+            page = await doctor_repo.apage(
+                active_only=active_only, fields=with_validator_fields(with_storage_field(fields)), limit=limit,
+                cursor=cursor, replica=True
+            )
+            doctors = []
+            for doctor_data in page.items:
+                slot_documents = slot_repo.uses_documents(doctor_data)
+                await aexpand_availability(doctor_data.get('uid'), doctor_data)
+                doctors.append((doctor_data.get('uid'), doctor_data, slot_documents))
+
+            current = doctor_validators(doctors, fields, active_only, limit, cursor, page.next_cursor)
+            response = not_modified(request, current)
+            if response is not None:
+                return response
+
+            return add_validators(json_response({
+                'count': len(page.items),
+                'doctors': [strip_fields(doctor_data, fields) for doctor_data in page.items],
+                'next_cursor': page.next_cursor
+            }, status=status.HTTP_200_OK), current)
+
+        except InvalidCursor as e:
+            return json_response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return json_response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class CheckDoctorAvailabilityView(AsyncAPIView):
+
+    # No stale_ttl, as for the sync view
+    @cache_response(ttl=15, tags=['doctor:{uid}'])
+    async def get(self, request, uid):
+        day = request.query_params.get('day', '').lower()
+        slot_date = None
+
+        if request.query_params.get('date'):
+            try:
+                slot_date = date.fromisoformat(request.query_params['date'])
+            except ValueError:
+                return json_response({'error': "'date' must be a date in YYYY-MM-DD format"},
+                                     status=status.HTTP_400_BAD_REQUEST)
+            day = weekday(slot_date)
+
+        if not day:
+            return json_response({'error': 'Day or date parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        valid_days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+        if day not in valid_days:
+            return json_response({
+                'error': f'Invalid day. Must be one of: {", ".join(valid_days)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        start_time = request.query_params.get('start_time')
+        end_time = request.query_params.get('end_time')
+        free_only = request.query_params.get('free_only', 'false').lower() == 'true'
+        if bool(start_time) != bool(end_time):
+            return json_response({'error': 'start_time and end_time must be given together'},
+                                 status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            if slot_date is not None:
+                doctor_data = await doctor_repo.aget(uid, fields=['is_active'], replica=True)
+                if doctor_data is None:
+                    return json_response({'error': 'Doctor not found'}, status=status.HTTP_404_NOT_FOUND)
+                if not doctor_data.get('is_active', True):
+                    return json_response({
+                        'uid': uid,
+                        'date': slot_date.isoformat(),
+                        'day': day,
+                        'is_available': False,
+                        'message': 'Doctor is currently offline'
+                    }, status=status.HTTP_200_OK)
+                instances = await calendar_repo.alist_range(uid, slot_date, slot_date)
+                return json_response(
+                    dated_check(uid, slot_date, instances, start_time, end_time, free_only),
+                    status=status.HTTP_200_OK
+                )
+
+            if start_time or free_only:
+                week = await availability_index.aget(uid)
+                if week is not None:
+                    return json_response(indexed_check(uid, day, week, start_time, end_time),
+                                         status=status.HTTP_200_OK)
+
+            doctor_data = await doctor_repo.aget(
+                uid, fields=['is_active', 'availability', 'slot_storage'], replica=True
+            )
+
+            if doctor_data is None:
+                return json_response({'error': 'Doctor not found'}, status=status.HTTP_404_NOT_FOUND)
+
+            if not doctor_data.get('is_active', True):
+                return json_response({
+                    'uid': uid,
+                    'day': day,
+                    'is_available': False,
+                    'message': 'Doctor is currently offline'
+                }, status=status.HTTP_200_OK)
+
+            day_availability = next(iter(await aget_availability(uid, doctor_data, day)), None)
+
+            if not day_availability:
+                return json_response({
+                    'uid': uid,
+                    'day': day,
+                    'is_available': False,
+                    'message': 'No availability set for this day'
+                }, status=status.HTTP_200_OK)
+
+            return json_response(
+                listed_check(uid, day, day_availability, start_time, end_time, free_only),
+                status=status.HTTP_200_OK
+            )
+
+        except Exception as e:
+            return json_response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class BookAppointmentView(AsyncAPIView):
+
+    async def post(self, request, doctor_uid):
+        serializer = BookAppointmentSerializer(data=request.data)
+        if not serializer.is_valid():
+            return json_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+
+        def build_appointment(doctor_data, booking_id):
+            return {
+                'booking_id': booking_id,
+                'doctor_uid': doctor_uid,
+                'doctor_name': f"{doctor_data['first_name']} {doctor_data['last_name']}",
+                'patient_name': data['patient_name'],
+                'patient_email': data['patient_email'],
+                'patient_phone': data['patient_phone'],
+                'day': data['day'],
+                'start_time': data['start_time'],
+                'end_time': data['end_time'],
+                'reason': data.get('reason', ''),
+                'status': 'confirmed',
+                'created_at': firestore.SERVER_TIMESTAMP
+            }
+
+        try:
+            appointment_data = await abook_slot(
+                doctor_uid, data['day'], data['start_time'], data['end_time'],
+                booked_by=data['patient_email'],
+                build_appointment=build_appointment,
+                slot_date=data.get('date')
+            )
+            booking_id = appointment_data['booking_id']
+
+            return json_response({
+                'message': 'Appointment booked successfully',
+                'booking_id': booking_id,
+                'appointment': {
+                    'booking_id': booking_id,
+                    'doctor_name': appointment_data['doctor_name'],
+                    'patient_name': data['patient_name'],
+                    'day': data['day'],
+                    'date': appointment_data.get('date'),
+                    'start_time': data['start_time'],
+                    'end_time': data['end_time'],
+                    'status': 'confirmed'
+                }
+            }, status=status.HTTP_201_CREATED)
+
+        except BookingError as e:
+            return json_response({'error': str(e)}, status=e.status_code)
+        except Exception as e:
+            return json_response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class ListAppointmentsView(AsyncAPIView):
+
+    @cache_response(ttl=15, tags=['appointments:doctor:{doctor_uid}'])
+    async def get(self, request, doctor_uid):
+        try:
+            date_from, date_to = parse_date_range(request.query_params)
+        except ValueError as e:
+            return json_response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        appointment_status = request.query_params.get('status')
+        if appointment_status and appointment_status not in appointment_repo.statuses:
+            return json_response({
+                'error': f"status must be one of: {', '.join(appointment_repo.statuses)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit, cursor = parse_page_params(request.query_params)
+            page = await appointment_repo.apage_for_doctor(
+                doctor_uid,
+                status=appointment_status,
+                date_from=date_from,
+                date_to=date_to,
+                limit=limit,
+                cursor=cursor
+            )
+            appointments = page.items
+
+            patient_uids = [a['patient_uid'] for a in appointments if 'patient_uid' in a]
+            patients = await patient_repo.aget_many(patient_uids, fields=PATIENT_DETAIL_FIELDS)
+
+            for appointment_data in appointments:
+                patient_data = patients.get(appointment_data.get('patient_uid'))
+
+                if patient_data is not None:
+                    appointment_data['patient_details'] = {
+                        'uid': patient_data.get('uid'),
+                        'name': f"{patient_data.get('first_name', '')} {patient_data.get('last_name', '')}",
+                        'email': patient_data.get('email'),
+                        'phone_number': patient_data.get('phone_number'),
+                        'date_of_birth': patient_data.get('date_of_birth'),
+                        'address': patient_data.get('address'),
+                        'emergency_contact': patient_data.get('emergency_contact')
+                    }
+
+            return json_response({
+                'count': len(appointments),
+                'appointments': appointments,
+                'next_cursor': page.next_cursor
+            }, status=status.HTTP_200_OK)
+
+        except InvalidCursor as e:
+            return json_response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return json_response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
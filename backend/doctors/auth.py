@@ -1,37 +1,129 @@
+import asyncio
 import jwt
 import bcrypt
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from django.conf import settings
 from rest_framework import authentication, exceptions
-from firebase_admin import firestore
-from backend.firebase_init import db
+from backend.concurrency import get_io_executor
+from backend.response_cache import get_response_cache_stats
+from backend.storage import doctor_repo, patient_repo, doctor_replica
+from backend.utils import TTLCache
+from .revocation import token_versions
+from .password_pool import PasswordPool
+from .password_cost import DEFAULT_ROUNDS, hash_cost, load_calibrated_rounds
+
+logger = logging.getLogger(__name__)
+
+
+# Decoded access tokens keyed by the raw token string, and authenticated
+# principals keyed by doctor uid. Both are per-process and bounded; entries
+# for a uid are dropped through invalidate_principal() whenever the doctor
+# document changes.
+_token_cache = TTLCache(
+    maxsize=getattr(settings, 'AUTH_TOKEN_CACHE_SIZE', 4096),
+    ttl=getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 300)
+)
+_principal_cache = TTLCache(
+    maxsize=getattr(settings, 'AUTH_PRINCIPAL_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'AUTH_PRINCIPAL_CACHE_TTL', 60)
+)
+
+# bcrypt runs in a bounded process pool when BCRYPT_POOL_WORKERS > 0.
+# Callers must handle PasswordPoolBusy and answer 503.
+_password_pool = None
+if getattr(settings, 'BCRYPT_POOL_WORKERS', 0) > 0:
+    _password_pool = PasswordPool(
+        workers=settings.BCRYPT_POOL_WORKERS,
+        queue_depth=getattr(settings, 'BCRYPT_POOL_QUEUE_DEPTH', 8),
+        timeout=getattr(settings, 'BCRYPT_POOL_TIMEOUT', 2.0)
+    )
+
+
+# Background writer for rehashing stored passwords after login
+_rehash_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='password-rehash')
+_bcrypt_rounds = None
+
+
+def get_bcrypt_rounds() -> int:
+    """Target bcrypt cost: BCRYPT_ROUNDS if set, else the calibrated cost, else the default"""
+    global _bcrypt_rounds
+    if _bcrypt_rounds is None:
+        _bcrypt_rounds = (
+            getattr(settings, 'BCRYPT_ROUNDS', None)
+            or load_calibrated_rounds(settings.BCRYPT_CALIBRATION_FILE)
+            or DEFAULT_ROUNDS
+        )
+    return _bcrypt_rounds
 
 
 def hash_password(password: str) -> str:
-    """Hash a password using bcrypt"""
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
+    """Hash a password using bcrypt, off the request thread when the pool is enabled"""
+    salt = bcrypt.gensalt(rounds=get_bcrypt_rounds())
+    if _password_pool is not None:
+        hashed = _password_pool.hash(password.encode('utf-8'), salt)
+    else:
+        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
 
 def verify_password(password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
+    """Verify a password against its hash, off the request thread when the pool is enabled"""
+    if _password_pool is not None:
+        return _password_pool.check(password.encode('utf-8'), hashed_password.encode('utf-8'))
     return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
 
 
-def generate_jwt_token(uid: str, email: str) -> dict:
-    """Generate JWT access and refresh tokens"""
-    access_payload = {
+async def averify_password(password: str, hashed_password: str) -> bool:
+    """verify_password() for async views; bcrypt never runs on the event loop"""
+    password, hashed_password = password.encode('utf-8'), hashed_password.encode('utf-8')
+    if _password_pool is not None:
+        return await _password_pool.acheck(password, hashed_password)
+    # bcrypt releases the GIL, so I/O pool threads hash in parallel
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_io_executor(), bcrypt.checkpw, password, hashed_password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True when a stored hash was made with a cost other than the current target"""
+    return hash_cost(hashed_password) != get_bcrypt_rounds()
+
+
+def schedule_password_rehash(role: str, uid: str, password: str) -> None:
+    """Rehash a verified password at the target cost without delaying the response"""
+    repository = patient_repo if role == 'patient' else doctor_repo
+    
+    def rehash():
+        try:
+            hashed = hash_password(password)
+            repository.update(uid, {'password': hashed})
+        except Exception:
+            logger.exception('Password rehash failed for %s %s', role, uid)
+    
+    _rehash_executor.submit(rehash)
+
+
+def generate_jwt_token(uid: str, email: str, role: str = 'doctor', is_active: bool = True) -> dict:
+    """Generate JWT access and refresh tokens carrying role, status and token version claims"""
+    claims = {
         'uid': uid,
         'email': email,
+        'role': role,
+        'active': is_active,
+        'ver': token_versions.current_version(uid)
+    }
+    
+    access_payload = {
+        **claims,
         'exp': datetime.utcnow() + timedelta(hours=1),
         'iat': datetime.utcnow(),
         'type': 'access'
     }
     
     refresh_payload = {
-        'uid': uid,
-        'email': email,
+        **claims,
         'exp': datetime.utcnow() + timedelta(days=7),
         'iat': datetime.utcnow(),
         'type': 'refresh'
@@ -51,11 +143,100 @@ def decode_jwt_token(token: str) -> dict:
     """Decode and verify JWT token"""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        return payload
     except jwt.ExpiredSignatureError:
         raise exceptions.AuthenticationFailed('Token has expired')
     except jwt.InvalidTokenError:
         raise exceptions.AuthenticationFailed('Invalid token')
+    
+    if token_versions.is_revoked(payload.get('uid'), payload.get('ver', 0)):
+        raise exceptions.AuthenticationFailed('Token has been revoked')
+    return payload
+
+
+def decode_access_token(token: str) -> dict:
+    """Decode an access token, reusing the cached payload when possible"""
+    payload = _token_cache.get(token)
+    if payload is not None:
+        if token_versions.is_revoked(payload.get('uid'), payload.get('ver', 0)):
+            raise exceptions.AuthenticationFailed('Token has been revoked')
+        return payload
+
+    payload = decode_jwt_token(token)
+    remaining = payload.get('exp', 0) - time.time()
+    if remaining > 0:
+        _token_cache.set(token, payload, ttl=min(_token_cache.ttl, remaining))
+    return payload
+
+
+def load_principal_data(uid: str, role: str = 'doctor') -> dict:
+    """Fetch the user document behind a token, going through the principal cache"""
+    data = _principal_cache.get(uid)
+    if data is None:
+        if role == 'patient':
+            data = patient_repo.get(uid)
+        else:
+            data = doctor_repo.get(uid, replica=True)
+        
+        if data is None:
+            raise exceptions.AuthenticationFailed('User not found')
+        
+        data.pop('password', None)
+        _principal_cache.set(uid, data)
+    return data
+
+
+def revoke_tokens(uid: str) -> int:
+    """Revoke every token issued so far for uid"""
+    version = token_versions.revoke(uid)
+    invalidate_principal(uid)
+    return version
+
+
+def invalidate_principal(uid: str) -> None:
+    """Drop cached principal and decoded tokens for a user whose document changed"""
+    _principal_cache.pop(uid)
+    _token_cache.discard_where(lambda payload: payload.get('uid') == uid)
+
+
+def warm_up():
+    """Warm-up hook: start the bcrypt worker processes when the pool is enabled"""
+    if _password_pool is not None:
+        _password_pool.warm_up()
+
+
+def get_auth_cache_stats() -> dict:
+    """Hit/miss counters for the token and principal caches, the doctors replica behind them and the response cache"""
+    return {
+        'tokens': _token_cache.stats(),
+        'principals': _principal_cache.stats(),
+        'revocations': token_versions.stats(),
+        'password_pool': _password_pool.stats() if _password_pool is not None else None,
+        'doctor_replica': doctor_replica.stats() if doctor_replica is not None else None,
+        'responses': get_response_cache_stats()
+    }
+
+
+class AuthenticatedUser:
+    """
+    Principal attached to request.user by JWTAuthentication.
+    
+    In stateless mode it is built from token claims alone and the backing
+    document is only fetched if a view actually reads user.data.
+    """
+    is_authenticated = True
+
+    def __init__(self, uid, email, role='doctor', is_active=True, data=None):
+        self.uid = uid
+        self.email = email
+        self.role = role
+        self.is_active = is_active
+        self._data = data
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = load_principal_data(self.uid, self.role)
+        return self._data
 
 
 class JWTAuthentication(authentication.BaseAuthentication):
@@ -71,7 +252,7 @@ class JWTAuthentication(authentication.BaseAuthentication):
             if prefix.lower() != 'bearer':
                 raise exceptions.AuthenticationFailed('Invalid authorization header format')
             
-            payload = decode_jwt_token(token)
+            payload = decode_access_token(token)
             
             if payload.get('type') != 'access':
                 raise exceptions.AuthenticationFailed('Invalid token type')
@@ -80,22 +261,15 @@ class JWTAuthentication(authentication.BaseAuthentication):
             if not uid:
                 raise exceptions.AuthenticationFailed('Invalid token payload')
             
-            doctor_ref = db.collection('doctors').document(uid)
-            doctor_doc = doctor_ref.get()
-            
-            if not doctor_doc.exists:
-                raise exceptions.AuthenticationFailed('User not found')
-            
-            doctor_data = doctor_doc.to_dict()
-            
-            class User:
-                def __init__(self, uid, email, data):
-                    self.uid = uid
-                    self.email = email
-                    self.data = data
-                    self.is_authenticated = True
-            
-            user = User(uid, payload.get('email'), doctor_data)
+            role = payload.get('role')
+            if role and getattr(settings, 'JWT_STATELESS_AUTH', False):
+                user = AuthenticatedUser(uid, payload.get('email'), role, payload.get('active', True))
+            else:
+                role = role or 'doctor'
+                user_data = load_principal_data(uid, role)
+                user = AuthenticatedUser(
+                    uid, payload.get('email'), role, user_data.get('is_active', True), user_data
+                )
             
             return (user, token)
             
@@ -0,0 +1,255 @@
+"""
+Doctors' availability in either slot layout.
+
+settings.SLOT_STORAGE picks the layout schedules are written in:
+'embedded' keeps the time slots inside the doctor's availability array,
+'documents' gives every slot its own document (see SlotRepository), so
+bookings for different slots of one doctor never contend. Reads follow
+each doctor's own layout, so both coexist while `manage.py migrate_slots`
+converts existing doctors. Responses always use the embedded format.
+
+availability_index answers slot checks from per-process bitmaps (see
+doctors/availability_index.py) and is kept current by save_availability
+and the booking paths. save_availability also re-materializes the
+doctor's dated calendar (see doctors/dated_slots.py). slot_search answers
+free-slot searches across doctors (see doctors/slot_search.py).
+"""
+
+from django.conf import settings
+from firebase_admin import firestore
+from backend.conditional import validators
+from backend.storage import doctor_repo, slot_repo, calendar_repo, appointment_repo
+from .availability_index import AvailabilityIndex, same_slot
+from .slot_search import SlotSearchIndex
+from . import dated_slots
+
+# Doctor fields the availability index is built from
+INDEX_FIELDS = ['is_active', 'availability', slot_repo.storage_field]
+
+# ... and the slot search index
+SEARCH_FIELDS = INDEX_FIELDS + ['first_name', 'last_name', 'specialization', calendar_repo.horizon_field]
+
+
+def slot_documents_enabled() -> bool:
+    return getattr(settings, 'SLOT_STORAGE', 'embedded') == slot_repo.documents
+
+
+def with_storage_field(fields):
+    """
+    A doctor projection extended with what expand_availability() needs
+    (the layout marker and uid) when it includes availability
+    """
+    if fields is None or 'availability' not in fields:
+        return fields
+    return list(fields) + [field for field in (slot_repo.storage_field, 'uid') if field not in fields]
+
+
+def get_availability(uid: str, doctor_data: dict, day: str = None) -> list:
+    """The doctor's availability array, optionally only the entry for one day"""
+    days = [d for d in doctor_data.get('availability', []) if day is None or d['day'] == day]
+    if not slot_repo.uses_documents(doctor_data) or not days:
+        return days
+    return slot_repo.merge(days, slot_repo.list_slots(uid, day))
+
+
+async def aget_availability(uid: str, doctor_data: dict, day: str = None) -> list:
+    days = [d for d in doctor_data.get('availability', []) if day is None or d['day'] == day]
+    if not slot_repo.uses_documents(doctor_data) or not days:
+        return days
+    return slot_repo.merge(days, await slot_repo.alist_slots(uid, day))
+
+
+def expand_availability(uid: str, doctor_data: dict) -> dict:
+    """Prepare a doctor document for a response: embedded availability, no layout marker"""
+    if 'availability' in doctor_data:
+        doctor_data['availability'] = get_availability(uid, doctor_data)
+    doctor_data.pop(slot_repo.storage_field, None)
+    return doctor_data
+
+
+async def aexpand_availability(uid: str, doctor_data: dict) -> dict:
+    if 'availability' in doctor_data:
+        doctor_data['availability'] = await aget_availability(uid, doctor_data)
+    doctor_data.pop(slot_repo.storage_field, None)
+    return doctor_data
+
+
+def doctor_validators(doctors, *variant):
+    """
+    backend.conditional validators of a response built from doctor
+    documents, given as (uid, doctor_data, slot_documents) after
+    expand_availability(). Slot documents change without touching the
+    doctor's updated_at, so their expanded availability joins the variant.
+    """
+    stamps = []
+    for uid, doctor_data, slot_documents in doctors:
+        stamps.append((uid, doctor_data.get('updated_at')))
+        if slot_documents and 'availability' in doctor_data:
+            variant += (doctor_data['availability'],)
+    return validators(stamps, *variant)
+
+
+def replicated_validators(uid: str, with_availability: bool, *variant):
+    """
+    doctor_validators() of one doctor from the doctors replica, so a 304
+    needs no read. None when the replica is not serving, the doctor is
+    unknown, or the response carries slot-document availability.
+    """
+    replica = doctor_repo.replica
+    if replica is None or not replica.ready:
+        return None
+    doctor_data = replica.get(uid, fields=['updated_at', slot_repo.storage_field])
+    if doctor_data is None or (with_availability and slot_repo.uses_documents(doctor_data)):
+        return None
+    return doctor_validators([(uid, doctor_data, False)], *variant)
+
+
+def save_availability(uid: str, doctor_data: dict, availability: list, doctor_updates: dict = None) -> None:
+    """
+    Replace a doctor's schedule in the layout selected by SLOT_STORAGE.
+
+    doctor_updates are other doctor fields written in the same batch. A
+    doctor switching layout has the old representation removed atomically.
+    """
+    updates = dict(doctor_updates or {}, updated_at=firestore.SERVER_TIMESTAMP)
+    was_documents = slot_repo.uses_documents(doctor_data)
+    existing_ids = slot_repo.slot_ids(uid) if was_documents or slot_documents_enabled() else []
+
+    if slot_documents_enabled():
+        days, slots = slot_repo.split(availability)
+        updates.update({'availability': days, slot_repo.storage_field: slot_repo.documents})
+    else:
+        slots = {}
+        updates['availability'] = availability
+        if was_documents:
+            updates[slot_repo.storage_field] = 'embedded'
+
+    doctor_repo.store.commit(
+        [('update', doctor_repo.collection, uid, updates)] + slot_repo.replace_writes(uid, slots, existing_ids)
+    )
+    availability_index.update(uid, dict(doctor_data, **updates), availability)
+    through = dated_slots.refresh(uid, doctor_data, availability)
+    slot_search.update(
+        uid, dict(doctor_data, **updates, **{calendar_repo.horizon_field: through.isoformat()}), availability
+    )
+
+
+def indexed_check(uid: str, day: str, week, start_time: str = None, end_time: str = None) -> dict:
+    """
+    CheckDoctorAvailabilityView's answer from the availability index: whether
+    one slot is free when start_time/end_time are given, else the day's free slots
+    """
+    if not week.active:
+        return {'uid': uid, 'day': day, 'is_available': False, 'message': 'Doctor is currently offline'}
+
+    if not availability_index.has_day(week, day):
+        return {'uid': uid, 'day': day, 'is_available': False, 'message': 'No availability set for this day'}
+
+    if start_time:
+        free = availability_index.slot_free(week, day, start_time, end_time)
+        result = {'uid': uid, 'day': day, 'start_time': start_time, 'end_time': end_time, 'is_available': bool(free)}
+        if free is None:
+            result['message'] = 'Requested time slot not found'
+        return result
+
+    return {
+        'uid': uid,
+        'day': day,
+        'is_available': availability_index.day_open(week, day),
+        'time_slots': [
+            {'start_time': start, 'end_time': end, 'is_available': True}
+            for start, end in availability_index.free_slots(week, day)
+        ]
+    }
+
+
+def listed_check(uid: str, day: str, day_availability: dict, start_time: str = None, end_time: str = None,
+                 free_only: bool = False) -> dict:
+    """The same answer from the day's availability entry, for doctors the index cannot hold"""
+    time_slots = day_availability.get('time_slots', [])
+
+    if start_time:
+        slot = next((s for s in time_slots if same_slot(s, start_time, end_time)), None)
+        result = {
+            'uid': uid,
+            'day': day,
+            'start_time': start_time,
+            'end_time': end_time,
+            'is_available': slot is not None and slot.get('is_available', True)
+        }
+        if slot is None:
+            result['message'] = 'Requested time slot not found'
+        return result
+
+    if free_only:
+        time_slots = [s for s in time_slots if s.get('is_available', True)]
+
+    return {
+        'uid': uid,
+        'day': day,
+        'is_available': day_availability.get('is_available', False),
+        'time_slots': time_slots
+    }
+
+
+def dated_check(uid: str, slot_date, instances: dict, start_time: str = None, end_time: str = None,
+                free_only: bool = False) -> dict:
+    """CheckDoctorAvailabilityView's answer for one date of the calendar"""
+    day = dated_slots.weekday(slot_date)
+    if not instances:
+        return {
+            'uid': uid,
+            'date': slot_date.isoformat(),
+            'day': day,
+            'is_available': False,
+            'message': 'No availability set for this date'
+        }
+    day_availability = {'is_available': True, 'time_slots': dated_slots.time_slots(instances.values())}
+    return dict(
+        {'uid': uid, 'date': slot_date.isoformat()},
+        **listed_check(uid, day, day_availability, start_time, end_time, free_only)
+    )
+
+
+def _load_week(uid):
+    doctor_data = doctor_repo.get(uid, fields=INDEX_FIELDS)
+    if doctor_data is None:
+        return None
+    return doctor_data, get_availability(uid, doctor_data)
+
+
+async def _aload_week(uid):
+    doctor_data = await doctor_repo.aget(uid, fields=INDEX_FIELDS)
+    if doctor_data is None:
+        return None
+    return doctor_data, await aget_availability(uid, doctor_data)
+
+
+availability_index = AvailabilityIndex(
+    _load_week,
+    _aload_week,
+    resolution=getattr(settings, 'AVAILABILITY_INDEX_RESOLUTION', 15),
+    maxsize=getattr(settings, 'AVAILABILITY_INDEX_SIZE', 10000),
+    ttl=getattr(settings, 'AVAILABILITY_INDEX_TTL', 30)
+)
+
+
+def _load_search():
+    doctors = [
+        (doc.id, doc.data, get_availability(doc.id, doc.data))
+        for doc in doctor_repo.store.query(doctor_repo.collection, fields=SEARCH_FIELDS)
+    ]
+    dated_bookings = appointment_repo.confirmed_from(
+        dated_slots.today(), fields=['doctor_uid', 'date', 'start_time', 'end_time']
+    )
+    return doctors, dated_bookings
+
+
+def warm_up():
+    slot_search.start()
+
+
+slot_search = SlotSearchIndex(
+    _load_search,
+    refresh_interval=getattr(settings, 'SLOT_SEARCH_REFRESH_SECONDS', 60)
+)
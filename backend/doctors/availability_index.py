@@ -0,0 +1,244 @@
+"""
+In-process bitmap index of doctors' weekly availability.
+
+Each doctor's week is a handful of integers used as bitmaps, one bit per
+`resolution` minutes (bit day * units_per_day + unit): the time offered,
+the time booked or blocked, and where each slot starts, plus 7-bit masks
+of the days listed and of those open for booking. "Is this slot free?" and "which slots are
+free on Monday?" become shifts and masks instead of scans over the
+availability lists, and an entry takes a few hundred bytes where the
+dict-of-lists form takes kilobytes.
+
+Entries are loaded on first use, patched by the writes this process makes
+(schedule changes, bookings and status changes; a cancellation drops the
+entry) and expire after `ttl` seconds so writes from other processes are
+picked up.
+Schedules that do not fit the grid (times off the resolution, overlapping
+slots) are not indexed; get() returns None and callers fall back to the
+availability lists.
+
+Times are compared whatever the padding of their hours ('9:00' is
+'09:00', see normalize_time), as the booking paths compare them, so a slot
+found free here is the one a booking claims.
+"""
+
+import re
+import sys
+import threading
+from backend.utils import TTLCache
+
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+_DAY_INDEX = {day: i for i, day in enumerate(DAYS)}
+
+_UNINDEXABLE = object()
+
+_TIME = re.compile(r'^([0-1]?[0-9]|2[0-3]):([0-5][0-9])$')
+
+
+def normalize_time(value: str) -> str:
+    """'9:00' as '09:00', so times compare as strings; raises ValueError"""
+    match = _TIME.match(value or '')
+    if match is None:
+        raise ValueError('Invalid time format. Use HH:MM (24-hour)')
+    return f'{int(match.group(1)):02d}:{match.group(2)}'
+
+
+def same_slot(slot: dict, start_time: str, end_time: str) -> bool:
+    """True if the slot runs from start_time to end_time, however either pads its hours"""
+    try:
+        return ((normalize_time(slot['start_time']), normalize_time(slot['end_time'])) ==
+                (normalize_time(start_time), normalize_time(end_time)))
+    except ValueError:
+        return False
+
+
+class OffGrid(ValueError):
+    """A time that is not a multiple of the index resolution"""
+
+
+class WeekBitmap:
+    """One doctor's week as bitmaps"""
+
+    __slots__ = ('active', 'days', 'open_days', 'offered', 'starts', 'booked')
+
+    def __init__(self, active: bool, days: int = 0, open_days: int = 0, offered: int = 0, starts: int = 0,
+                 booked: int = 0):
+        self.active = active
+        self.days = days
+        self.open_days = open_days
+        self.offered = offered
+        self.starts = starts
+        self.booked = booked
+
+    def size(self) -> int:
+        """Approximate memory footprint in bytes"""
+        return sys.getsizeof(self) + sum(
+            sys.getsizeof(getattr(self, name)) for name in ('days', 'open_days', 'offered', 'starts', 'booked')
+        )
+
+
+class AvailabilityIndex:
+    """
+    Per-process cache of WeekBitmap by doctor uid.
+
+    load(uid) and the coroutine aload(uid) return (doctor_data,
+    availability) for a doctor, or None when it does not exist.
+    """
+
+    def __init__(self, load, aload, resolution: int = 15, maxsize: int = 10000, ttl: float = 30.0):
+        if (24 * 60) % resolution:
+            raise ValueError('resolution must divide a day into whole units')
+        self.resolution = resolution
+        self.units = 24 * 60 // resolution
+        self._day_mask = (1 << self.units) - 1
+        self._times = [f'{u * resolution // 60:02d}:{u * resolution % 60:02d}' for u in range(self.units + 1)]
+        self._time_units = {value: u for u, value in enumerate(self._times)}
+        self._load = load
+        self._aload = aload
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    # Building
+
+    def unit(self, value: str) -> int:
+        """'HH:MM' as a unit of the day; raises OffGrid"""
+        unit = self._time_units.get(value)
+        if unit is not None:
+            return unit
+        try:
+            hours, minutes = value.split(':')
+            total = int(hours) * 60 + int(minutes)
+        except (AttributeError, ValueError):
+            raise OffGrid(value)
+        if total % self.resolution or not 0 <= total <= 24 * 60:
+            raise OffGrid(value)
+        return total // self.resolution
+
+    def span(self, day: str, start_time: str, end_time: str):
+        """(first bit, mask) of a slot; raises OffGrid or KeyError"""
+        start, end = self.unit(start_time), self.unit(end_time)
+        if end <= start:
+            raise OffGrid(f'{start_time}-{end_time}')
+        base = _DAY_INDEX[day] * self.units
+        return base + start, ((1 << (end - start)) - 1) << (base + start)
+
+    def build(self, doctor_data: dict, availability: list):
+        """A WeekBitmap for the schedule, or None if it does not fit the grid"""
+        week = WeekBitmap(active=doctor_data.get('is_active', True))
+        try:
+            for day_avail in availability:
+                day = day_avail['day']
+                week.days |= 1 << _DAY_INDEX[day]
+                if day_avail.get('is_available', False):
+                    week.open_days |= 1 << _DAY_INDEX[day]
+                for slot in day_avail.get('time_slots', []):
+                    first, mask = self.span(day, slot['start_time'], slot['end_time'])
+                    if week.offered & mask:
+                        return None
+                    week.offered |= mask
+                    week.starts |= 1 << first
+                    if not slot.get('is_available', True):
+                        week.booked |= mask
+        except (KeyError, ValueError):
+            return None
+        return week
+
+    # Lookups
+
+    def get(self, uid: str):
+        """The doctor's WeekBitmap, loading it on a miss; None if missing or unindexable"""
+        week = self._entries.get(uid)
+        if week is None:
+            loaded = self._load(uid)
+            if loaded is None:
+                return None
+            week = self._store(uid, *loaded)
+        return None if week is _UNINDEXABLE else week
+
+    async def aget(self, uid: str):
+        week = self._entries.get(uid)
+        if week is None:
+            loaded = await self._aload(uid)
+            if loaded is None:
+                return None
+            week = self._store(uid, *loaded)
+        return None if week is _UNINDEXABLE else week
+
+    def has_day(self, week: WeekBitmap, day: str) -> bool:
+        """True when the schedule has an entry for day"""
+        return bool(week.days >> _DAY_INDEX[day] & 1)
+
+    def day_open(self, week: WeekBitmap, day: str) -> bool:
+        return bool(week.open_days >> _DAY_INDEX[day] & 1)
+
+    def slot_free(self, week: WeekBitmap, day: str, start_time: str, end_time: str):
+        """True if the slot is free, False if booked or blocked, None if the doctor offers no such slot"""
+        try:
+            first, mask = self.span(day, start_time, end_time)
+        except (KeyError, ValueError):
+            return None
+        end = first + (mask >> first).bit_length()
+        day_end = (_DAY_INDEX[day] + 1) * self.units
+        if (not week.starts >> first & 1 or (week.offered & mask) != mask or
+                week.starts & mask & ~(1 << first)):
+            return None
+        # The slot must end where the offered run ends or the next slot starts
+        if end < day_end and week.offered >> end & 1 and not week.starts >> end & 1:
+            return None
+        return not week.booked & mask
+
+    def free_slots(self, week: WeekBitmap, day: str) -> list:
+        """(start_time, end_time) of every free slot of the day, in order"""
+        base = _DAY_INDEX[day] * self.units
+        offered = week.offered >> base & self._day_mask
+        starts = week.starts >> base & self._day_mask
+        # A slot ends where the next one starts or its offered run ends, and
+        # bookings cover whole slots, so a slot is free iff its first unit is
+        boundaries = starts | (offered << 1 & ~offered)
+        free = starts & ~(week.booked >> base)
+        times = self._times
+        slots = []
+        while free:
+            start = (free & -free).bit_length() - 1
+            free &= free - 1
+            later = boundaries >> (start + 1)
+            slots.append((times[start], times[start + (later & -later).bit_length()]))
+        return slots
+
+    # Incremental updates
+
+    def update(self, uid: str, doctor_data: dict, availability: list) -> None:
+        """Replace the doctor's entry after a schedule change"""
+        self._store(uid, doctor_data, availability)
+
+    def mark_booked(self, uid: str, day: str, start_time: str, end_time: str) -> None:
+        """Record a booking in the doctor's cached entry"""
+        with self._lock:
+            week = self._entries.get(uid)
+            if week is None or week is _UNINDEXABLE:
+                return
+            if self.slot_free(week, day, start_time, end_time) is None:
+                self._entries.pop(uid)
+                return
+            week.booked |= self.span(day, start_time, end_time)[1]
+
+    def set_active(self, uid: str, active: bool) -> None:
+        week = self._entries.get(uid)
+        if week is not None and week is not _UNINDEXABLE:
+            week.active = active
+
+    def discard(self, uid: str) -> None:
+        self._entries.pop(uid)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        weeks = [entry for entry in self._entries.values() if entry is not _UNINDEXABLE]
+        return dict(self._entries.stats(), resolution=self.resolution, bytes=sum(week.size() for week in weeks))
+
+    def _store(self, uid, doctor_data, availability):
+        week = self.build(doctor_data, availability)
+        week = _UNINDEXABLE if week is None else week
+        self._entries.set(uid, week)
+        return week
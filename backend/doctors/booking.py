@@ -0,0 +1,320 @@
+"""
+Booking and cancellation of doctors' time slots.
+
+Both run as one storage transaction: the doctor's availability is read
+inside it and the slot change commits together with the appointment write,
+so two patients can never book the same slot. For doctors on per-slot
+documents (see doctors/availability.py) only the slot document is written.
+A booking for a date claims that date's calendar instance (see
+doctors/dated_slots.py) instead of the weekly slot; a weekday booking holds
+the slot every week, so it also claims each of the slot's materialized
+instances and fails if a date's booking already holds one.
+Shared by the doctor and patient booking views, sync and async.
+"""
+
+import uuid
+from firebase_admin import firestore
+from backend.storage import (
+    doctor_repo,
+    appointment_repo,
+    slot_repo,
+    calendar_repo,
+    run_transaction,
+    arun_transaction,
+    TransactionConflict
+)
+from backend.response_cache import invalidate, ainvalidate
+from .auth import invalidate_principal
+from .availability import availability_index, slot_search
+from .availability_index import same_slot
+from .dated_slots import today, weekly_dates, calendar_until
+
+
+class BookingError(Exception):
+    """A booking or cancellation that cannot go ahead; status_code is the HTTP status to answer with"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _bookable_doctor(doctor_data) -> None:
+    if doctor_data is None:
+        raise BookingError('Doctor not found', 404)
+
+    if not doctor_data.get('is_active', True):
+        raise BookingError('Doctor is currently offline and not accepting appointments')
+
+
+def _bookable_day(doctor_data, day: str) -> dict:
+    _bookable_doctor(doctor_data)
+    day_avail = next((item for item in doctor_data.get('availability', []) if item['day'] == day), None)
+
+    if day_avail is None:
+        raise BookingError(f'Doctor has no availability set for {day}')
+    return day_avail
+
+
+def _claim(slot, booked_by: str, booking_id: str) -> None:
+    if slot is None:
+        raise BookingError('Requested time slot not found', 404)
+
+    if not slot.get('is_available', True):
+        raise BookingError('This time slot is already booked')
+
+    slot['is_available'] = False
+    slot['booked_by'] = booked_by
+    slot['booking_id'] = booking_id
+
+
+def _free(slot) -> None:
+    slot['is_available'] = True
+    slot.pop('booked_by', None)
+    slot.pop('booking_id', None)
+
+
+def reserve_slot(doctor_data, day: str, start_time: str, end_time: str, booked_by: str, booking_id: str) -> list:
+    """Doctor's embedded availability with the requested slot marked as booked; raises BookingError"""
+    day_avail = _bookable_day(doctor_data, day)
+    slot = next((s for s in day_avail.get('time_slots', []) if same_slot(s, start_time, end_time)), None)
+    _claim(slot, booked_by, booking_id)
+    return doctor_data['availability']
+
+
+def release_slot(doctor_data, appointment_data: dict, booking_id: str) -> list:
+    """Doctor's embedded availability with the appointment's slot free again"""
+    availability = doctor_data.get('availability', [])
+
+    for day_avail in availability:
+        if day_avail['day'] == appointment_data['day']:
+            for slot in day_avail.get('time_slots', []):
+                if (slot.get('booking_id') == booking_id and
+                    same_slot(slot, appointment_data['start_time'], appointment_data['end_time'])):
+                    _free(slot)
+                    break
+
+    return availability
+
+
+def _weekly_instances(transaction, doctor_uid, doctor_data, day: str, start_time: str, end_time: str) -> dict:
+    """{instance_id: instance} of a weekly slot's materialized dates from today on, read through the transaction"""
+    until = calendar_until(doctor_data) if doctor_data is not None else None
+    if until is None:
+        return {}
+    instance_ids = [
+        calendar_repo.instance_id(slot_date.isoformat(), start_time, end_time)
+        for slot_date in weekly_dates(day, today(), until)
+    ]
+    return transaction.get_many(calendar_repo.collection_for(doctor_uid), instance_ids)
+
+
+def _hold_instances(transaction, doctor_uid, instances: dict, booked_by: str, booking_id: str) -> None:
+    calendar = calendar_repo.collection_for(doctor_uid)
+    for instance_id, instance in instances.items():
+        if not instance.get('is_available', True):
+            raise BookingError(f"This time slot is already booked on {instance['date']}")
+        _claim(instance, booked_by, booking_id)
+        transaction.set(calendar, instance_id, instance)
+
+
+def _release_instances(transaction, doctor_uid, instances: dict, booking_id: str) -> None:
+    calendar = calendar_repo.collection_for(doctor_uid)
+    for instance_id, instance in instances.items():
+        if instance.get('booking_id') != booking_id:
+            continue
+        # A slot dropped from the doctor's schedule while booked goes away with the booking
+        if instance.get('retired'):
+            transaction.delete(calendar, instance_id)
+        else:
+            _free(instance)
+            transaction.set(calendar, instance_id, instance)
+
+
+def _booking_transaction(doctor_uid, day, start_time, end_time, booked_by, build_appointment, slot_date):
+    booking_id = str(uuid.uuid4())
+
+    def book(transaction):
+        doctor_data = transaction.get(doctor_repo.collection, doctor_uid)
+        embedded = slot_date is None and (doctor_data is None or not slot_repo.uses_documents(doctor_data))
+
+        if slot_date is not None:
+            _bookable_doctor(doctor_data)
+            calendar = calendar_repo.collection_for(doctor_uid)
+            instance_id = calendar_repo.instance_id(slot_date.isoformat(), start_time, end_time)
+            instance = transaction.get(calendar, instance_id)
+            _claim(instance, booked_by, booking_id)
+            transaction.set(calendar, instance_id, instance)
+        elif embedded:
+            instances = _weekly_instances(transaction, doctor_uid, doctor_data, day, start_time, end_time)
+            availability = reserve_slot(doctor_data, day, start_time, end_time, booked_by, booking_id)
+            _hold_instances(transaction, doctor_uid, instances, booked_by, booking_id)
+            transaction.update(doctor_repo.collection, doctor_uid, {
+                'availability': availability,
+                'updated_at': firestore.SERVER_TIMESTAMP
+            })
+        else:
+            _bookable_day(doctor_data, day)
+            instances = _weekly_instances(transaction, doctor_uid, doctor_data, day, start_time, end_time)
+            slots = slot_repo.collection_for(doctor_uid)
+            slot_id = slot_repo.slot_id(day, start_time, end_time)
+            slot = transaction.get(slots, slot_id)
+            _claim(slot, booked_by, booking_id)
+            _hold_instances(transaction, doctor_uid, instances, booked_by, booking_id)
+            transaction.set(slots, slot_id, slot)
+
+        appointment_data = build_appointment(doctor_data, booking_id)
+        if slot_date is not None:
+            appointment_data['date'] = slot_date.isoformat()
+        transaction.create(appointment_repo.collection, booking_id, appointment_data)
+        return appointment_data, embedded
+
+    return book
+
+
+def _release_weekly_slot(transaction, appointment_data, booking_id) -> bool:
+    """Free a weekday booking's slot and the dates it holds; True when that wrote the doctor document"""
+    doctor_uid = appointment_data['doctor_uid']
+    doctor_data = transaction.get(doctor_repo.collection, doctor_uid)
+
+    if doctor_data is None:
+        return False
+
+    instances = _weekly_instances(transaction, doctor_uid, doctor_data, appointment_data['day'],
+                                  appointment_data['start_time'], appointment_data['end_time'])
+
+    if slot_repo.uses_documents(doctor_data):
+        slots = slot_repo.collection_for(doctor_uid)
+        slot_id = slot_repo.slot_id(appointment_data['day'], appointment_data['start_time'],
+                                    appointment_data['end_time'])
+        slot = transaction.get(slots, slot_id)
+        _release_instances(transaction, doctor_uid, instances, booking_id)
+        if slot is not None and slot.get('booking_id') == booking_id:
+            _free(slot)
+            transaction.set(slots, slot_id, slot)
+        return False
+
+    _release_instances(transaction, doctor_uid, instances, booking_id)
+
+    transaction.update(doctor_repo.collection, doctor_uid, {
+        'availability': release_slot(doctor_data, appointment_data, booking_id),
+        'updated_at': firestore.SERVER_TIMESTAMP
+    })
+    return True
+
+
+def _release_dated_slot(transaction, appointment_data, booking_id) -> None:
+    doctor_uid = appointment_data['doctor_uid']
+    instance_id = calendar_repo.instance_id(appointment_data['date'], appointment_data['start_time'],
+                                            appointment_data['end_time'])
+    instances = transaction.get_many(calendar_repo.collection_for(doctor_uid), [instance_id])
+    _release_instances(transaction, doctor_uid, instances, booking_id)
+
+
+def _cancellation_transaction(booking_id, patient_uid):
+    def cancel(transaction):
+        appointment_data = transaction.get(appointment_repo.collection, booking_id)
+
+        if appointment_data is None:
+            raise BookingError('Appointment not found', 404)
+
+        if patient_uid is not None and appointment_data.get('patient_uid') != patient_uid:
+            raise BookingError('Unauthorized to cancel this appointment', 403)
+
+        doctor_written = False
+        if appointment_data.get('date'):
+            _release_dated_slot(transaction, appointment_data, booking_id)
+        else:
+            doctor_written = _release_weekly_slot(transaction, appointment_data, booking_id)
+
+        transaction.update(appointment_repo.collection, booking_id, {
+            'status': 'cancelled',
+            'cancelled_at': firestore.SERVER_TIMESTAMP
+        })
+        return appointment_data, doctor_written
+
+    return cancel
+
+
+def _check_date(slot_date):
+    if slot_date is not None and slot_date < today():
+        raise BookingError('Cannot book a date in the past')
+
+
+def _booked(doctor_uid, day, start_time, end_time, slot_date, doctor_written):
+    if slot_date is None:
+        availability_index.mark_booked(doctor_uid, day, start_time, end_time)
+    slot_search.mark_booked(doctor_uid, day, start_time, end_time, slot_date)
+    if doctor_written:
+        invalidate_principal(doctor_uid)
+
+
+def _changed_tags(appointment_data) -> list:
+    """Response cache tags of what booking or cancelling the appointment changed"""
+    doctor_uid = appointment_data['doctor_uid']
+    tags = [f'doctor:{doctor_uid}', 'doctors:availability', f'appointments:doctor:{doctor_uid}']
+    if appointment_data.get('patient_uid'):
+        tags.append(f"appointments:patient:{appointment_data['patient_uid']}")
+    return tags
+
+
+def book_slot(doctor_uid: str, day: str, start_time: str, end_time: str, booked_by: str, build_appointment,
+              slot_date=None) -> dict:
+    """
+    Book a slot and create its appointment atomically.
+
+    build_appointment(doctor_data, booking_id) returns the appointment
+    document. With slot_date the slot of that date is booked and the
+    appointment records it. Returns the appointment; raises BookingError
+    when the slot cannot be booked, including after losing every retry to
+    contention.
+    """
+    _check_date(slot_date)
+    try:
+        appointment_data, doctor_written = run_transaction(
+            _booking_transaction(doctor_uid, day, start_time, end_time, booked_by, build_appointment, slot_date)
+        )
+    except TransactionConflict:
+        raise BookingError('The doctor is taking many bookings right now, please retry', 409)
+
+    _booked(doctor_uid, day, start_time, end_time, slot_date, doctor_written)
+    invalidate(*_changed_tags(appointment_data))
+    return appointment_data
+
+
+async def abook_slot(doctor_uid: str, day: str, start_time: str, end_time: str, booked_by: str,
+                     build_appointment, slot_date=None) -> dict:
+    _check_date(slot_date)
+    try:
+        appointment_data, doctor_written = await arun_transaction(
+            _booking_transaction(doctor_uid, day, start_time, end_time, booked_by, build_appointment, slot_date)
+        )
+    except TransactionConflict:
+        raise BookingError('The doctor is taking many bookings right now, please retry', 409)
+
+    _booked(doctor_uid, day, start_time, end_time, slot_date, doctor_written)
+    await ainvalidate(*_changed_tags(appointment_data))
+    return appointment_data
+
+
+def cancel_booking(booking_id: str, patient_uid: str = None) -> None:
+    """
+    Free the slot and mark the appointment cancelled atomically.
+
+    With patient_uid, only that patient's appointment may be cancelled.
+    """
+    try:
+        appointment_data, doctor_written = run_transaction(_cancellation_transaction(booking_id, patient_uid))
+    except TransactionConflict:
+        raise BookingError('The appointment is being changed, please retry', 409)
+
+    # The slot is only freed if it still referenced this booking, so reload
+    # the doctor's index entry rather than patching it
+    doctor_uid = appointment_data['doctor_uid']
+    if not appointment_data.get('date'):
+        availability_index.discard(doctor_uid)
+    if appointment_data.get('status') == 'confirmed':
+        slot_search.mark_free(doctor_uid, appointment_data['day'], appointment_data['start_time'],
+                              appointment_data['end_time'], appointment_data.get('date'))
+    if doctor_written:
+        invalidate_principal(doctor_uid)
+    invalidate(*_changed_tags(appointment_data))
@@ -0,0 +1,179 @@
+"""
+Dated calendar of doctors' slots.
+
+A doctor's availability is a weekly template keyed by day name. The
+calendar expands it into one document per dated slot under
+doctors/{uid}/calendar (see CalendarRepository) from today through
+CALENDAR_HORIZON_DAYS ahead, so booking a slot holds one Monday rather
+than every Monday. The doctor document's calendar_until is the last date
+materialized.
+
+A weekday booking holds its slot every week: it claims the slot's
+materialized instances when made, and expand() carries it into the dates
+materialized later, so a date's slot is never booked both ways.
+
+Dates are materialized in one transaction per WINDOW_DAYS that reads the
+instances it rewrites, so a booked instance is never overwritten; one the
+template no longer offers is marked retired and deleted when cancelled.
+Schedule changes re-materialize the unbooked future instances at once;
+`manage.py extend_calendar`, run nightly, extends every doctor's horizon
+and deletes past instances in batched writes.
+"""
+
+from datetime import date, timedelta
+from django.conf import settings
+from django.utils import timezone
+from backend.storage import doctor_repo, calendar_repo, run_transaction
+from .availability_index import DAYS
+
+# Dates per materializing transaction, keeping each well under Firestore's 500 writes
+WINDOW_DAYS = 7
+
+
+def today() -> date:
+    return timezone.localdate()
+
+
+def horizon_days() -> int:
+    return getattr(settings, 'CALENDAR_HORIZON_DAYS', 28)
+
+
+def horizon_end(start: date = None) -> date:
+    """Last date of the rolling horizon that starts today"""
+    return (start or today()) + timedelta(days=horizon_days() - 1)
+
+
+def weekday(slot_date: date) -> str:
+    return DAYS[slot_date.weekday()]
+
+
+def weekly_dates(day: str, date_from: date, date_to: date) -> list:
+    """The dates falling on day in the inclusive range"""
+    first = date_from + timedelta(days=(DAYS.index(day) - date_from.weekday()) % 7)
+    return [first + timedelta(days=weeks * 7) for weeks in range((date_to - first).days // 7 + 1)]
+
+
+def expand(availability: list, date_from: date, date_to: date) -> dict:
+    """{instance_id: instance} of the weekly template over the inclusive date range"""
+    template = {day_avail['day']: day_avail for day_avail in availability if day_avail.get('is_available', False)}
+    instances = {}
+    slot_date = date_from
+    while slot_date <= date_to:
+        iso_date = slot_date.isoformat()
+        for slot in template.get(weekday(slot_date), {}).get('time_slots', []):
+            instance_id = calendar_repo.instance_id(iso_date, slot['start_time'], slot['end_time'])
+            instance = {
+                'date': iso_date,
+                'day': weekday(slot_date),
+                'start_time': slot['start_time'],
+                'end_time': slot['end_time'],
+                # Slots the doctor blocked stay blocked and weekday bookings hold every date
+                'is_available': slot.get('is_available', True)
+            }
+            if slot.get('booking_id'):
+                instance.update({k: slot[k] for k in ('booked_by', 'booking_id') if k in slot}, is_available=False)
+            instances[instance_id] = instance
+        slot_date += timedelta(days=1)
+    return instances
+
+
+def time_slots(instances) -> list:
+    """Instances as the time_slots entries of an availability day"""
+    return [
+        {k: v for k, v in instance.items() if k not in ('date', 'day', 'retired')}
+        for instance in instances
+    ]
+
+
+def list_calendar(doctor_uid: str, date_from: date, date_to: date) -> list:
+    """[{date, day, time_slots}] for the dates in the range that have slots"""
+    by_date = {}
+    for instance in calendar_repo.list_range(doctor_uid, date_from, date_to).values():
+        by_date.setdefault(instance['date'], []).append(instance)
+    return [
+        {'date': iso_date, 'day': instances[0]['day'], 'time_slots': time_slots(instances)}
+        for iso_date, instances in by_date.items()
+    ]
+
+
+def _window_transaction(doctor_uid, instances, date_from, date_to, calendar_until=None):
+    collection = calendar_repo.collection_for(doctor_uid)
+    existing_ids = list(calendar_repo.list_range(doctor_uid, date_from, date_to, fields=[]))
+
+    def materialize(transaction):
+        current = transaction.get_many(collection, list(instances) + existing_ids)
+        writes = 0
+        for instance_id, instance in instances.items():
+            existing = current.get(instance_id)
+            if existing is None or (not existing.get('booking_id') and existing != instance):
+                transaction.set(collection, instance_id, instance)
+                writes += 1
+            elif existing.get('retired'):
+                transaction.set(collection, instance_id, {k: v for k, v in existing.items() if k != 'retired'})
+                writes += 1
+        for instance_id, existing in current.items():
+            if instance_id in instances:
+                continue
+            if not existing.get('booking_id'):
+                transaction.delete(collection, instance_id)
+                writes += 1
+            elif not existing.get('retired'):
+                transaction.set(collection, instance_id, dict(existing, retired=True))
+                writes += 1
+        if calendar_until is not None:
+            transaction.update(doctor_repo.collection, doctor_uid, {calendar_repo.horizon_field: calendar_until})
+        return writes
+
+    return materialize
+
+
+def materialize(doctor_uid: str, availability: list, date_from: date, date_to: date) -> int:
+    """
+    Make the unbooked instances of the inclusive date range match the weekly
+    template and record date_to as calendar_until. Returns the number of
+    instances written or deleted.
+    """
+    writes = 0
+    window_start = date_from
+    while window_start <= date_to:
+        window_end = min(window_start + timedelta(days=WINDOW_DAYS - 1), date_to)
+        writes += run_transaction(_window_transaction(
+            doctor_uid,
+            expand(availability, window_start, window_end),
+            window_start,
+            window_end,
+            calendar_until=date_to.isoformat() if window_end == date_to else None
+        ))
+        window_start = window_end + timedelta(days=1)
+    return writes
+
+
+def calendar_until(doctor_data: dict):
+    value = doctor_data.get(calendar_repo.horizon_field)
+    return date.fromisoformat(value) if value else None
+
+
+def extend(doctor_uid: str, doctor_data: dict, availability: list, through: date = None) -> int:
+    """Materialize the dates after the doctor's calendar_until through the horizon"""
+    through = through or horizon_end()
+    until = calendar_until(doctor_data)
+    start = today() if until is None else max(today(), until + timedelta(days=1))
+    if start > through:
+        return 0
+    return materialize(doctor_uid, availability, start, through)
+
+
+def refresh(doctor_uid: str, doctor_data: dict, availability: list) -> date:
+    """Re-materialize from today after the doctor's weekly template changed; returns the new calendar_until"""
+    through = max(horizon_end(), calendar_until(doctor_data) or today())
+    materialize(doctor_uid, availability, today(), through)
+    return through
+
+
+def expire_writes(doctor_uid: str, before: date = None) -> list:
+    """commit() writes deleting the doctor's instances dated before today"""
+    collection = calendar_repo.collection_for(doctor_uid)
+    return [
+        ('delete', collection, instance_id, None)
+        for instance_id in calendar_repo.ids_before(doctor_uid, before or today())
+    ]
@@ -0,0 +1,508 @@
+"""
+In-process inverted index of doctors for search-as-you-type.
+
+Names, specializations and bios are split into lowercase terms. Each term
+maps to the doctors it appears for, grouped by field weight (name over
+specialization over bio). A query term matches:
+    - the same term (best),
+    - any term it is a prefix of, via bisect over the sorted vocabulary,
+    - from FUZZY_MIN_LENGTH letters, any term one typo away (insertion,
+      deletion, substitution or transposition), found through the
+      terms' single-deletion variants.
+Every query term must match. Matches are kept as sets of uids per score,
+so intersecting terms, filtering and facet counts per specialization are
+set operations rather than loops over doctors, and results are ranked by
+score, then by name. Responses are cached until the index next changes,
+so the short prefixes typed first, which match most doctors, are computed
+once per change rather than once per keystroke.
+
+The index is loaded once per process, patched by registrations, profile
+edits and status changes made in this process, and rebuilt every
+refresh_interval seconds by a daemon thread to pick up other processes'
+writes. Writers build a new snapshot and swap it in, so a query works on
+one consistent snapshot and never takes the lock.
+"""
+
+import bisect
+import copy
+import heapq
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from django.conf import settings
+from backend.storage import doctor_repo
+from backend.utils import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Doctor fields held by the index and returned in results (bio is only searched)
+RESULT_FIELDS = [
+    'uid', 'first_name', 'last_name', 'specialization', 'years_of_experience',
+    'profile_picture', 'is_verified', 'is_active'
+]
+SEARCH_FIELDS = RESULT_FIELDS + ['bio']
+
+# Field weights and match qualities multiplied into a term's score
+FIELD_WEIGHTS = {'name': 3, 'specialization': 2, 'bio': 1}
+EXACT, PREFIX, FUZZY = 3, 2, 1
+
+# Shortest query term matched with a typo
+FUZZY_MIN_LENGTH = 4
+
+# Prefixes expanding to more terms than this keep their merged postings
+PREFIX_CACHE_TERMS = 32
+
+_TERM = re.compile(r'[^\W_]+')
+
+
+def terms(text) -> list:
+    return _TERM.findall((text or '').lower())
+
+
+def _deletions(term: str) -> set:
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def _one_typo(a: str, b: str) -> bool:
+    """True when a and b are exactly one insertion, deletion, substitution or transposition apart"""
+    if a == b or abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) < len(b):
+        return a[i:] == b[i + 1:]
+    return a[i + 1:] == b[i + 1:] or (a[i + 1:i + 2] == b[i:i + 1] and a[i:i + 1] == b[i + 1:i + 2]
+                                      and a[i + 2:] == b[i + 2:])
+
+
+def _entry(uid, doctor_data):
+    """(result fields, {term: field weight}) of a doctor"""
+    doctor = {field: doctor_data.get(field) for field in RESULT_FIELDS}
+    doctor.update(
+        uid=uid,
+        first_name=doctor['first_name'] or '',
+        last_name=doctor['last_name'] or '',
+        specialization=(doctor['specialization'] or '').strip(),
+        is_active=doctor_data.get('is_active', True)
+    )
+    weights = {}
+    fields = {
+        'name': f"{doctor['first_name']} {doctor['last_name']}",
+        'specialization': doctor['specialization'],
+        'bio': doctor_data.get('bio', '')
+    }
+    for field, text in fields.items():
+        for term in terms(text):
+            weights[term] = max(weights.get(term, 0), FIELD_WEIGHTS[field])
+    return doctor, weights
+
+
+def _name_key(doctor: dict):
+    return doctor['last_name'].lower(), doctor['first_name'].lower(), doctor['uid']
+
+
+def _without(mapping: dict, key, item) -> None:
+    remaining = mapping[key] - {item}
+    if remaining:
+        mapping[key] = remaining
+    else:
+        del mapping[key]
+
+
+_SHARED = ('doctors', 'doctor_terms', 'postings', 'vocabulary', 'variants', 'specializations')
+
+
+class _Snapshot:
+    """Everything one query reads; replaced whole on every change"""
+
+    __slots__ = _SHARED + ('generation', 'active', '_shared', '_listing', '_rank', '_facets', '_prefixes')
+
+    def __init__(self):
+        self.generation = 0
+        self.doctors = {}
+        self.doctor_terms = {}
+        # term -> {field weight: uids}
+        self.postings = {}
+        self.vocabulary = []
+        # single-deletion variant -> terms
+        self.variants = {}
+        # specialization as written -> uids
+        self.specializations = {}
+        self.active = frozenset()
+        self._shared = set()
+        self._listing = None
+        self._rank = None
+        self._facets = {}
+        self._prefixes = {}
+
+    def copy(self):
+        """A snapshot sharing this one's containers until it writes to them, and its name order"""
+        snapshot = _Snapshot()
+        for name in _SHARED:
+            setattr(snapshot, name, getattr(self, name))
+        snapshot._shared = set(_SHARED)
+        snapshot.active = self.active
+        snapshot._listing, snapshot._rank = self._listing, self._rank
+        snapshot._prefixes = dict(self._prefixes)
+        return snapshot
+
+    def forget_order(self):
+        self._listing = self._rank = None
+
+    def listing(self) -> list:
+        """Every uid ordered by last name, first name"""
+        if self._listing is None:
+            doctors = self.doctors
+            listing = sorted(doctors, key=lambda uid: _name_key(doctors[uid]))
+            self._rank = {uid: i for i, uid in enumerate(listing)}
+            self._listing = listing
+        return self._listing
+
+    def facets(self, matched=None, active_only=False) -> dict:
+        """{specialization: doctors} among matched, or among all (active) doctors"""
+        if matched is None and active_only in self._facets:
+            return self._facets[active_only]
+        counts = {}
+        for name, uids in self.specializations.items():
+            if matched is not None:
+                count = len(matched & uids)
+            else:
+                count = len(self.active & uids) if active_only else len(uids)
+            if count:
+                counts[name] = count
+        counts = dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+        if matched is None:
+            self._facets[active_only] = counts
+        return counts
+
+    def first_by_name(self, uids, limit: int) -> list:
+        """The first limit of uids in name order"""
+        listing = self.listing()
+        if len(uids) * 64 < len(listing):
+            return heapq.nsmallest(limit, uids, key=self._rank.__getitem__)
+        ranked = []
+        for uid in listing:
+            if uid in uids:
+                ranked.append(uid)
+                if len(ranked) == limit:
+                    break
+        return ranked
+
+    @classmethod
+    def build(cls, items):
+        """A snapshot of every (uid, doctor_data), grown in mutable sets and frozen at the end"""
+        snapshot = cls()
+        postings, variants, specializations, active = {}, {}, {}, set()
+        for uid, doctor_data in items:
+            doctor, weights = _entry(uid, doctor_data)
+            snapshot.doctors[uid] = doctor
+            snapshot.doctor_terms[uid] = tuple(weights)
+            if doctor['specialization']:
+                specializations.setdefault(doctor['specialization'], set()).add(uid)
+            if doctor['is_active']:
+                active.add(uid)
+            for term, weight in weights.items():
+                if term not in postings:
+                    postings[term] = {}
+                    for variant in _deletions(term):
+                        variants.setdefault(variant, set()).add(term)
+                postings[term].setdefault(weight, set()).add(uid)
+        snapshot.postings = {
+            term: {weight: frozenset(uids) for weight, uids in by_weight.items()}
+            for term, by_weight in postings.items()
+        }
+        snapshot.vocabulary = sorted(postings)
+        snapshot.variants = {variant: frozenset(found) for variant, found in variants.items()}
+        snapshot.specializations = {name: frozenset(uids) for name, uids in specializations.items()}
+        snapshot.active = frozenset(active)
+        return snapshot
+
+    def add(self, uid, doctor_data):
+        doctor, weights = _entry(uid, doctor_data)
+        self._writable('doctors')[uid] = doctor
+        self._writable('doctor_terms')[uid] = tuple(weights)
+        if doctor['specialization']:
+            specializations = self._writable('specializations')
+            specializations[doctor['specialization']] = (
+                specializations.get(doctor['specialization'], frozenset()) | {uid}
+            )
+        if doctor['is_active']:
+            self.active = self.active | {uid}
+        self._forget_prefixes(weights)
+        postings = self._writable('postings')
+        for term, weight in weights.items():
+            by_weight = postings.get(term)
+            if by_weight is None:
+                by_weight = {}
+                bisect.insort(self._writable('vocabulary'), term)
+                variants = self._writable('variants')
+                for variant in _deletions(term):
+                    variants[variant] = variants.get(variant, frozenset()) | {term}
+            postings[term] = {**by_weight, weight: by_weight.get(weight, frozenset()) | {uid}}
+
+    def remove(self, uid):
+        if uid not in self.doctors:
+            return
+        doctor = self._writable('doctors').pop(uid)
+        if doctor['specialization']:
+            _without(self._writable('specializations'), doctor['specialization'], uid)
+        self.active = self.active - {uid}
+        doctor_terms = self._writable('doctor_terms').pop(uid)
+        self._forget_prefixes(doctor_terms)
+        postings = self._writable('postings')
+        for term in doctor_terms:
+            by_weight = {weight: uids - {uid} for weight, uids in postings[term].items() if uids - {uid}}
+            if by_weight:
+                postings[term] = by_weight
+                continue
+            del postings[term]
+            vocabulary = self._writable('vocabulary')
+            vocabulary.pop(bisect.bisect_left(vocabulary, term))
+            variants = self._writable('variants')
+            for variant in _deletions(term):
+                _without(variants, variant, term)
+
+    def _writable(self, name):
+        # Containers shared with the snapshot this one was copied from are copied on first write
+        if name in self._shared:
+            self._shared.discard(name)
+            setattr(self, name, copy.copy(getattr(self, name)))
+        return getattr(self, name)
+
+    def _forget_prefixes(self, changed_terms):
+        self._prefixes = {
+            prefix: merged for prefix, merged in self._prefixes.items()
+            if not any(term.startswith(prefix) for term in changed_terms)
+        }
+
+    def prefixed(self, prefix: str) -> dict:
+        """{field weight: uids} of the terms longer than prefix that start with it"""
+        cached = self._prefixes.get(prefix)
+        if cached is not None:
+            return cached
+        vocabulary = self.vocabulary
+        merged = {}
+        i = bisect.bisect_right(vocabulary, prefix)
+        start = i
+        while i < len(vocabulary) and vocabulary[i].startswith(prefix):
+            for weight, uids in self.postings[vocabulary[i]].items():
+                merged.setdefault(weight, set()).update(uids)
+            i += 1
+        merged = {weight: frozenset(uids) for weight, uids in merged.items()}
+        # Short prefixes expand to many terms; keep their merge for this snapshot
+        if i - start > PREFIX_CACHE_TERMS:
+            self._prefixes[prefix] = merged
+        return merged
+
+    def candidates(self, term):
+        """(score, uids) pairs a query term matches, best first"""
+        scored = [(weight * EXACT, uids) for weight, uids in self.postings.get(term, {}).items()]
+        scored += [(weight * PREFIX, uids) for weight, uids in self.prefixed(term).items()]
+        if len(term) >= FUZZY_MIN_LENGTH:
+            fuzzy = set()
+            for variant in _deletions(term) | {term}:
+                fuzzy.update(
+                    candidate for candidate in self.variants.get(variant, ())
+                    if not candidate.startswith(term) and _one_typo(term, candidate)
+                )
+            scored += [(weight * FUZZY, uids) for candidate in fuzzy
+                       for weight, uids in self.postings[candidate].items()]
+        return sorted(scored, key=lambda item: item[0], reverse=True)
+
+    def match(self, query_terms) -> dict:
+        """{score: uids} of the doctors matching every query term"""
+        buckets = None
+        for term in query_terms:
+            # A doctor scores the best of the candidates it matches
+            term_buckets, seen = {}, set()
+            for score, uids in self.candidates(term):
+                fresh = uids - seen
+                if fresh:
+                    seen |= fresh
+                    term_buckets.setdefault(score, set()).update(fresh)
+            if buckets is None:
+                buckets = term_buckets
+            else:
+                combined = {}
+                for score, uids in buckets.items():
+                    for term_score, term_uids in term_buckets.items():
+                        both = uids & term_uids
+                        if both:
+                            combined.setdefault(score + term_score, set()).update(both)
+                buckets = combined
+            if not buckets:
+                break
+        return buckets
+
+
+class DoctorSearchIndex:
+    """
+    load() returns (uid, doctor_data) for every doctor, with at least
+    SEARCH_FIELDS.
+    """
+
+    def __init__(self, load, refresh_interval: float = 300.0, cache_size: int = 1024):
+        self._load = load
+        self.refresh_interval = refresh_interval
+        self._snapshot = _Snapshot()
+        # Responses of the current snapshot, keyed with its generation
+        self._results = TTLCache(maxsize=cache_size, ttl=refresh_interval)
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._pid = None
+        self._thread = None
+
+    def search(self, query: str = '', specialization: str = None, active_only: bool = False,
+               limit: int = 20) -> dict:
+        """
+        {'count', 'doctors', 'facets'}: the best limit matches of the query,
+        optionally of one specialization, with the number of matches per
+        specialization. Facets ignore the specialization filter so other
+        choices keep their counts. An empty query lists doctors by name.
+        """
+        self._ensure_running()
+        snapshot = self._snapshot
+        query_terms = terms(query)
+        key = (snapshot.generation, tuple(query_terms), (specialization or '').strip().lower(), active_only, limit)
+        cached = self._results.get(key)
+        if cached is not None:
+            return dict(cached)
+
+        if query_terms:
+            buckets = snapshot.match(query_terms)
+            if active_only:
+                buckets = {score: uids & snapshot.active for score, uids in buckets.items()}
+            matched = set().union(*buckets.values())
+            facets = snapshot.facets(matched)
+        else:
+            buckets = None
+            matched = snapshot.active if active_only else snapshot.doctors.keys()
+            facets = snapshot.facets(active_only=active_only)
+
+        if specialization:
+            wanted = specialization.strip().lower()
+            wanted_uids = frozenset().union(
+                *(uids for name, uids in snapshot.specializations.items() if name.lower() == wanted)
+            )
+            matched = matched & wanted_uids
+            if buckets is not None:
+                buckets = {score: uids & wanted_uids for score, uids in buckets.items()}
+
+        if buckets is None:
+            ranked = snapshot.first_by_name(matched, limit)
+        else:
+            ranked = []
+            for score in sorted(buckets, reverse=True):
+                if len(ranked) == limit:
+                    break
+                if buckets[score]:
+                    ranked += snapshot.first_by_name(buckets[score], limit - len(ranked))
+
+        result = {
+            'count': len(matched),
+            'doctors': [snapshot.doctors[uid] for uid in ranked],
+            'facets': {'specialization': facets}
+        }
+        self._results.set(key, result)
+        return dict(result)
+
+    # Incremental updates
+
+    def update(self, uid: str, doctor_data: dict) -> None:
+        """Index a registered doctor or re-index one whose profile changed"""
+        if not self._loaded:
+            return
+        with self._lock:
+            snapshot = self._snapshot.copy()
+            old = snapshot.doctors.get(uid)
+            snapshot.remove(uid)
+            snapshot.add(uid, doctor_data)
+            if old is None or _name_key(old) != _name_key(snapshot.doctors[uid]):
+                snapshot.forget_order()
+            self._swap(snapshot)
+
+    def set_active(self, uid: str, active: bool) -> None:
+        with self._lock:
+            doctor = self._snapshot.doctors.get(uid)
+            if doctor is None:
+                return
+            snapshot = self._snapshot.copy()
+            snapshot._writable('doctors')[uid] = dict(doctor, is_active=active)
+            snapshot.active = snapshot.active | {uid} if active else snapshot.active - {uid}
+            self._swap(snapshot)
+
+    # Loading
+
+    def start(self) -> None:
+        """Load the index and start the refresh thread for this process"""
+        self._ensure_running()
+
+    def refresh(self) -> int:
+        """Rebuild the whole index from the store; returns the number of doctors"""
+        snapshot = _Snapshot.build(self._load())
+        snapshot.listing()
+        with self._lock:
+            self._swap(snapshot)
+            self._loaded_at = datetime.now(timezone.utc)
+        return len(snapshot.doctors)
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            'doctors': len(snapshot.doctors),
+            'terms': len(snapshot.vocabulary),
+            'cache': self._results.stats(),
+            'loaded_at': self._loaded_at.isoformat() if self._loaded_at else None
+        }
+
+    def _swap(self, snapshot):
+        # Caller holds the lock
+        snapshot.generation = self._snapshot.generation + 1
+        self._snapshot = snapshot
+        self._results.clear()
+
+    def _ensure_running(self):
+        if self._loaded and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._loaded and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._loaded = True
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception('Initial doctor search load failed')
+        self._thread = threading.Thread(target=self._run, name='doctor-search-refresh', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        pid = self._pid
+        while self._pid == pid:
+            time.sleep(self.refresh_interval)
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception('Doctor search refresh failed')
+
+
+def _load_doctors():
+    for doc in doctor_repo.store.query(doctor_repo.collection, fields=SEARCH_FIELDS):
+        yield doc.id, doc.data
+
+
+def warm_up():
+    doctor_search.start()
+
+
+doctor_search = DoctorSearchIndex(
+    _load_doctors,
+    refresh_interval=getattr(settings, 'DOCTOR_SEARCH_REFRESH_SECONDS', 300)
+)
@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from backend.storage import get_store, EMAIL_INDEX_COLLECTION, email_index_id, email_index_entry
+
+# Firestore allows 500 writes per batch
+BATCH_SIZE = 400
+
+
+class Command(BaseCommand):
+    help = 'Create email_index entries for existing doctors and patients'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be written')
+
+    def handle(self, *args, **options):
+        for collection, role in (('doctors', 'doctor'), ('patients', 'patient')):
+            self.backfill(collection, role, options['dry_run'])
+
+    def backfill(self, collection, role, dry_run):
+        store = get_store()
+        seen = {}
+        pending = []
+        created = 0
+
+        for doc in store.query(collection, fields=['email']):
+            email = doc.data.get('email')
+            if not email:
+                continue
+            index_id = email_index_id(role, email)
+            if index_id in seen:
+                self.stderr.write(
+                    f'Duplicate {role} email {email}: {seen[index_id]} kept, {doc.id} not indexed'
+                )
+                continue
+            seen[index_id] = doc.id
+            pending.append((index_id, doc.id, email))
+
+            if len(pending) >= BATCH_SIZE:
+                created += self.flush(store, role, pending, dry_run)
+                pending = []
+
+        if pending:
+            created += self.flush(store, role, pending, dry_run)
+
+        verb = 'Would create' if dry_run else 'Created'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {created} {role} index entries ({len(seen)} {collection} seen)'))
+
+    def flush(self, store, role, pending, dry_run):
+        found = store.get_many(EMAIL_INDEX_COLLECTION, [index_id for index_id, _, _ in pending])
+        writes = []
+        for index_id, uid, email in pending:
+            existing = found.get(index_id)
+            if existing is not None:
+                if existing.get('uid') != uid:
+                    self.stderr.write(f'{index_id} already points at {existing.get("uid")}, skipping {uid}')
+                continue
+            writes.append(('create', EMAIL_INDEX_COLLECTION, index_id, email_index_entry(role, uid, email)))
+
+        if writes and not dry_run:
+            store.commit(writes)
+        return len(writes)
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from doctors.password_cost import calibrate, save_calibration
+
+
+class Command(BaseCommand):
+    help = 'Measure bcrypt hash time on this host and pick the cost that fits the latency budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget-ms', type=float, default=settings.BCRYPT_LATENCY_BUDGET_MS)
+        parser.add_argument('--min-rounds', type=int, default=10, help='Never go below this cost')
+        parser.add_argument('--max-rounds', type=int, default=16)
+        parser.add_argument('--samples', type=int, default=3, help='Hashes measured per cost')
+        parser.add_argument('--dry-run', action='store_true', help='Print the result without saving it')
+
+    def handle(self, *args, **options):
+        calibration = calibrate(
+            options['budget_ms'],
+            min_rounds=options['min_rounds'],
+            max_rounds=options['max_rounds'],
+            samples=options['samples']
+        )
+
+        for rounds, ms in calibration['measured_ms'].items():
+            self.stdout.write(f'  cost {rounds}: {ms} ms')
+
+        if options['dry_run']:
+            self.stdout.write(f"Selected cost {calibration['rounds']} (not saved)")
+            return
+
+        save_calibration(settings.BCRYPT_CALIBRATION_FILE, calibration)
+        self.stdout.write(self.style.SUCCESS(
+            f"Selected cost {calibration['rounds']}, saved to {settings.BCRYPT_CALIBRATION_FILE}"
+        ))
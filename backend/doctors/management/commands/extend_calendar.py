@@ -0,0 +1,54 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from backend.storage import doctor_repo, calendar_repo
+from doctors.availability import INDEX_FIELDS, get_availability
+from doctors.dated_slots import today, horizon_days, calendar_until, extend, expire_writes
+
+
+class Command(BaseCommand):
+    help = "Extend every doctor's dated calendar through the horizon and delete past dates (run nightly)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Days to keep materialized from today (default: CALENDAR_HORIZON_DAYS)'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be written')
+
+    def handle(self, *args, **options):
+        store = doctor_repo.store
+        through = today() + timedelta(days=(options['days'] or horizon_days()) - 1)
+        batch_size = getattr(settings, 'CALENDAR_BATCH_SIZE', 400)
+        doctors = extended = written = expired = 0
+        pending = []
+
+        fields = INDEX_FIELDS + [calendar_repo.horizon_field]
+        for doc in store.query(doctor_repo.collection, fields=fields):
+            doctors += 1
+            until = calendar_until(doc.data)
+            if until is None or until < through:
+                extended += 1
+                if not options['dry_run']:
+                    written += extend(doc.id, doc.data, get_availability(doc.id, doc.data), through)
+
+            pending += expire_writes(doc.id)
+            while len(pending) >= batch_size:
+                expired += self.flush(store, pending[:batch_size], options['dry_run'])
+                pending = pending[batch_size:]
+
+        if pending:
+            expired += self.flush(store, pending, options['dry_run'])
+
+        verb = 'Would extend' if options['dry_run'] else 'Extended'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {extended} of {doctors} calendars through {through.isoformat()} '
+            f'({written} slots written, {expired} past slots deleted)'
+        ))
+
+    def flush(self, store, writes, dry_run):
+        if not dry_run:
+            store.commit(writes)
+        return len(writes)
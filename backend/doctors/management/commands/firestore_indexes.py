@@ -0,0 +1,44 @@
+import json
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from backend.storage import (
+    doctor_repo, patient_repo, appointment_repo, health_repo, slot_repo, calendar_repo,
+    token_version_repo
+)
+from backend.storage.indexes import build_index_file
+
+
+class Command(BaseCommand):
+    help = 'Write firestore.indexes.json with every composite index the repository queries need'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default=str(Path(settings.BASE_DIR).parent / 'firestore.indexes.json'),
+            help='Index file to write (default: firestore.indexes.json at the repository root)'
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Fail if the index file is missing or out of date instead of writing it'
+        )
+
+    def handle(self, *args, **options):
+        content = build_index_file([
+            doctor_repo, patient_repo, appointment_repo, health_repo, slot_repo, calendar_repo, token_version_repo
+        ])
+        rendered = json.dumps(content, indent=2) + '\n'
+        output = Path(options['output'])
+
+        if options['check']:
+            current = output.read_text(encoding='utf-8') if output.exists() else None
+            if current != rendered:
+                raise CommandError(f'{output} is out of date; run `manage.py firestore_indexes`')
+            self.stdout.write(self.style.SUCCESS(f'{output} is up to date'))
+            return
+
+        output.write_text(rendered, encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {len(content['indexes'])} composite indexes to {output}"
+        ))
@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand
+from firebase_admin import firestore
+from backend.storage import doctor_repo, slot_repo, run_transaction
+
+
+class Command(BaseCommand):
+    help = "Move doctors' time slots from the availability array to doctors/{uid}/slots documents"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reverse',
+            action='store_true',
+            help='Move slot documents back into the availability array'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be converted')
+
+    def handle(self, *args, **options):
+        reverse = options['reverse']
+        converted = skipped = 0
+
+        for doc in doctor_repo.store.query(doctor_repo.collection, fields=['uid', slot_repo.storage_field]):
+            if slot_repo.uses_documents(doc.data) != reverse:
+                skipped += 1
+                continue
+            if not options['dry_run']:
+                slots = self.to_embedded(doc.id) if reverse else self.to_documents(doc.id)
+                self.stdout.write(f'{doc.id}: {slots} slots')
+            converted += 1
+
+        verb = 'Would convert' if options['dry_run'] else 'Converted'
+        layout = 'embedded availability' if reverse else 'slot documents'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {converted} doctors to {layout} ({skipped} already converted)'
+        ))
+
+    def to_documents(self, uid):
+        # Leftovers of an earlier --reverse are replaced in the same commit
+        existing_ids = slot_repo.slot_ids(uid)
+
+        def convert(transaction):
+            doctor_data = transaction.get(doctor_repo.collection, uid)
+            if doctor_data is None or slot_repo.uses_documents(doctor_data):
+                return 0
+            days, slots = slot_repo.split(doctor_data.get('availability', []))
+            transaction.update(doctor_repo.collection, uid, {
+                'availability': days,
+                slot_repo.storage_field: slot_repo.documents,
+                'updated_at': firestore.SERVER_TIMESTAMP
+            })
+            for slot_id, slot in slots.items():
+                transaction.set(slot_repo.collection_for(uid), slot_id, slot)
+            for slot_id in existing_ids:
+                if slot_id not in slots:
+                    transaction.delete(slot_repo.collection_for(uid), slot_id)
+            return len(slots)
+
+        return run_transaction(convert)
+
+    def to_embedded(self, uid):
+        slot_ids = slot_repo.slot_ids(uid)
+
+        def convert(transaction):
+            # Reading every slot through the transaction makes a concurrent
+            # booking abort the conversion instead of being lost
+            doctor_data = transaction.get(doctor_repo.collection, uid)
+            slots = [transaction.get(slot_repo.collection_for(uid), slot_id) for slot_id in slot_ids]
+            if doctor_data is None or not slot_repo.uses_documents(doctor_data):
+                return 0
+            slots = sorted((slot for slot in slots if slot is not None), key=lambda slot: slot['position'])
+            transaction.update(doctor_repo.collection, uid, {
+                'availability': slot_repo.merge(doctor_data.get('availability', []), slots),
+                slot_repo.storage_field: 'embedded',
+                'updated_at': firestore.SERVER_TIMESTAMP
+            })
+            for slot_id in slot_ids:
+                transaction.delete(slot_repo.collection_for(uid), slot_id)
+            return len(slots)
+
+        return run_transaction(convert)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from doctors.auth import revoke_tokens
+
+
+class Command(BaseCommand):
+    help = 'Revoke every access and refresh token issued so far for the given user uids'
+
+    def add_arguments(self, parser):
+        parser.add_argument('uids', nargs='+', help='Doctor or patient uid')
+
+    def handle(self, *args, **options):
+        for uid in options['uids']:
+            version = revoke_tokens(uid)
+            self.stdout.write(self.style.SUCCESS(f'Revoked tokens for {uid} (now at version {version})'))
@@ -0,0 +1,62 @@
+import json
+import statistics
+import time
+from pathlib import Path
+import bcrypt
+
+DEFAULT_ROUNDS = 12
+
+
+def hash_cost(hashed_password: str) -> int:
+    """Cost factor encoded in a bcrypt hash such as $2b$12$..."""
+    try:
+        return int(hashed_password.split('$')[2])
+    except (IndexError, ValueError):
+        return 0
+
+
+def measure_hash_ms(rounds: int, samples: int = 3) -> float:
+    """Median wall time of one bcrypt hash at the given cost on this host"""
+    timings = []
+    for _ in range(samples):
+        salt = bcrypt.gensalt(rounds=rounds)
+        started = time.perf_counter()
+        bcrypt.hashpw(b'calibration-password', salt)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(budget_ms: float, min_rounds: int = 10, max_rounds: int = 16, samples: int = 3) -> dict:
+    """
+    Pick the highest cost whose hash time fits within budget_ms.
+
+    Each extra round doubles the work, so measurement stops at the first cost
+    over budget. min_rounds is a security floor and is returned even when the
+    host cannot meet the budget at that cost.
+    """
+    timings = {}
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        timings[rounds] = measure_hash_ms(rounds, samples)
+        if timings[rounds] > budget_ms:
+            break
+        chosen = rounds
+    return {
+        'rounds': chosen,
+        'budget_ms': budget_ms,
+        'measured_ms': {str(rounds): round(ms, 2) for rounds, ms in timings.items()}
+    }
+
+
+def load_calibrated_rounds(path) -> int:
+    """Rounds stored by the calibrate_bcrypt command, or None if not calibrated"""
+    try:
+        with open(Path(path), encoding='utf-8') as f:
+            return int(json.load(f)['rounds'])
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def save_calibration(path, calibration: dict) -> None:
+    with open(Path(path), 'w', encoding='utf-8') as f:
+        json.dump(calibration, f, indent=2)
@@ -0,0 +1,123 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import bcrypt
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when the hashing pool is saturated or a job exceeds its timeout"""
+
+
+def _hashpw(password: bytes, salt: bytes) -> bytes:
+    return bcrypt.hashpw(password, salt)
+
+
+def _checkpw(password: bytes, hashed_password: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed_password)
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+class PasswordPool:
+    """
+    Bounded process pool for bcrypt work.
+
+    At most workers + queue_depth jobs are admitted at once; anything beyond
+    that is rejected immediately with PasswordPoolBusy so a login storm sheds
+    load instead of pinning every request worker on bcrypt.
+    """
+
+    def __init__(self, workers: int, queue_depth: int, timeout: float):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.timeout = timeout
+        self.rejected = 0
+        self.timed_out = 0
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def hash(self, password: bytes, salt: bytes) -> bytes:
+        return self._run(_hashpw, password, salt)
+
+    def check(self, password: bytes, hashed_password: bytes) -> bool:
+        return self._run(_checkpw, password, hashed_password)
+
+    async def acheck(self, password: bytes, hashed_password: bytes) -> bool:
+        """check() for async views: awaits the worker process instead of blocking the loop"""
+        future = self._submit(_checkpw, password, hashed_password)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            self.timed_out += 1
+            raise PasswordPoolBusy('Password hashing timed out')
+
+    def warm_up(self) -> int:
+        """Start every worker process now rather than on the first logins"""
+        executor = self._get_executor()
+        futures = [executor.submit(_ping) for _ in range(self.workers)]
+        return len({future.result() for future in futures})
+
+    def stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'queue_depth': self.queue_depth,
+            'timeout': self.timeout,
+            'rejected': self.rejected,
+            'timed_out': self.timed_out
+        }
+
+    def _run(self, fn, *args):
+        future = self._submit(fn, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            self.timed_out += 1
+            raise PasswordPoolBusy('Password hashing timed out')
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordPoolBusy('Password hashing pool is saturated')
+        try:
+            executor = self._get_executor()
+            try:
+                future = executor.submit(fn, *args)
+            except BrokenProcessPool:
+                # A worker process died (OOM kill, signal) and the executor
+                # refuses all work from then on: replace it once
+                self._discard_executor(executor)
+                future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _get_executor(self):
+        # Pools do not survive fork, so each gunicorn worker builds its own
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('forkserver')
+                    )
+                    self._pid = os.getpid()
+        return self._executor
+
+    def _discard_executor(self, executor):
+        with self._lock:
+            # Another thread may already have replaced it
+            if self._executor is not executor:
+                return
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,129 @@
+import logging
+import os
+import threading
+import time
+from django.conf import settings
+from backend.storage import token_version_repo
+
+logger = logging.getLogger(__name__)
+
+
+class TokenVersionTable:
+    """
+    In-process copy of the token_versions collection.
+
+    Each document holds the minimum token version still accepted for a uid.
+    Tokens signed with an older 'ver' claim are revoked. The table is loaded
+    once per process by warm_up() and then refreshed incrementally by a daemon
+    thread, so revocation checks never touch Firestore on the request path. A
+    process that skipped warm-up loads the table in the background and reads
+    single version documents until that load completes.
+    """
+    def __init__(self, refresh_interval: float = 30.0):
+        self.refresh_interval = refresh_interval
+        self._versions = {}
+        self._last_seen = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def current_version(self, uid: str) -> int:
+        """Version to sign into newly issued tokens for uid"""
+        if not self._ensure_running():
+            return self._fetch(uid)
+        return self._versions.get(uid, 0)
+
+    def is_revoked(self, uid: str, version: int) -> bool:
+        """True when a token carrying version has been revoked for uid"""
+        if not self._ensure_running():
+            return version < self._fetch(uid)
+        return version < self._versions.get(uid, 0)
+
+    def revoke(self, uid: str) -> int:
+        """Invalidate every token issued so far for uid and return the new version"""
+        version = token_version_repo.bump(uid)
+        with self._lock:
+            self._versions[uid] = max(self._versions.get(uid, 0), version)
+        return version
+
+    def refresh(self) -> int:
+        """Pull version documents changed since the last refresh; returns how many were new"""
+        changed = 0
+        for doc in token_version_repo.changed_since(self._last_seen):
+            data = doc.data
+            version = data.get('version', 0)
+            updated_at = data.get('updated_at')
+            with self._lock:
+                if updated_at is not None and (self._last_seen is None or updated_at > self._last_seen):
+                    self._last_seen = updated_at
+                # The poll includes the last seen timestamp, so applied versions come back
+                if version <= self._versions.get(doc.id, 0):
+                    continue
+                self._versions[doc.id] = version
+            changed += 1
+        return changed
+
+    def start(self) -> None:
+        """Load the table and start the refresh thread for this process"""
+        if self._claim():
+            try:
+                self.refresh()
+                self._loaded = True
+            except Exception:
+                logger.exception('Initial token version load failed')
+            self._spawn()
+
+    def stats(self) -> dict:
+        return {
+            'entries': len(self._versions),
+            'loaded': self._loaded,
+            'last_seen': self._last_seen.isoformat() if self._last_seen else None
+        }
+
+    def _ensure_running(self) -> bool:
+        """True once the table is loaded in this process; otherwise loads it in the background"""
+        if self._loaded and self._pid == os.getpid():
+            return True
+        if self._claim():
+            self._spawn()
+        return False
+
+    def _claim(self) -> bool:
+        # One loader per process; a forked worker must not trust the parent's table
+        with self._lock:
+            if self._pid == os.getpid():
+                return False
+            self._pid = os.getpid()
+            self._loaded = False
+            return True
+
+    def _spawn(self):
+        self._thread = threading.Thread(target=self._run, name='token-version-refresh', daemon=True)
+        self._thread.start()
+
+    def _fetch(self, uid: str) -> int:
+        data = token_version_repo.get(uid, fields=['version']) or {}
+        return max(self._versions.get(uid, 0), data.get('version', 0))
+
+    def _run(self):
+        pid = self._pid
+        while self._pid == pid:
+            if self._loaded:
+                time.sleep(self.refresh_interval)
+            try:
+                self.refresh()
+                self._loaded = True
+            except Exception:
+                logger.exception('Token version refresh failed')
+                if not self._loaded:
+                    time.sleep(self.refresh_interval)
+
+
+def warm_up():
+    token_versions.start()
+
+
+token_versions = TokenVersionTable(
+    refresh_interval=getattr(settings, 'JWT_REVOCATION_REFRESH_SECONDS', 30)
+)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 import re
+from .availability_index import normalize_time
 
 class DoctorRegistrationSerializer(serializers.Serializer):
     email = serializers.EmailField(required=True)
@@ -42,12 +43,12 @@ class TimeSlotSerializer(serializers.Serializer):
     def validate_start_time(self, value):
         if not re.match(r'^([0-1]?[0-9]|2[0-3]):[0-5][0-9]$', value):
             raise serializers.ValidationError("Invalid time format. Use HH:MM (24-hour)")
-        return value
+        return normalize_time(value)
 
     def validate_end_time(self, value):
         if not re.match(r'^([0-1]?[0-9]|2[0-3]):[0-5][0-9]$', value):
             raise serializers.ValidationError("Invalid time format. Use HH:MM (24-hour)")
-        return value
+        return normalize_time(value)
 
 
 class DayAvailabilitySerializer(serializers.Serializer):
@@ -91,8 +92,10 @@ class BookAppointmentSerializer(serializers.Serializer):
     patient_email = serializers.EmailField()
     patient_phone = serializers.CharField(max_length=15)
     day = serializers.ChoiceField(
-        choices=['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+        choices=['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday'],
+        required=False
     )
+    date = serializers.DateField(required=False, help_text="Book this date's slot (YYYY-MM-DD) instead of the weekly one")
     start_time = serializers.CharField(max_length=5)
     end_time = serializers.CharField(max_length=5)
     reason = serializers.CharField(required=False, allow_blank=True)
@@ -100,9 +103,19 @@ class BookAppointmentSerializer(serializers.Serializer):
     def validate_start_time(self, value):
         if not re.match(r'^([0-1]?[0-9]|2[0-3]):[0-5][0-9]$', value):
             raise serializers.ValidationError("Invalid time format. Use HH:MM (24-hour)")
-        return value
+        return normalize_time(value)
 
     def validate_end_time(self, value):
         if not re.match(r'^([0-1]?[0-9]|2[0-3]):[0-5][0-9]$', value):
             raise serializers.ValidationError("Invalid time format. Use HH:MM (24-hour)")
-        return value
+        return normalize_time(value)
+
+    def validate(self, attrs):
+        if 'date' in attrs:
+            weekday = attrs['date'].strftime('%A').lower()
+            if attrs.get('day', weekday) != weekday:
+                raise serializers.ValidationError({'day': f"{attrs['date']} is a {weekday}"})
+            attrs['day'] = weekday
+        elif 'day' not in attrs:
+            raise serializers.ValidationError({'day': 'Either day or date is required'})
+        return attrs
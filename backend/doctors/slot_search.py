@@ -0,0 +1,294 @@
+"""
+In-process index of doctors' free slots, searched across doctors.
+
+Every doctor's weekly template is held in sorted per-day lists of
+(start, end, uid) shared by all doctors, plus one list per specialization,
+next to each doctor's weekday bookings and the confirmed bookings of
+upcoming dates. search() bisects one list to the start of the time window
+and walks it in start order, so a query only touches candidate slots and
+never the store. earliest() walks the dates from today in order through
+the same lists for the next free slots across doctors.
+
+The index is loaded on first use, kept current by the writes this process
+makes (schedule saves, profile and status changes, bookings and
+cancellations) and rebuilt every refresh_interval seconds by a daemon
+thread to pick up other processes' writes. Lists are replaced rather than
+mutated, so searches never take the lock.
+"""
+
+import bisect
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from itertools import islice
+from .availability_index import DAYS, normalize_time
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_specialization(value) -> str:
+    return (value or '').strip().lower()
+
+
+class DoctorEntry:
+    """What the index keeps per doctor"""
+
+    __slots__ = ('uid', 'first_name', 'last_name', 'specialization', 'active', 'calendar_until', 'slots',
+                 'weekly_booked')
+
+    def __init__(self, uid, doctor_data: dict, availability: list):
+        self.uid = uid
+        self.first_name = doctor_data.get('first_name', '')
+        self.last_name = doctor_data.get('last_name', '')
+        self.specialization = doctor_data.get('specialization', '')
+        self.active = doctor_data.get('is_active', True)
+        self.calendar_until = doctor_data.get('calendar_until')
+        # {day: [(start, end)]} of the open days' slots, except those the doctor blocked
+        self.slots = {}
+        self.weekly_booked = set()
+        for day_avail in availability:
+            if not day_avail.get('is_available', False):
+                continue
+            for slot in day_avail.get('time_slots', []):
+                try:
+                    key = (normalize_time(slot['start_time']), normalize_time(slot['end_time']))
+                except (KeyError, ValueError):
+                    continue
+                if slot.get('booking_id'):
+                    self.weekly_booked.add((day_avail['day'],) + key)
+                elif not slot.get('is_available', True):
+                    continue
+                self.slots.setdefault(day_avail['day'], []).append(key)
+
+    @property
+    def name(self) -> str:
+        return f'{self.first_name} {self.last_name}'.strip()
+
+    def list_keys(self):
+        specialization = normalize_specialization(self.specialization)
+        for day in self.slots:
+            yield day, None
+            if specialization:
+                yield day, specialization
+
+
+class SlotSearchIndex:
+    """
+    load() returns (doctors, dated_bookings): (uid, doctor_data,
+    availability) for every doctor, and the confirmed appointments of
+    today and later dates (doctor_uid, date, start_time, end_time).
+    """
+
+    def __init__(self, load, refresh_interval: float = 60.0):
+        self._load = load
+        self.refresh_interval = refresh_interval
+        self._doctors = {}
+        self._lists = {}
+        self._dated_booked = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._pid = None
+        self._thread = None
+
+    def search(self, day: str, specialization: str = None, slot_date: date = None, start_time: str = None,
+               end_time: str = None, limit: int = 50) -> list:
+        """
+        Free slots of active doctors on a weekday, or on a date when
+        slot_date is given, starting no earlier than start_time and ending
+        no later than end_time, earliest first
+        """
+        self._ensure_running()
+        start_time = normalize_time(start_time) if start_time else ''
+        end_time = normalize_time(end_time) if end_time else None
+        iso_date = slot_date.isoformat() if slot_date else None
+        return list(islice(self._walk(day, specialization, iso_date, start_time, end_time), limit))
+
+    def earliest(self, date_from: date, date_to: date, after: str = None, specialization: str = None,
+                 limit: int = 10) -> list:
+        """
+        The first limit free slots of active doctors from date_from through
+        date_to, in date and start order. On date_from only slots starting
+        at or after `after` count.
+
+        Dates are walked in order and each date's list is already sorted, so
+        the cost is a bisect per date plus the booked slots skipped on the
+        way, not a scan of every doctor.
+        """
+        self._ensure_running()
+        results = []
+        slot_date = date_from
+        start_time = normalize_time(after) if after else ''
+        while slot_date <= date_to and len(results) < limit:
+            day = DAYS[slot_date.weekday()]
+            results += islice(
+                self._walk(day, specialization, slot_date.isoformat(), start_time, None), limit - len(results)
+            )
+            slot_date += timedelta(days=1)
+            start_time = ''
+        return results
+
+    # Incremental updates
+
+    def update(self, uid: str, doctor_data: dict, availability: list) -> None:
+        """Replace a doctor's entry after a registration or schedule change"""
+        if not self._loaded:
+            return
+        with self._lock:
+            self._replace(uid, DoctorEntry(uid, doctor_data, availability))
+
+    def update_profile(self, uid: str, changes: dict) -> None:
+        """Apply changed doctor fields; a new name or specialization re-files the doctor's slots"""
+        doctor = self._doctors.get(uid)
+        if doctor is None:
+            return
+        with self._lock:
+            if 'is_active' in changes:
+                doctor.active = changes['is_active']
+            if any(field in changes for field in ('first_name', 'last_name', 'specialization')):
+                entry = DoctorEntry(uid, {
+                    'first_name': changes.get('first_name', doctor.first_name),
+                    'last_name': changes.get('last_name', doctor.last_name),
+                    'specialization': changes.get('specialization', doctor.specialization),
+                    'is_active': doctor.active,
+                    'calendar_until': doctor.calendar_until
+                }, [])
+                entry.slots, entry.weekly_booked = doctor.slots, doctor.weekly_booked
+                self._replace(uid, entry)
+
+    def set_active(self, uid: str, active: bool) -> None:
+        doctor = self._doctors.get(uid)
+        if doctor is not None:
+            doctor.active = active
+
+    def mark_booked(self, uid: str, day: str, start_time: str, end_time: str, slot_date: date = None) -> None:
+        self._mark(uid, day, start_time, end_time, slot_date, booked=True)
+
+    def mark_free(self, uid: str, day: str, start_time: str, end_time: str, slot_date: str = None) -> None:
+        self._mark(uid, day, start_time, end_time, slot_date, booked=False)
+
+    # Loading
+
+    def start(self) -> None:
+        """Load the index and start the refresh thread for this process"""
+        self._ensure_running()
+
+    def refresh(self) -> int:
+        """Rebuild the whole index from the store; returns the number of doctors"""
+        doctors, dated_bookings = self._load()
+        entries = {uid: DoctorEntry(uid, doctor_data, availability) for uid, doctor_data, availability in doctors}
+        lists = {}
+        for entry in entries.values():
+            for key in entry.list_keys():
+                lists.setdefault(key, []).extend((start, end, entry.uid) for start, end in entry.slots[key[0]])
+        for candidates in lists.values():
+            candidates.sort()
+        dated_booked = {}
+        for booking in dated_bookings:
+            try:
+                key = (booking['date'], normalize_time(booking['start_time']), normalize_time(booking['end_time']))
+            except (KeyError, ValueError):
+                continue
+            dated_booked.setdefault(booking['doctor_uid'], set()).add(key)
+
+        with self._lock:
+            self._doctors, self._lists, self._dated_booked = entries, lists, dated_booked
+            self._loaded_at = datetime.now(timezone.utc)
+        return len(entries)
+
+    def stats(self) -> dict:
+        return {
+            'doctors': len(self._doctors),
+            'slots': sum(len(candidates) for (_, specialization), candidates in self._lists.items()
+                         if specialization is None),
+            'loaded_at': self._loaded_at.isoformat() if self._loaded_at else None
+        }
+
+    def _walk(self, day, specialization, iso_date, start_time, end_time):
+        """Free slots of one day's list from start_time on, in start order"""
+        candidates = self._lists.get((day, normalize_specialization(specialization) or None), [])
+        first = bisect.bisect_left(candidates, (start_time,))
+        for start, end, uid in islice(candidates, first, None):
+            if end_time is not None and start >= end_time:
+                return
+            if end_time is not None and end > end_time:
+                continue
+            doctor = self._doctors.get(uid)
+            if doctor is None or not doctor.active:
+                continue
+            if iso_date is not None:
+                # Dates past the doctor's calendar have no slots to book yet
+                if not doctor.calendar_until or doctor.calendar_until < iso_date:
+                    continue
+                if (iso_date, start, end) in self._dated_booked.get(uid, ()):
+                    continue
+            # A weekday booking holds the slot on every date too
+            if (day, start, end) in doctor.weekly_booked:
+                continue
+            result = {
+                'doctor_uid': uid,
+                'doctor_name': doctor.name,
+                'specialization': doctor.specialization,
+                'day': day,
+                'start_time': start,
+                'end_time': end
+            }
+            if iso_date is not None:
+                result['date'] = iso_date
+            yield result
+
+    def _replace(self, uid, entry):
+        # Caller holds the lock. Touched lists are rebuilt and swapped in whole.
+        old = self._doctors.get(uid)
+        keys = set(entry.list_keys())
+        for key in keys | (set(old.list_keys()) if old is not None else set()):
+            candidates = [item for item in self._lists.get(key, []) if item[2] != uid]
+            if key in keys:
+                for start, end in entry.slots[key[0]]:
+                    bisect.insort(candidates, (start, end, uid))
+            self._lists[key] = candidates
+        self._doctors[uid] = entry
+
+    def _mark(self, uid, day, start_time, end_time, slot_date, booked):
+        try:
+            start, end = normalize_time(start_time), normalize_time(end_time)
+        except ValueError:
+            return
+        with self._lock:
+            if slot_date is not None:
+                iso_date = slot_date if isinstance(slot_date, str) else slot_date.isoformat()
+                booked_slots, key = self._dated_booked.setdefault(uid, set()), (iso_date, start, end)
+            elif uid in self._doctors:
+                booked_slots, key = self._doctors[uid].weekly_booked, (day, start, end)
+            else:
+                return
+            if booked:
+                booked_slots.add(key)
+            else:
+                booked_slots.discard(key)
+
+    def _ensure_running(self):
+        if self._loaded and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._loaded and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._loaded = True
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception('Initial slot search load failed')
+        self._thread = threading.Thread(target=self._run, name='slot-search-refresh', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        pid = self._pid
+        while self._pid == pid:
+            time.sleep(self.refresh_interval)
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception('Slot search refresh failed')
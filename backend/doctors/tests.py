@@ -0,0 +1,335 @@
+from datetime import timedelta
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+from backend.storage import set_store, doctor_repo, slot_repo
+from backend.storage.memory_store import MemoryStore
+from doctors.availability import availability_index, slot_search, get_availability
+from doctors.availability_index import AvailabilityIndex
+from doctors.booking import book_slot, cancel_booking, BookingError
+from doctors.dated_slots import today, weekday, refresh, extend
+from doctors.slot_search import SlotSearchIndex
+
+DOCTOR_UID = 'doctor-1'
+
+PATIENT = {'patient_name': 'Pat Doe', 'patient_email': 'pat@example.com', 'patient_phone': '5550100'}
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'], STORAGE_IDENTITY_MAP=False)
+class BookingTestCase(SimpleTestCase):
+    """Booking through the API against an in-memory store"""
+
+    def setUp(self):
+        self.store = MemoryStore()
+        set_store(self.store)
+        self.store.load({'doctors': {DOCTOR_UID: {
+            'uid': DOCTOR_UID,
+            'email': 'ann@hospital.com',
+            'first_name': 'Ann',
+            'last_name': 'Smith',
+            'specialization': 'Cardiologist',
+            'is_active': True,
+            'availability': []
+        }}})
+        availability_index.clear()
+        caches['responses'].clear()
+        self.slot_date = today() + timedelta(days=1)
+        self.day = weekday(self.slot_date)
+
+    def save_availability(self, time_slots):
+        availability = [{'day': self.day, 'is_available': True, 'time_slots': time_slots}]
+        response = self.client.put(
+            f'/api/doctors/availability/{DOCTOR_UID}/', {'availability': availability}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        slot_search.refresh()
+
+    def save_legacy_availability(self, time_slots):
+        """A schedule written before times were normalized, bypassing the serializer"""
+        availability = [{'day': self.day, 'is_available': True, 'time_slots': time_slots}]
+        self.store.update('doctors', DOCTOR_UID, {'availability': availability})
+        refresh(DOCTOR_UID, doctor_repo.get(DOCTOR_UID), availability)
+        slot_search.refresh()
+
+    def book(self, **slot):
+        return self.client.post(
+            f'/api/doctors/book-appointment/{DOCTOR_UID}/', dict(PATIENT, **slot), content_type='application/json'
+        )
+
+    def next_available(self):
+        response = self.client.get('/api/doctors/next-available/', {'limit': 10})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['slots']
+
+
+class SearchResultBookingTests(BookingTestCase):
+    """Slots returned by slot search and next-available can be booked as returned"""
+
+    def assertBookable(self, slot, **extra):
+        response = self.book(start_time=slot['start_time'], end_time=slot['end_time'], **extra)
+        self.assertEqual(response.status_code, 201, response.content)
+
+    def test_next_available_slot_is_bookable(self):
+        self.save_availability([{'start_time': '9:30', 'end_time': '10:00'}])
+        slots = [s for s in self.next_available() if s['date'] == self.slot_date.isoformat()]
+        self.assertEqual([(s['start_time'], s['end_time']) for s in slots], [('09:30', '10:00')])
+
+        self.assertBookable(slots[0], date=slots[0]['date'])
+        self.assertNotIn(slots[0], self.next_available())
+
+    def test_next_available_slot_of_unpadded_schedule_is_bookable(self):
+        self.save_legacy_availability([{'start_time': '9:30', 'end_time': '10:00'}])
+        slot = self.next_available()[0]
+        self.assertEqual((slot['date'], slot['start_time']), (self.slot_date.isoformat(), '09:30'))
+
+        self.assertBookable(slot, date=slot['date'])
+
+    def test_search_slot_of_unpadded_schedule_is_bookable(self):
+        self.save_legacy_availability([{'start_time': '9:00', 'end_time': '9:30'}])
+        response = self.client.get('/api/doctors/search-slots/', {'day': self.day})
+        slot = response.json()['slots'][0]
+        self.assertEqual((slot['start_time'], slot['end_time']), ('09:00', '09:30'))
+
+        check = self.client.get(f'/api/doctors/check-availability/{DOCTOR_UID}/', {
+            'day': self.day, 'start_time': slot['start_time'], 'end_time': slot['end_time']
+        })
+        self.assertTrue(check.json()['is_available'])
+        self.assertBookable(slot, day=self.day)
+
+
+class WeeklyAndDatedBookingTests(BookingTestCase):
+    """A weekday booking and a booking for one of its dates never hold the same slot"""
+
+    SLOT = {'start_time': '10:00', 'end_time': '10:30'}
+
+    def setUp(self):
+        super().setUp()
+        self.save_availability([self.SLOT])
+
+    def book_weekly(self):
+        return self.book(day=self.day, **self.SLOT)
+
+    def book_dated(self, slot_date=None):
+        return self.book(date=(slot_date or self.slot_date).isoformat(), **self.SLOT)
+
+    def test_date_of_weekly_booking_cannot_be_booked(self):
+        self.assertEqual(self.book_weekly().status_code, 201)
+
+        self.assertEqual(self.book_dated().status_code, 400)
+        check = self.client.get(f'/api/doctors/check-availability/{DOCTOR_UID}/', dict(
+            self.SLOT, date=self.slot_date.isoformat()
+        ))
+        self.assertFalse(check.json()['is_available'])
+        self.assertEqual(self.next_available(), [])
+
+    def test_weekly_booking_of_booked_date_is_refused(self):
+        self.assertEqual(self.book_dated().status_code, 201)
+
+        response = self.book_weekly()
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(self.slot_date.isoformat(), response.json()['error'])
+
+    def test_dates_materialized_later_carry_the_weekly_booking(self):
+        with self.settings(CALENDAR_HORIZON_DAYS=7):
+            self.save_availability([self.SLOT])
+        self.assertEqual(self.book_weekly().status_code, 201)
+
+        later = self.slot_date + timedelta(days=14)
+        doctor_data = doctor_repo.get(DOCTOR_UID)
+        extend(DOCTOR_UID, doctor_data, get_availability(DOCTOR_UID, doctor_data), through=later)
+        self.assertEqual(self.book_dated(later).status_code, 400)
+
+    def test_cancelling_weekly_booking_frees_its_dates(self):
+        booking_id = self.book_weekly().json()['booking_id']
+        response = self.client.post(f'/api/doctors/cancel-appointment/{booking_id}/')
+        self.assertEqual(response.status_code, 200, response.content)
+
+        self.assertEqual(self.book_dated().status_code, 201)
+
+
+@override_settings(SLOT_STORAGE='documents')
+class WeeklyAndDatedSlotDocumentTests(WeeklyAndDatedBookingTests):
+    """The same with the weekly slots in per-slot documents"""
+
+
+@override_settings(SLOT_STORAGE='embedded')
+class BookingTransactionTests(BookingTestCase):
+    """Bookings and cancellations that commit while another booking of the same doctor is in flight"""
+
+    FIRST = {'start_time': '09:00', 'end_time': '09:30'}
+    SECOND = {'start_time': '09:30', 'end_time': '10:00'}
+
+    def setUp(self):
+        super().setUp()
+        self.save_availability([self.FIRST, self.SECOND])
+
+    def book_slot(self, slot, patient, during=None):
+        """book_slot() for patient; during() runs inside the first attempt, after its reads"""
+        attempts = []
+
+        def build_appointment(doctor_data, booking_id):
+            attempts.append(booking_id)
+            if during is not None and len(attempts) == 1:
+                during()
+            return {'booking_id': booking_id, 'doctor_uid': DOCTOR_UID, 'patient_uid': patient,
+                    'day': self.day, 'status': 'confirmed', **slot}
+
+        appointment_data = book_slot(DOCTOR_UID, self.day, slot['start_time'], slot['end_time'],
+                                     booked_by=patient, build_appointment=build_appointment)
+        return appointment_data, len(attempts)
+
+    def slots(self):
+        availability = self.store.get('doctors', DOCTOR_UID)['availability']
+        return {slot['start_time']: slot.get('booking_id') for slot in availability[0]['time_slots']}
+
+    def appointments(self):
+        return {doc.id: doc.data['status'] for doc in self.store.query('appointments')}
+
+    def test_booking_that_loses_its_slot_is_refused(self):
+        with self.assertRaises(BookingError) as raised:
+            self.book_slot(self.FIRST, 'patient-1', during=lambda: self.book_slot(self.FIRST, 'patient-2'))
+
+        self.assertEqual(raised.exception.status_code, 400)
+        booking_id, = self.appointments()
+        self.assertEqual(self.slots()['09:00'], booking_id)
+
+    def test_cancel_committed_mid_booking_is_kept(self):
+        first, _ = self.book_slot(self.FIRST, 'patient-1')
+
+        second, attempts = self.book_slot(
+            self.SECOND, 'patient-2', during=lambda: cancel_booking(first['booking_id'], 'patient-1')
+        )
+
+        self.assertEqual(attempts, 2)
+        self.assertEqual(self.slots(), {'09:00': None, '09:30': second['booking_id']})
+        self.assertEqual(self.appointments(), {first['booking_id']: 'cancelled', second['booking_id']: 'confirmed'})
+
+    def test_contention_past_the_retry_budget_is_a_conflict(self):
+        def competing_write():
+            self.store.update('doctors', DOCTOR_UID, {'specialization': 'Neurologist'})
+
+        with self.settings(TRANSACTION_MAX_ATTEMPTS=1):
+            with self.assertRaises(BookingError) as raised:
+                self.book_slot(self.FIRST, 'patient-1', during=competing_write)
+
+        self.assertEqual(raised.exception.status_code, 409)
+        self.assertEqual(self.appointments(), {})
+        self.assertEqual(self.slots(), {'09:00': None, '09:30': None})
+
+
+@override_settings(SLOT_STORAGE='documents')
+class SlotDocumentLayoutTests(BookingTestCase):
+    """Schedules written as per-slot documents read back as the schedule that was saved"""
+
+    SCHEDULE = [
+        {'day': 'tuesday', 'is_available': True, 'time_slots': [
+            {'start_time': '14:00', 'end_time': '15:00', 'is_available': True},
+            {'start_time': '09:00', 'end_time': '10:00', 'is_available': True}
+        ]},
+        {'day': 'monday', 'is_available': False, 'time_slots': []}
+    ]
+
+    def put_availability(self, availability):
+        response = self.client.put(
+            f'/api/doctors/availability/{DOCTOR_UID}/', {'availability': availability}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def get_availability(self):
+        response = self.client.get(f'/api/doctors/availability/{DOCTOR_UID}/')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['availability']
+
+    def test_split_and_merge_are_inverse(self):
+        days, slots = slot_repo.split(self.SCHEDULE)
+        self.assertEqual(sorted(slots), ['tuesday-0900-1000', 'tuesday-1400-1500'])
+        ordered = sorted(slots.values(), key=lambda slot: slot['position'])
+        self.assertEqual(slot_repo.merge(days, ordered), self.SCHEDULE)
+
+    def test_schedule_round_trips_through_slot_documents(self):
+        self.put_availability(self.SCHEDULE)
+
+        doctor_data = self.store.get('doctors', DOCTOR_UID)
+        self.assertEqual(doctor_data['slot_storage'], 'documents')
+        self.assertEqual(doctor_data['availability'], [
+            {'day': 'tuesday', 'is_available': True}, {'day': 'monday', 'is_available': False}
+        ])
+        self.assertEqual(self.get_availability(), self.SCHEDULE)
+
+    def test_removed_slots_lose_their_documents(self):
+        self.put_availability(self.SCHEDULE)
+        shorter = [dict(self.SCHEDULE[0], time_slots=self.SCHEDULE[0]['time_slots'][1:])]
+        self.put_availability(shorter)
+
+        self.assertEqual(slot_repo.slot_ids(DOCTOR_UID), ['tuesday-0900-1000'])
+        self.assertEqual(self.get_availability(), shorter)
+
+    def test_switching_back_to_embedded_removes_slot_documents(self):
+        self.put_availability(self.SCHEDULE)
+        with self.settings(SLOT_STORAGE='embedded'):
+            self.put_availability(self.SCHEDULE)
+
+        doctor_data = self.store.get('doctors', DOCTOR_UID)
+        self.assertEqual((doctor_data['slot_storage'], doctor_data['availability']), ('embedded', self.SCHEDULE))
+        self.assertEqual(slot_repo.slot_ids(DOCTOR_UID), [])
+        self.assertEqual(self.get_availability(), self.SCHEDULE)
+
+
+class AvailabilityIndexTests(SimpleTestCase):
+    """Slot checks answered from the weekly bitmap"""
+
+    AVAILABILITY = [{'day': 'monday', 'is_available': True, 'time_slots': [
+        {'start_time': '09:00', 'end_time': '09:30'},
+        {'start_time': '09:30', 'end_time': '10:00', 'is_available': False},
+        {'start_time': '10:00', 'end_time': '11:00'},
+        {'start_time': '14:00', 'end_time': '14:45'}
+    ]}]
+
+    def setUp(self):
+        self.index = AvailabilityIndex(lambda uid: ({'is_active': True}, self.AVAILABILITY), None)
+        self.week = self.index.get(DOCTOR_UID)
+
+    def test_slot_free(self):
+        self.assertIs(self.index.slot_free(self.week, 'monday', '09:00', '09:30'), True)
+        self.assertIs(self.index.slot_free(self.week, 'monday', '9:00', '9:30'), True)
+        self.assertIs(self.index.slot_free(self.week, 'monday', '09:30', '10:00'), False)
+
+    def test_slot_free_is_none_for_slots_not_offered(self):
+        for start_time, end_time in [('09:00', '09:15'), ('09:00', '10:00'), ('10:15', '11:00'),
+                                     ('12:00', '12:30'), ('09:05', '09:30')]:
+            with self.subTest(start_time=start_time, end_time=end_time):
+                self.assertIsNone(self.index.slot_free(self.week, 'monday', start_time, end_time))
+        self.assertIsNone(self.index.slot_free(self.week, 'tuesday', '09:00', '09:30'))
+
+    def test_free_slots(self):
+        self.assertEqual(self.index.free_slots(self.week, 'monday'),
+                         [('09:00', '09:30'), ('10:00', '11:00'), ('14:00', '14:45')])
+        self.assertEqual(self.index.free_slots(self.week, 'tuesday'), [])
+
+    def test_mark_booked(self):
+        self.index.mark_booked(DOCTOR_UID, 'monday', '10:00', '11:00')
+
+        week = self.index.get(DOCTOR_UID)
+        self.assertIs(self.index.slot_free(week, 'monday', '10:00', '11:00'), False)
+        self.assertEqual(self.index.free_slots(week, 'monday'), [('09:00', '09:30'), ('14:00', '14:45')])
+
+    def test_overlapping_or_off_grid_schedules_are_not_indexed(self):
+        overlapping = [{'start_time': '09:00', 'end_time': '10:00'}, {'start_time': '09:30', 'end_time': '10:30'}]
+        off_grid = [{'start_time': '09:10', 'end_time': '09:40'}]
+        for time_slots in (overlapping, off_grid):
+            with self.subTest(time_slots=time_slots):
+                availability = [{'day': 'monday', 'is_available': True, 'time_slots': time_slots}]
+                self.assertIsNone(self.index.build({'is_active': True}, availability))
+
+
+class SlotSearchIndexTests(SimpleTestCase):
+    """SlotSearchIndex kept current by profile changes"""
+
+    def test_profile_change_keeps_multi_word_names(self):
+        availability = [{'day': 'monday', 'is_available': True,
+                         'time_slots': [{'start_time': '09:00', 'end_time': '10:00'}]}]
+        index = SlotSearchIndex(lambda: ([(DOCTOR_UID, {'first_name': 'Mary Ann', 'last_name': 'Smith'},
+                                           availability)], []))
+        self.assertEqual(index.search('monday')[0]['doctor_name'], 'Mary Ann Smith')
+
+        index.update_profile(DOCTOR_UID, {'last_name': 'Jones'})
+        self.assertEqual(index.search('monday')[0]['doctor_name'], 'Mary Ann Jones')
@@ -1,35 +1,29 @@
+from django.conf import settings
 from django.urls import path
-from .views import (
-    DoctorRegistrationView,
-    DoctorLoginView,
-    TokenRefreshView,
-    DoctorProfileView,
-    ToggleDoctorStatusView,
-    DoctorListView,
-    DoctorAvailabilityView,
-    CheckDoctorAvailabilityView,
-    BookAppointmentView,
-    CancelAppointmentView,
-    ListAppointmentsView
-)
+from . import views, async_views
 
+# Hot endpoints use their native async versions on ASGI deployments
 urlpatterns = [
     # Authentication endpoints
-    path('register/', DoctorRegistrationView.as_view(), name='doctor-register'),
-    path('login/', DoctorLoginView.as_view(), name='doctor-login'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
+    path('register/', views.DoctorRegistrationView.as_view(), name='doctor-register'),
+    path('login/', (async_views.DoctorLoginView if settings.ASYNC_VIEWS else views.DoctorLoginView).as_view(), name='doctor-login'),
+    path('token/refresh/', views.TokenRefreshView.as_view(), name='token-refresh'),
+    path('auth/cache-stats/', views.AuthCacheStatsView.as_view(), name='auth-cache-stats'),
     
     # Profile endpoints
-    path('profile/<str:uid>/', DoctorProfileView.as_view(), name='doctor-profile'),
-    path('toggle-status/<str:uid>/', ToggleDoctorStatusView.as_view(), name='toggle-doctor-status'),
-    path('list/', DoctorListView.as_view(), name='doctor-list'),
+    path('profile/<str:uid>/', views.DoctorProfileView.as_view(), name='doctor-profile'),
+    path('toggle-status/<str:uid>/', views.ToggleDoctorStatusView.as_view(), name='toggle-doctor-status'),
+    path('list/', (async_views.DoctorListView if settings.ASYNC_VIEWS else views.DoctorListView).as_view(), name='doctor-list'),
+    path('search/', views.DoctorSearchView.as_view(), name='doctor-search'),
     
     # Availability endpoints
-    path('availability/<str:uid>/', DoctorAvailabilityView.as_view(), name='doctor-availability'),
-    path('check-availability/<str:uid>/', CheckDoctorAvailabilityView.as_view(), name='check-doctor-availability'),
+    path('availability/<str:uid>/', views.DoctorAvailabilityView.as_view(), name='doctor-availability'),
+    path('check-availability/<str:uid>/', (async_views.CheckDoctorAvailabilityView if settings.ASYNC_VIEWS else views.CheckDoctorAvailabilityView).as_view(), name='check-doctor-availability'),
+    path('search-slots/', views.SlotSearchView.as_view(), name='search-slots'),
+    path('next-available/', views.NextAvailableView.as_view(), name='next-available'),
     
     # Appointment endpoints
-    path('book-appointment/<str:doctor_uid>/', BookAppointmentView.as_view(), name='book-appointment'),
-    path('cancel-appointment/<str:booking_id>/', CancelAppointmentView.as_view(), name='cancel-appointment'),
-    path('appointments/<str:doctor_uid>/', ListAppointmentsView.as_view(), name='list-appointments'),
+    path('book-appointment/<str:doctor_uid>/', (async_views.BookAppointmentView if settings.ASYNC_VIEWS else views.BookAppointmentView).as_view(), name='book-appointment'),
+    path('cancel-appointment/<str:booking_id>/', views.CancelAppointmentView.as_view(), name='cancel-appointment'),
+    path('appointments/<str:doctor_uid>/', (async_views.ListAppointmentsView if settings.ASYNC_VIEWS else views.ListAppointmentsView).as_view(), name='list-appointments'),
 ]
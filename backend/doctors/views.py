@@ -3,10 +3,23 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
 from django.views.decorators.csrf import csrf_exempt
+from django.utils import timezone
 from django.utils.decorators import method_decorator
 from firebase_admin import firestore
-from backend.firebase_init import db
-from datetime import datetime
+from backend.storage import (
+    doctor_repo,
+    patient_repo,
+    appointment_repo,
+    calendar_repo,
+    slot_repo,
+    EmailAlreadyRegistered,
+    InvalidCursor,
+    parse_page_params
+)
+from backend.utils import parse_fields, parse_date_range
+from backend.conditional import with_validator_fields, strip_fields, not_modified, add_validators
+from backend.response_cache import cache_response, invalidate
+from datetime import date, datetime, timedelta
 import uuid
 from .serializers import (
     DoctorRegistrationSerializer,
@@ -15,7 +28,60 @@ from .serializers import (
     AvailabilitySerializer,
     BookAppointmentSerializer
 )
-from .auth import hash_password, verify_password, generate_jwt_token, JWTAuthentication
+from .auth import (
+    hash_password,
+    verify_password,
+    password_needs_rehash,
+    schedule_password_rehash,
+    generate_jwt_token,
+    invalidate_principal,
+    revoke_tokens,
+    get_auth_cache_stats,
+    JWTAuthentication
+)
+from .password_pool import PasswordPoolBusy
+from .availability import (
+    slot_documents_enabled,
+    with_storage_field,
+    get_availability,
+    expand_availability,
+    save_availability,
+    availability_index,
+    slot_search,
+    indexed_check,
+    listed_check,
+    dated_check,
+    doctor_validators,
+    replicated_validators
+)
+from .doctor_search import doctor_search
+from .dated_slots import today, weekday, horizon_days, horizon_end, list_calendar
+from .booking import book_slot, cancel_booking, BookingError
+
+# Doctor fields clients may request with ?fields= (never the password hash)
+DOCTOR_FIELDS = [
+    'uid', 'email', 'first_name', 'last_name', 'phone_number', 'specialization',
+    'license_number', 'years_of_experience', 'bio', 'profile_picture',
+    'is_verified', 'is_active', 'availability', 'created_at', 'updated_at'
+]
+
+# Default projection for DoctorListView: everything but availability and timestamps
+DOCTOR_LIST_FIELDS = [
+    'uid', 'email', 'first_name', 'last_name', 'phone_number', 'specialization',
+    'years_of_experience', 'bio', 'profile_picture', 'is_verified', 'is_active'
+]
+
+# Patient fields rendered in ListAppointmentsView's patient_details
+PATIENT_DETAIL_FIELDS = [
+    'uid', 'first_name', 'last_name', 'email', 'phone_number',
+    'date_of_birth', 'address', 'emergency_contact'
+]
+
+
+def doctor_list_tags(request):
+    """Response cache tags of a doctor list; bookings only change it when availability is listed"""
+    fields = request.GET.get('fields') or ''
+    return ['doctors', 'doctors:availability'] if 'availability' in fields else ['doctors']
 
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -33,11 +99,6 @@ class DoctorRegistrationView(APIView):
         data.pop('password_confirm')
 
         try:
-            doctors_ref = db.collection('doctors')
-            existing = doctors_ref.where('email', '==', email).limit(1).stream()
-            if any(existing):
-                return Response({'error': 'Email already exists'}, status=status.HTTP_400_BAD_REQUEST)
-
             uid = str(uuid.uuid4())
             hashed_password = hash_password(password)
 
@@ -59,9 +120,14 @@ class DoctorRegistrationView(APIView):
                 'created_at': firestore.SERVER_TIMESTAMP,
                 'updated_at': firestore.SERVER_TIMESTAMP
             }
+            if slot_documents_enabled():
+                doctor_data['slot_storage'] = 'documents'
 
-            db.collection('doctors').document(uid).set(doctor_data)
-            tokens = generate_jwt_token(uid, email)
+            doctor_repo.register(uid, doctor_data)
+            slot_search.update(uid, doctor_data, [])
+            doctor_search.update(uid, doctor_data)
+            invalidate('doctors')
+            tokens = generate_jwt_token(uid, email, role='doctor')
 
             response_data = {
                 'uid': uid,
@@ -87,6 +153,14 @@ class DoctorRegistrationView(APIView):
                 'tokens': tokens
             }, status=status.HTTP_201_CREATED)
 
+        except EmailAlreadyRegistered:
+            return Response({'error': 'Email already exists'}, status=status.HTTP_400_BAD_REQUEST)
+        except PasswordPoolBusy:
+            return Response(
+                {'error': 'Server is busy, please retry shortly'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': '1'}
+            )
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -104,24 +178,22 @@ class DoctorLoginView(APIView):
         password = serializer.validated_data['password']
         
         try:
-            doctors_ref = db.collection('doctors')
-            docs = doctors_ref.where('email', '==', email).limit(1).stream()
+            doctor_data = doctor_repo.find_by_email(email)
             
-            doctor_doc = None
-            for doc in docs:
-                doctor_doc = doc
-                break
-            
-            if not doctor_doc:
+            if not doctor_data:
                 return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            doctor_data = doctor_doc.to_dict()
-            
             if not verify_password(password, doctor_data['password']):
                 return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            tokens = generate_jwt_token(doctor_data['uid'], email)
+            if password_needs_rehash(doctor_data['password']):
+                schedule_password_rehash('doctor', doctor_data['uid'], password)
+            
+            tokens = generate_jwt_token(
+                doctor_data['uid'], email, role='doctor', is_active=doctor_data.get('is_active', True)
+            )
             doctor_data.pop('password')
+            expand_availability(doctor_data['uid'], doctor_data)
             
             return Response({
                 'message': 'Login successful',
@@ -129,6 +201,12 @@ class DoctorLoginView(APIView):
                 'tokens': tokens
             }, status=status.HTTP_200_OK)
             
+        except PasswordPoolBusy:
+            return Response(
+                {'error': 'Server is busy, please retry shortly'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': '1'}
+            )
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -150,7 +228,14 @@ class TokenRefreshView(APIView):
             if payload.get('type') != 'refresh':
                 return Response({'error': 'Invalid token type'}, status=status.HTTP_400_BAD_REQUEST)
             
-            tokens = generate_jwt_token(payload['uid'], payload['email'])
+            uid, role = payload['uid'], payload.get('role', 'doctor')
+            # Sign the principal's current status, not the one the refresh token carries
+            repository = patient_repo if role == 'patient' else doctor_repo
+            principal = repository.get(uid, fields=['is_active'])
+            if principal is None:
+                return Response({'error': 'User not found'}, status=status.HTTP_401_UNAUTHORIZED)
+
+            tokens = generate_jwt_token(uid, payload['email'], role=role, is_active=principal.get('is_active', True))
             
             return Response({
                 'message': 'Token refreshed successfully',
@@ -166,18 +251,36 @@ class DoctorProfileView(APIView):
     permission_classes = [AllowAny]
     authentication_classes = [JWTAuthentication]
 
+    @cache_response(ttl=60, tags=['doctor:{uid}'])
     def get(self, request, uid):
         try:
-            doctor_ref = db.collection('doctors').document(uid)
-            doctor_doc = doctor_ref.get()
+            fields = parse_fields(request.query_params.get('fields'), DOCTOR_FIELDS)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # A client polling an unchanged profile is answered from the replica
+            response = not_modified(
+                request, replicated_validators(uid, fields is None or 'availability' in fields, fields)
+            )
+            if response is not None:
+                return response
+
+            doctor_data = doctor_repo.get(uid, fields=with_validator_fields(with_storage_field(fields)))
             
-            if not doctor_doc.exists:
+            if doctor_data is None:
                 return Response({'error': 'Doctor not found'}, status=status.HTTP_404_NOT_FOUND)
             
-            doctor_data = doctor_doc.to_dict()
             doctor_data.pop('password', None)
+            slot_documents = slot_repo.uses_documents(doctor_data)
+            expand_availability(uid, doctor_data)
+
+            current = doctor_validators([(uid, doctor_data, slot_documents)], fields)
+            response = not_modified(request, current)
+            if response is not None:
+                return response
             
-            return Response(doctor_data, status=status.HTTP_200_OK)
+            return add_validators(Response(strip_fields(doctor_data, fields), status=status.HTTP_200_OK), current)
             
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -188,21 +291,33 @@ class DoctorProfileView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            doctor_ref = db.collection('doctors').document(uid)
-            doctor_doc = doctor_ref.get()
+            doctor_data = doctor_repo.get(uid)
             
-            if not doctor_doc.exists:
+            if doctor_data is None:
                 return Response({'error': 'Doctor not found'}, status=status.HTTP_404_NOT_FOUND)
             
             update_data = {k: v for k, v in serializer.validated_data.items() 
                           if k not in ['uid', 'email', 'is_verified', 'created_at', 'password']}
             update_data['updated_at'] = firestore.SERVER_TIMESTAMP
             
-            doctor_ref.update(update_data)
+            if 'availability' in update_data:
+                save_availability(uid, doctor_data, update_data.pop('availability'), doctor_updates=update_data)
+            else:
+                doctor_repo.update(uid, update_data)
+                if 'is_active' in update_data:
+                    availability_index.set_active(uid, update_data['is_active'])
+                slot_search.update_profile(uid, update_data)
+            if 'is_active' in update_data:
+                # Tokens signed with the old status must not authenticate any more
+                revoke_tokens(uid)
+            else:
+                invalidate_principal(uid)
+            invalidate(f'doctor:{uid}', 'doctors')
             
-            updated_doc = doctor_ref.get()
-            updated_data = updated_doc.to_dict()
+            updated_data = doctor_repo.get(uid)
+            doctor_search.update(uid, updated_data)
             updated_data.pop('password', None)
+            expand_availability(uid, updated_data)
             
             return Response({
                 'message': 'Profile updated successfully',
@@ -219,20 +334,24 @@ class ToggleDoctorStatusView(APIView):
 
     def post(self, request, uid):
         try:
-            doctor_ref = db.collection('doctors').document(uid)
-            doctor_doc = doctor_ref.get()
+            doctor_data = doctor_repo.get(uid)
             
-            if not doctor_doc.exists:
+            if doctor_data is None:
                 return Response({'error': 'Doctor not found'}, status=status.HTTP_404_NOT_FOUND)
             
-            doctor_data = doctor_doc.to_dict()
             current_status = doctor_data.get('is_active', True)
             new_status = not current_status
             
-            doctor_ref.update({
+            doctor_repo.update(uid, {
                 'is_active': new_status,
                 'updated_at': firestore.SERVER_TIMESTAMP
             })
+            availability_index.set_active(uid, new_status)
+            slot_search.set_active(uid, new_status)
+            doctor_search.set_active(uid, new_status)
+            # Tokens signed with the old status must not authenticate any more
+            revoke_tokens(uid)
+            invalidate(f'doctor:{uid}', 'doctors')
             
             return Response({
                 'message': f'Doctor status changed to {"active" if new_status else "inactive"}',
@@ -247,27 +366,66 @@ class ToggleDoctorStatusView(APIView):
 class DoctorListView(APIView):
     permission_classes = [AllowAny]
 
+    @cache_response(ttl=30, tags=doctor_list_tags, stale_ttl=60)
     def get(self, request):
+        try:
+            fields = parse_fields(request.query_params.get('fields'), DOCTOR_FIELDS, DOCTOR_LIST_FIELDS)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
             active_only = request.query_params.get('active_only', 'false').lower() == 'true'
-            
-            doctors_ref = db.collection('doctors')
-            if active_only:
-                docs = doctors_ref.where('is_active', '==', True).stream()
-            else:
-                docs = doctors_ref.stream()
-            
-            doctor_list = []
-            for doc in docs:
-                doctor_data = doc.to_dict()
-                doctor_data.pop('password', None)
-                doctor_list.append(doctor_data)
-            
-            return Response({
-                'count': len(doctor_list),
-                'doctors': doctor_list
-            }, status=status.HTTP_200_OK)
-            
+            limit, cursor = parse_page_params(request.query_params)
+            
+            # The projection is applied by Firestore, so the password hash and
+            # availability arrays are never sent over the wire (or copied out
+            # of the doctors replica when it serves the page)
+            page = doctor_repo.page(
+                active_only=active_only, fields=with_validator_fields(with_storage_field(fields)), limit=limit,
+                cursor=cursor, replica=True
+            )
+            doctors = []
+            for doctor_data in page.items:
+                slot_documents = slot_repo.uses_documents(doctor_data)
+                expand_availability(doctor_data.get('uid'), doctor_data)
+                doctors.append((doctor_data.get('uid'), doctor_data, slot_documents))
+
+            # The page's documents and whether another page follows identify the response
+            current = doctor_validators(doctors, fields, active_only, limit, cursor, page.next_cursor)
+            response = not_modified(request, current)
+            if response is not None:
+                return response
+            
+            return add_validators(Response({
+                'count': len(page.items),
+                'doctors': [strip_fields(doctor_data, fields) for doctor_data in page.items],
+                'next_cursor': page.next_cursor
+            }, status=status.HTTP_200_OK), current)
+            
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class DoctorSearchView(APIView):
+    """Search-as-you-type over doctors' names, specializations and bios, with specialization facets"""
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        try:
+            limit, _ = parse_page_params(request.query_params)
+            result = doctor_search.search(
+                request.query_params.get('q', ''),
+                specialization=request.query_params.get('specialization'),
+                active_only=request.query_params.get('active_only', 'false').lower() == 'true',
+                limit=limit
+            )
+            return Response(result, status=status.HTTP_200_OK)
+
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -277,42 +435,85 @@ class DoctorAvailabilityView(APIView):
     permission_classes = [AllowAny]
     authentication_classes = [JWTAuthentication]
 
+    # No stale_ttl: slot states change with every booking, and with the
+    # per-process 'locmem' cache other workers only see one when the entry expires
+    @cache_response(ttl=30, tags=['doctor:{uid}'])
     def get(self, request, uid):
+        if 'from' in request.query_params or 'to' in request.query_params:
+            return self.get_calendar(request, uid)
+
         try:
-            doctor_ref = db.collection('doctors').document(uid)
-            doctor_doc = doctor_ref.get()
+            response = not_modified(request, replicated_validators(uid, True, 'availability'))
+            if response is not None:
+                return response
+
+            doctor_data = doctor_repo.get(uid)
             
-            if not doctor_doc.exists:
+            if doctor_data is None:
                 return Response({'error': 'Doctor not found'}, status=status.HTTP_404_NOT_FOUND)
             
-            doctor_data = doctor_doc.to_dict()
-            availability = doctor_data.get('availability', [])
+            availability = get_availability(uid, doctor_data)
+
+            current = doctor_validators([(uid, {
+                'updated_at': doctor_data.get('updated_at'),
+                'availability': availability
+            }, slot_repo.uses_documents(doctor_data))], 'availability')
+            response = not_modified(request, current)
+            if response is not None:
+                return response
             
-            return Response({
+            return add_validators(Response({
                 'uid': uid,
                 'availability': availability
-            }, status=status.HTTP_200_OK)
+            }, status=status.HTTP_200_OK), current)
             
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def get_calendar(self, request, uid):
+        """Dated slots between ?from= and ?to= (default: a week from today), read from the calendar only"""
+        try:
+            date_from, date_to = parse_date_range(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        date_from = date_from or today()
+        date_to = date_to or date_from + timedelta(days=6)
+        if date_from > date_to:
+            return Response({'error': "'from' must not be after 'to'"}, status=status.HTTP_400_BAD_REQUEST)
+        if (date_to - date_from).days >= horizon_days():
+            return Response({'error': f'The date range may span at most {horizon_days()} days'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            if doctor_repo.get(uid, fields=['uid']) is None:
+                return Response({'error': 'Doctor not found'}, status=status.HTTP_404_NOT_FOUND)
+
+            return Response({
+                'uid': uid,
+                'from': date_from.isoformat(),
+                'to': date_to.isoformat(),
+                'calendar': list_calendar(uid, date_from, date_to)
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
     def put(self, request, uid):
         serializer = AvailabilitySerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            doctor_ref = db.collection('doctors').document(uid)
-            doctor_doc = doctor_ref.get()
+            doctor_data = doctor_repo.get(uid)
             
-            if not doctor_doc.exists:
+            if doctor_data is None:
                 return Response({'error': 'Doctor not found'}, status=status.HTTP_404_NOT_FOUND)
             
             availability_data = serializer.validated_data['availability']
-            doctor_ref.update({
-                'availability': availability_data,
-                'updated_at': firestore.SERVER_TIMESTAMP
-            })
+            save_availability(uid, doctor_data, availability_data)
+            invalidate_principal(uid)
+            invalidate(f'doctor:{uid}', 'doctors')
             
             return Response({
                 'message': 'Availability updated successfully',
@@ -327,11 +528,22 @@ class DoctorAvailabilityView(APIView):
 class CheckDoctorAvailabilityView(APIView):
     permission_classes = [AllowAny]
 
+    # No stale_ttl, as for DoctorAvailabilityView
+    @cache_response(ttl=15, tags=['doctor:{uid}'])
     def get(self, request, uid):
         day = request.query_params.get('day', '').lower()
+        slot_date = None
+
+        if request.query_params.get('date'):
+            try:
+                slot_date = date.fromisoformat(request.query_params['date'])
+            except ValueError:
+                return Response({'error': "'date' must be a date in YYYY-MM-DD format"},
+                                status=status.HTTP_400_BAD_REQUEST)
+            day = weekday(slot_date)
         
         if not day:
-            return Response({'error': 'Day parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({'error': 'Day or date parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
         
         valid_days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
         if day not in valid_days:
@@ -339,15 +551,45 @@ class CheckDoctorAvailabilityView(APIView):
                 'error': f'Invalid day. Must be one of: {", ".join(valid_days)}'
             }, status=status.HTTP_400_BAD_REQUEST)
 
+        start_time = request.query_params.get('start_time')
+        end_time = request.query_params.get('end_time')
+        free_only = request.query_params.get('free_only', 'false').lower() == 'true'
+        if bool(start_time) != bool(end_time):
+            return Response({'error': 'start_time and end_time must be given together'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
         try:
-            doctor_ref = db.collection('doctors').document(uid)
-            doctor_doc = doctor_ref.get()
-            
-            if not doctor_doc.exists:
+            if slot_date is not None:
+                # Only that date's slots are read, not the weekly template
+                doctor_data = doctor_repo.get(uid, fields=['is_active'], replica=True)
+                if doctor_data is None:
+                    return Response({'error': 'Doctor not found'}, status=status.HTTP_404_NOT_FOUND)
+                if not doctor_data.get('is_active', True):
+                    return Response({
+                        'uid': uid,
+                        'date': slot_date.isoformat(),
+                        'day': day,
+                        'is_available': False,
+                        'message': 'Doctor is currently offline'
+                    }, status=status.HTTP_200_OK)
+                instances = calendar_repo.list_range(uid, slot_date, slot_date)
+                return Response(
+                    dated_check(uid, slot_date, instances, start_time, end_time, free_only),
+                    status=status.HTTP_200_OK
+                )
+
+            # Slot and free-slot checks are answered from the bitmap index;
+            # the full listing carries booking details the index does not hold
+            if start_time or free_only:
+                week = availability_index.get(uid)
+                if week is not None:
+                    return Response(indexed_check(uid, day, week, start_time, end_time), status=status.HTTP_200_OK)
+
+            doctor_data = doctor_repo.get(uid, replica=True)
+            
+            if doctor_data is None:
                 return Response({'error': 'Doctor not found'}, status=status.HTTP_404_NOT_FOUND)
             
-            doctor_data = doctor_doc.to_dict()
-            
             if not doctor_data.get('is_active', True):
                 return Response({
                     'uid': uid,
@@ -356,8 +598,7 @@ class CheckDoctorAvailabilityView(APIView):
                     'message': 'Doctor is currently offline'
                 }, status=status.HTTP_200_OK)
             
-            availability = doctor_data.get('availability', [])
-            day_availability = next((item for item in availability if item['day'] == day), None)
+            day_availability = next(iter(get_availability(uid, doctor_data, day)), None)
             
             if not day_availability:
                 return Response({
@@ -367,17 +608,84 @@ class CheckDoctorAvailabilityView(APIView):
                     'message': 'No availability set for this day'
                 }, status=status.HTTP_200_OK)
             
-            return Response({
-                'uid': uid,
-                'day': day,
-                'is_available': day_availability.get('is_available', False),
-                'time_slots': day_availability.get('time_slots', [])
-            }, status=status.HTTP_200_OK)
+            return Response(
+                listed_check(uid, day, day_availability, start_time, end_time, free_only),
+                status=status.HTTP_200_OK
+            )
             
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@method_decorator(csrf_exempt, name='dispatch')
+class SlotSearchView(APIView):
+    """Free slots across active doctors, earliest first, served from the slot search index"""
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        day = request.query_params.get('day', '').lower()
+        slot_date = None
+
+        if request.query_params.get('date'):
+            try:
+                slot_date = date.fromisoformat(request.query_params['date'])
+            except ValueError:
+                return Response({'error': "'date' must be a date in YYYY-MM-DD format"},
+                                status=status.HTTP_400_BAD_REQUEST)
+            if slot_date < today():
+                return Response({'error': "'date' must not be in the past"}, status=status.HTTP_400_BAD_REQUEST)
+            day = weekday(slot_date)
+
+        if not day:
+            return Response({'error': 'Day or date parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        valid_days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+        if day not in valid_days:
+            return Response({
+                'error': f'Invalid day. Must be one of: {", ".join(valid_days)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit, _ = parse_page_params(request.query_params)
+            slots = slot_search.search(
+                day,
+                specialization=request.query_params.get('specialization'),
+                slot_date=slot_date,
+                start_time=request.query_params.get('start_time'),
+                end_time=request.query_params.get('end_time'),
+                limit=limit
+            )
+            return Response({'count': len(slots), 'slots': slots}, status=status.HTTP_200_OK)
+
+        except (InvalidCursor, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class NextAvailableView(APIView):
+    """The earliest free slots across active doctors from now on, optionally of one specialization"""
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        try:
+            limit, _ = parse_page_params(request.query_params)
+            slots = slot_search.earliest(
+                today(),
+                horizon_end(),
+                after=timezone.localtime().strftime('%H:%M'),
+                specialization=request.query_params.get('specialization'),
+                limit=limit
+            )
+            return Response({'count': len(slots), 'slots': slots}, status=status.HTTP_200_OK)
+
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class BookAppointmentView(APIView):
     permission_classes = [AllowAny]
@@ -389,59 +697,8 @@ class BookAppointmentView(APIView):
 
         data = serializer.validated_data
         
-        try:
-            doctor_ref = db.collection('doctors').document(doctor_uid)
-            doctor_doc = doctor_ref.get()
-            
-            if not doctor_doc.exists:
-                return Response({'error': 'Doctor not found'}, status=status.HTTP_404_NOT_FOUND)
-            
-            doctor_data = doctor_doc.to_dict()
-            
-            if not doctor_data.get('is_active', True):
-                return Response({
-                    'error': 'Doctor is currently offline and not accepting appointments'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            availability = doctor_data.get('availability', [])
-            
-            day_index = None
-            for i, day_avail in enumerate(availability):
-                if day_avail['day'] == data['day']:
-                    day_index = i
-                    break
-            
-            if day_index is None:
-                return Response({
-                    'error': f'Doctor has no availability set for {data["day"]}'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            time_slots = availability[day_index].get('time_slots', [])
-            slot_index = None
-            
-            for i, slot in enumerate(time_slots):
-                if slot['start_time'] == data['start_time'] and slot['end_time'] == data['end_time']:
-                    slot_index = i
-                    break
-            
-            if slot_index is None:
-                return Response({'error': 'Requested time slot not found'}, status=status.HTTP_404_NOT_FOUND)
-            
-            if not time_slots[slot_index].get('is_available', True):
-                return Response({'error': 'This time slot is already booked'}, status=status.HTTP_400_BAD_REQUEST)
-            
-            booking_id = str(uuid.uuid4())
-            
-            availability[day_index]['time_slots'][slot_index]['is_available'] = False
-            availability[day_index]['time_slots'][slot_index]['booked_by'] = data['patient_email']
-            availability[day_index]['time_slots'][slot_index]['booking_id'] = booking_id
-            
-            doctor_ref.update({
-                'availability': availability,
-                'updated_at': firestore.SERVER_TIMESTAMP
-            })
-            
-            appointment_data = {
+        def build_appointment(doctor_data, booking_id):
+            return {
                 'booking_id': booking_id,
                 'doctor_uid': doctor_uid,
                 'doctor_name': f"{doctor_data['first_name']} {doctor_data['last_name']}",
@@ -455,9 +712,17 @@ class BookAppointmentView(APIView):
                 'status': 'confirmed',
                 'created_at': firestore.SERVER_TIMESTAMP
             }
-            
-            db.collection('appointments').document(booking_id).set(appointment_data)
-            
+
+        try:
+            # Slot check, slot update and appointment write in one transaction
+            appointment_data = book_slot(
+                doctor_uid, data['day'], data['start_time'], data['end_time'],
+                booked_by=data['patient_email'],
+                build_appointment=build_appointment,
+                slot_date=data.get('date')
+            )
+            booking_id = appointment_data['booking_id']
+
             return Response({
                 'message': 'Appointment booked successfully',
                 'booking_id': booking_id,
@@ -466,12 +731,15 @@ class BookAppointmentView(APIView):
                     'doctor_name': appointment_data['doctor_name'],
                     'patient_name': data['patient_name'],
                     'day': data['day'],
+                    'date': appointment_data.get('date'),
                     'start_time': data['start_time'],
                     'end_time': data['end_time'],
                     'status': 'confirmed'
                 }
             }, status=status.HTTP_201_CREATED)
-            
+
+        except BookingError as e:
+            return Response({'error': str(e)}, status=e.status_code)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -482,47 +750,15 @@ class CancelAppointmentView(APIView):
 
     def post(self, request, booking_id):
         try:
-            appointment_ref = db.collection('appointments').document(booking_id)
-            appointment_doc = appointment_ref.get()
-            
-            if not appointment_doc.exists:
-                return Response({'error': 'Appointment not found'}, status=status.HTTP_404_NOT_FOUND)
-            
-            appointment_data = appointment_doc.to_dict()
-            
-            doctor_ref = db.collection('doctors').document(appointment_data['doctor_uid'])
-            doctor_doc = doctor_ref.get()
-            
-            if doctor_doc.exists:
-                doctor_data = doctor_doc.to_dict()
-                availability = doctor_data.get('availability', [])
-                
-                for day_avail in availability:
-                    if day_avail['day'] == appointment_data['day']:
-                        for slot in day_avail.get('time_slots', []):
-                            if (slot.get('booking_id') == booking_id and
-                                slot['start_time'] == appointment_data['start_time'] and
-                                slot['end_time'] == appointment_data['end_time']):
-                                slot['is_available'] = True
-                                slot.pop('booked_by', None)
-                                slot.pop('booking_id', None)
-                                break
-                
-                doctor_ref.update({
-                    'availability': availability,
-                    'updated_at': firestore.SERVER_TIMESTAMP
-                })
-            
-            appointment_ref.update({
-                'status': 'cancelled',
-                'cancelled_at': firestore.SERVER_TIMESTAMP
-            })
-            
+            cancel_booking(booking_id)
+
             return Response({
                 'message': 'Appointment cancelled successfully',
                 'booking_id': booking_id
             }, status=status.HTTP_200_OK)
-            
+
+        except BookingError as e:
+            return Response({'error': str(e)}, status=e.status_code)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -531,39 +767,63 @@ class CancelAppointmentView(APIView):
 class ListAppointmentsView(APIView):
     permission_classes = [AllowAny]
 
+    @cache_response(ttl=15, tags=['appointments:doctor:{doctor_uid}'])
     def get(self, request, doctor_uid):
         try:
-            appointments_ref = db.collection('appointments')
-            docs = appointments_ref.where('doctor_uid', '==', doctor_uid).stream()
-            
-            appointments = []
-            for doc in docs:
-                appointment_data = doc.to_dict()
-                
-                if 'patient_uid' in appointment_data:
-                    patient_ref = db.collection('patients').document(appointment_data['patient_uid'])
-                    patient_doc = patient_ref.get()
-                    
-                    if patient_doc.exists:
-                        patient_data = patient_doc.to_dict()
-                        appointment_data['patient_details'] = {
-                            'uid': patient_data.get('uid'),
-                            'name': f"{patient_data.get('first_name', '')} {patient_data.get('last_name', '')}",
-                            'email': patient_data.get('email'),
-                            'phone_number': patient_data.get('phone_number'),
-                            'date_of_birth': patient_data.get('date_of_birth'),
-                            'address': patient_data.get('address'),
-                            'emergency_contact': patient_data.get('emergency_contact')
-                        }
+            date_from, date_to = parse_date_range(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        appointment_status = request.query_params.get('status')
+        if appointment_status and appointment_status not in appointment_repo.statuses:
+            return Response({
+                'error': f"status must be one of: {', '.join(appointment_repo.statuses)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit, cursor = parse_page_params(request.query_params)
+            page = appointment_repo.page_for_doctor(
+                doctor_uid,
+                status=appointment_status,
+                date_from=date_from,
+                date_to=date_to,
+                limit=limit,
+                cursor=cursor
+            )
+            appointments = page.items
+            
+            patient_uids = [a['patient_uid'] for a in appointments if 'patient_uid' in a]
+            patients = patient_repo.get_many(patient_uids, fields=PATIENT_DETAIL_FIELDS)
+            
+            for appointment_data in appointments:
+                patient_data = patients.get(appointment_data.get('patient_uid'))
                 
-                appointments.append(appointment_data)
-            
-            appointments.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+                if patient_data is not None:
+                    appointment_data['patient_details'] = {
+                        'uid': patient_data.get('uid'),
+                        'name': f"{patient_data.get('first_name', '')} {patient_data.get('last_name', '')}",
+                        'email': patient_data.get('email'),
+                        'phone_number': patient_data.get('phone_number'),
+                        'date_of_birth': patient_data.get('date_of_birth'),
+                        'address': patient_data.get('address'),
+                        'emergency_contact': patient_data.get('emergency_contact')
+                    }
             
             return Response({
                 'count': len(appointments),
-                'appointments': appointments
+                'appointments': appointments,
+                'next_cursor': page.next_cursor
             }, status=status.HTTP_200_OK)
             
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AuthCacheStatsView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        return Response(get_auth_cache_stats(), status=status.HTTP_200_OK)
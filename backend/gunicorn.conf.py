@@ -0,0 +1,24 @@
+"""
+Gunicorn settings, picked up automatically when gunicorn runs from this
+directory (see render.yaml).
+
+The Firestore client, thread pools and bcrypt processes are all created
+lazily per process, so the app can be preloaded in the master and shared
+copy-on-write by the workers. Each worker then runs settings.WARMUP_HOOKS
+before it accepts its first request.
+"""
+
+import os
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True') == 'True'
+
+
+def post_worker_init(worker):
+    from django.conf import settings
+
+    if not getattr(settings, 'WARMUP_ON_START', True):
+        return
+    from backend.warmup import run_warmup
+
+    report = run_warmup()
+    worker.log.info('Worker %s warmed up: %s', worker.pid, report)
@@ -0,0 +1,71 @@
+"""
+Native async version of the doctor's patient health view.
+
+Served instead of the APIView in views.py when settings.ASYNC_VIEWS is
+True (ASGI deployments); see doctors/async_views.py.
+"""
+
+from rest_framework import status
+from backend.async_views import AsyncAPIView, json_response
+from backend.concurrency import afan_out
+from backend.storage import patient_repo, health_repo
+
+
+class DoctorViewPatientHealthView(AsyncAPIView):
+
+    async def get(self, request, patient_uid):
+        try:
+            reads = await afan_out({
+                'patient': lambda: patient_repo.aget(patient_uid),
+                'health_tracking': lambda: health_repo.alist_tracking(patient_uid),
+                'medical_tests': lambda: health_repo.alist_tests(patient_uid),
+                'preventive_checkups': lambda: health_repo.alist_checkups(patient_uid)
+            })
+
+            if 'patient' in reads.errors:
+                return json_response({
+                    'error': f"Failed to load patient: {reads.errors['patient']}",
+                    'errors': reads.errors
+                }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+            patient_data = reads['patient']
+            if patient_data is None:
+                return json_response({'error': 'Patient not found'}, status=status.HTTP_404_NOT_FOUND)
+
+            patient_data.pop('password', None)
+
+            tracking_list = reads.get('health_tracking', [])
+            tests = reads.get('medical_tests', [])
+            checkups = reads.get('preventive_checkups', [])
+
+            total_days = len(tracking_list)
+            avg_steps = sum(t.get('steps_taken', 0) for t in tracking_list) / total_days if total_days > 0 else 0
+            avg_sleep = sum(t.get('hours_sleep', 0) for t in tracking_list) / total_days if total_days > 0 else 0
+
+            return json_response({
+                'patient_info': {
+                    'uid': patient_data.get('uid'),
+                    'name': f"{patient_data.get('first_name', '')} {patient_data.get('last_name', '')}",
+                    'email': patient_data.get('email'),
+                    'phone_number': patient_data.get('phone_number'),
+                    'date_of_birth': patient_data.get('date_of_birth'),
+                    'address': patient_data.get('address'),
+                    'emergency_contact': patient_data.get('emergency_contact')
+                },
+                'health_summary': {
+                    'total_days_tracked': total_days,
+                    'avg_steps_per_day': round(avg_steps, 2),
+                    'avg_sleep_hours': round(avg_sleep, 2),
+                    'total_medical_tests': len(tests),
+                    'total_preventive_checkups': len(checkups)
+                },
+                'recent_tracking': tracking_list[:30],
+                'medical_tests': tests,
+                'preventive_checkups': checkups,
+                # Sections that failed or missed the deadline are returned empty
+                'partial': not reads.ok,
+                'errors': reads.errors
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return json_response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -5,7 +5,10 @@ from rest_framework.permissions import AllowAny
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from firebase_admin import firestore
-from backend.firebase_init import db
+from backend.storage import patient_repo, health_repo, InvalidCursor, parse_page_params
+from backend.concurrency import fan_out
+from backend.utils import parse_date_range
+from backend.response_cache import cache_response, invalidate, uncacheable
 from datetime import datetime
 import uuid
 from .serializers import (
@@ -29,8 +32,6 @@ class PatientHealthGoalView(APIView):
         tracking_date = str(data['date'])
         
         try:
-            doc_id = f"{patient_uid}_{tracking_date}"
-            
             tracking_data = {
                 'patient_uid': patient_uid,
                 'date': tracking_date,
@@ -43,7 +44,8 @@ class PatientHealthGoalView(APIView):
                 'updated_at': firestore.SERVER_TIMESTAMP
             }
             
-            db.collection('health_tracking').document(doc_id).set(tracking_data, merge=True)
+            health_repo.save_tracking(patient_uid, tracking_date, tracking_data)
+            invalidate(f'health:{patient_uid}')
             
             return Response({
                 'message': 'Health goals tracked successfully',
@@ -53,32 +55,35 @@ class PatientHealthGoalView(APIView):
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @cache_response(ttl=60, tags=['health:{patient_uid}'])
     def get(self, request, patient_uid):
         tracking_date = request.query_params.get('date')
         
+        try:
+            date_from, date_to = parse_date_range(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
             if tracking_date:
-                doc_id = f"{patient_uid}_{tracking_date}"
-                doc = db.collection('health_tracking').document(doc_id).get()
+                tracking_data = health_repo.get_tracking(patient_uid, tracking_date)
                 
-                if doc.exists:
-                    return Response(doc.to_dict(), status=status.HTTP_200_OK)
+                if tracking_data is not None:
+                    return Response(tracking_data, status=status.HTTP_200_OK)
                 else:
                     return Response({'message': 'No data for this date'}, status=status.HTTP_404_NOT_FOUND)
             else:
-                docs = db.collection('health_tracking').where('patient_uid', '==', patient_uid).stream()
-                
-                tracking_list = []
-                for doc in docs:
-                    tracking_list.append(doc.to_dict())
-                
-                tracking_list.sort(key=lambda x: x.get('date', ''), reverse=True)
+                limit, cursor = parse_page_params(request.query_params)
+                page = health_repo.page_tracking(patient_uid, date_from, date_to, limit=limit, cursor=cursor)
                 
                 return Response({
-                    'count': len(tracking_list),
-                    'tracking': tracking_list
+                    'count': len(page.items),
+                    'tracking': page.items,
+                    'next_cursor': page.next_cursor
                 }, status=status.HTTP_200_OK)
                 
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -109,7 +114,8 @@ class PatientMedicalTestView(APIView):
                 'created_at': firestore.SERVER_TIMESTAMP
             }
             
-            db.collection('medical_tests').document(test_id).set(test_data)
+            health_repo.add_test(test_id, test_data)
+            invalidate(f'health:{patient_uid}')
             
             return Response({
                 'message': 'Medical test added successfully',
@@ -120,21 +126,25 @@ class PatientMedicalTestView(APIView):
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @cache_response(ttl=60, tags=['health:{patient_uid}'])
     def get(self, request, patient_uid):
         try:
-            docs = db.collection('medical_tests').where('patient_uid', '==', patient_uid).stream()
-            
-            tests = []
-            for doc in docs:
-                tests.append(doc.to_dict())
-            
-            tests.sort(key=lambda x: x.get('test_date', ''), reverse=True)
+            date_from, date_to = parse_date_range(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit, cursor = parse_page_params(request.query_params)
+            page = health_repo.page_tests(patient_uid, date_from, date_to, limit=limit, cursor=cursor)
             
             return Response({
-                'count': len(tests),
-                'tests': tests
+                'count': len(page.items),
+                'tests': page.items,
+                'next_cursor': page.next_cursor
             }, status=status.HTTP_200_OK)
             
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -165,7 +175,8 @@ class PatientPreventiveCheckupView(APIView):
                 'created_at': firestore.SERVER_TIMESTAMP
             }
             
-            db.collection('preventive_checkups').document(checkup_id).set(checkup_data)
+            health_repo.add_checkup(checkup_id, checkup_data)
+            invalidate(f'health:{patient_uid}')
             
             return Response({
                 'message': 'Preventive checkup added successfully',
@@ -176,21 +187,25 @@ class PatientPreventiveCheckupView(APIView):
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @cache_response(ttl=60, tags=['health:{patient_uid}'])
     def get(self, request, patient_uid):
         try:
-            docs = db.collection('preventive_checkups').where('patient_uid', '==', patient_uid).stream()
-            
-            checkups = []
-            for doc in docs:
-                checkups.append(doc.to_dict())
-            
-            checkups.sort(key=lambda x: x.get('checkup_date', ''), reverse=True)
+            date_from, date_to = parse_date_range(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit, cursor = parse_page_params(request.query_params)
+            page = health_repo.page_checkups(patient_uid, date_from, date_to, limit=limit, cursor=cursor)
             
             return Response({
-                'count': len(checkups),
-                'checkups': checkups
+                'count': len(page.items),
+                'checkups': page.items,
+                'next_cursor': page.next_cursor
             }, status=status.HTTP_200_OK)
             
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -199,34 +214,37 @@ class PatientPreventiveCheckupView(APIView):
 class DoctorViewPatientHealthView(APIView):
     permission_classes = [AllowAny]
 
+    @cache_response(ttl=60, tags=['patient:{patient_uid}', 'health:{patient_uid}'])
     def get(self, request, patient_uid):
         try:
-            patient_ref = db.collection('patients').document(patient_uid)
-            patient_doc = patient_ref.get()
+            reads = fan_out({
+                'patient': lambda: patient_repo.get(patient_uid),
+                'health_tracking': lambda: health_repo.list_tracking(patient_uid),
+                'medical_tests': lambda: health_repo.list_tests(patient_uid),
+                'preventive_checkups': lambda: health_repo.list_checkups(patient_uid)
+            })
             
-            if not patient_doc.exists:
+            if 'patient' in reads.errors:
+                return Response({
+                    'error': f"Failed to load patient: {reads.errors['patient']}",
+                    'errors': reads.errors
+                }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            
+            patient_data = reads['patient']
+            if patient_data is None:
                 return Response({'error': 'Patient not found'}, status=status.HTTP_404_NOT_FOUND)
             
-            patient_data = patient_doc.to_dict()
             patient_data.pop('password', None)
             
-            tracking_docs = db.collection('health_tracking').where('patient_uid', '==', patient_uid).stream()
-            tracking_list = [doc.to_dict() for doc in tracking_docs]
-            tracking_list.sort(key=lambda x: x.get('date', ''), reverse=True)
-            
-            test_docs = db.collection('medical_tests').where('patient_uid', '==', patient_uid).stream()
-            tests = [doc.to_dict() for doc in test_docs]
-            tests.sort(key=lambda x: x.get('test_date', ''), reverse=True)
-            
-            checkup_docs = db.collection('preventive_checkups').where('patient_uid', '==', patient_uid).stream()
-            checkups = [doc.to_dict() for doc in checkup_docs]
-            checkups.sort(key=lambda x: x.get('checkup_date', ''), reverse=True)
+            tracking_list = reads.get('health_tracking', [])
+            tests = reads.get('medical_tests', [])
+            checkups = reads.get('preventive_checkups', [])
             
             total_days = len(tracking_list)
             avg_steps = sum(t.get('steps_taken', 0) for t in tracking_list) / total_days if total_days > 0 else 0
             avg_sleep = sum(t.get('hours_sleep', 0) for t in tracking_list) / total_days if total_days > 0 else 0
             
-            return Response({
+            response = Response({
                 'patient_info': {
                     'uid': patient_data.get('uid'),
                     'name': f"{patient_data.get('first_name', '')} {patient_data.get('last_name', '')}",
@@ -245,8 +263,13 @@ class DoctorViewPatientHealthView(APIView):
                 },
                 'recent_tracking': tracking_list[:30],
                 'medical_tests': tests,
-                'preventive_checkups': checkups
+                'preventive_checkups': checkups,
+                # Sections that failed or missed the deadline are returned empty
+                'partial': not reads.ok,
+                'errors': reads.errors
             }, status=status.HTTP_200_OK)
+            # A degraded response is not cached, so the next request retries the failed reads
+            return response if reads.ok else uncacheable(response)
             
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,168 @@
+"""
+Native async versions of the hot patient endpoints.
+
+Served instead of the APIViews in views.py when settings.ASYNC_VIEWS is
+True (ASGI deployments); see doctors/async_views.py.
+"""
+
+from rest_framework import status
+from firebase_admin import firestore
+from backend.async_views import AsyncAPIView, json_response
+from backend.storage import patient_repo, appointment_repo, InvalidCursor, parse_page_params
+from backend.utils import parse_date_range
+from backend.response_cache import cache_response
+from doctors.auth import (
+    averify_password,
+    password_needs_rehash,
+    schedule_password_rehash,
+    generate_jwt_token
+)
+from doctors.password_pool import PasswordPoolBusy
+from doctors.booking import abook_slot, BookingError
+from .serializers import PatientLoginSerializer, BookAppointmentSerializer
+
+
+class PatientLoginView(AsyncAPIView):
+
+    async def post(self, request):
+        serializer = PatientLoginSerializer(data=request.data)
+        if not serializer.is_valid():
+            return json_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        email = serializer.validated_data['email']
+        password = serializer.validated_data['password']
+
+        try:
+            patient_data = await patient_repo.afind_by_email(email)
+
+            if not patient_data:
+                return json_response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+
+            if not await averify_password(password, patient_data['password']):
+                return json_response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+
+            if password_needs_rehash(patient_data['password']):
+                schedule_password_rehash('patient', patient_data['uid'], password)
+
+            tokens = generate_jwt_token(patient_data['uid'], email, role='patient')
+            patient_data.pop('password')
+
+            return json_response({
+                'message': 'Login successful',
+                'patient': patient_data,
+                'tokens': tokens
+            }, status=status.HTTP_200_OK)
+
+        except PasswordPoolBusy:
+            return json_response(
+                {'error': 'Server is busy, please retry shortly'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': '1'}
+            )
+        except Exception as e:
+            return json_response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class PatientBookAppointmentView(AsyncAPIView):
+
+    async def post(self, request, doctor_uid):
+        serializer = BookAppointmentSerializer(data=request.data)
+        if not serializer.is_valid():
+            return json_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        patient_uid = request.data.get('patient_uid')
+
+        if not patient_uid:
+            return json_response({'error': 'patient_uid is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            patient_data = await patient_repo.aget(patient_uid)
+
+            if patient_data is None:
+                return json_response({'error': 'Patient not found'}, status=status.HTTP_404_NOT_FOUND)
+
+            def build_appointment(doctor_data, booking_id):
+                return {
+                    'booking_id': booking_id,
+                    'doctor_uid': doctor_uid,
+                    'doctor_name': f"{doctor_data['first_name']} {doctor_data['last_name']}",
+                    'doctor_specialization': doctor_data.get('specialization', ''),
+                    'patient_uid': patient_uid,
+                    'patient_name': f"{patient_data['first_name']} {patient_data['last_name']}",
+                    'patient_email': patient_data['email'],
+                    'patient_phone': patient_data.get('phone_number', ''),
+                    'day': data['day'],
+                    'start_time': data['start_time'],
+                    'end_time': data['end_time'],
+                    'reason': data.get('reason', ''),
+                    'status': 'confirmed',
+                    'created_at': firestore.SERVER_TIMESTAMP
+                }
+
+            appointment_data = await abook_slot(
+                doctor_uid, data['day'], data['start_time'], data['end_time'],
+                booked_by=patient_data['email'],
+                build_appointment=build_appointment,
+                slot_date=data.get('date')
+            )
+            booking_id = appointment_data['booking_id']
+
+            return json_response({
+                'message': 'Appointment booked successfully',
+                'booking_id': booking_id,
+                'appointment': {
+                    'booking_id': booking_id,
+                    'doctor_name': appointment_data['doctor_name'],
+                    'doctor_specialization': appointment_data['doctor_specialization'],
+                    'patient_name': appointment_data['patient_name'],
+                    'day': data['day'],
+                    'date': appointment_data.get('date'),
+                    'start_time': data['start_time'],
+                    'end_time': data['end_time'],
+                    'status': 'confirmed'
+                }
+            }, status=status.HTTP_201_CREATED)
+
+        except BookingError as e:
+            return json_response({'error': str(e)}, status=e.status_code)
+        except Exception as e:
+            return json_response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class PatientAppointmentsView(AsyncAPIView):
+
+    @cache_response(ttl=15, tags=['appointments:patient:{patient_uid}'])
+    async def get(self, request, patient_uid):
+        try:
+            date_from, date_to = parse_date_range(request.query_params)
+        except ValueError as e:
+            return json_response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        appointment_status = request.query_params.get('status')
+        if appointment_status and appointment_status not in appointment_repo.statuses:
+            return json_response({
+                'error': f"status must be one of: {', '.join(appointment_repo.statuses)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit, cursor = parse_page_params(request.query_params)
+            page = await appointment_repo.apage_for_patient(
+                patient_uid,
+                status=appointment_status,
+                date_from=date_from,
+                date_to=date_to,
+                limit=limit,
+                cursor=cursor
+            )
+
+            return json_response({
+                'count': len(page.items),
+                'appointments': page.items,
+                'next_cursor': page.next_cursor
+            }, status=status.HTTP_200_OK)
+
+        except InvalidCursor as e:
+            return json_response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return json_response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -1,20 +1,14 @@
+from django.conf import settings
 from django.urls import path
-from .views import (
-    PatientRegistrationView,
-    PatientLoginView,
-    TokenRefreshView,
-    PatientProfileView,
-    PatientBookAppointmentView,
-    PatientAppointmentsView,
-    PatientCancelAppointmentView
-)
+from . import views, async_views
 
+# Hot endpoints use their native async versions on ASGI deployments
 urlpatterns = [
-    path('register/', PatientRegistrationView.as_view(), name='patient-register'),
-    path('login/', PatientLoginView.as_view(), name='patient-login'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='patient-token-refresh'),
-    path('profile/<str:uid>/', PatientProfileView.as_view(), name='patient-profile'),
-    path('book-appointment/<str:doctor_uid>/', PatientBookAppointmentView.as_view(), name='patient-book-appointment'),
-    path('appointments/<str:patient_uid>/', PatientAppointmentsView.as_view(), name='patient-appointments'),
-    path('cancel-appointment/<str:booking_id>/', PatientCancelAppointmentView.as_view(), name='patient-cancel-appointment'),
+    path('register/', views.PatientRegistrationView.as_view(), name='patient-register'),
+    path('login/', (async_views.PatientLoginView if settings.ASYNC_VIEWS else views.PatientLoginView).as_view(), name='patient-login'),
+    path('token/refresh/', views.TokenRefreshView.as_view(), name='patient-token-refresh'),
+    path('profile/<str:uid>/', views.PatientProfileView.as_view(), name='patient-profile'),
+    path('book-appointment/<str:doctor_uid>/', (async_views.PatientBookAppointmentView if settings.ASYNC_VIEWS else views.PatientBookAppointmentView).as_view(), name='patient-book-appointment'),
+    path('appointments/<str:patient_uid>/', (async_views.PatientAppointmentsView if settings.ASYNC_VIEWS else views.PatientAppointmentsView).as_view(), name='patient-appointments'),
+    path('cancel-appointment/<str:booking_id>/', views.PatientCancelAppointmentView.as_view(), name='patient-cancel-appointment'),
 ]
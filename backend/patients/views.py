@@ -5,7 +5,10 @@ from rest_framework.permissions import AllowAny
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from firebase_admin import firestore
-from backend.firebase_init import db
+from backend.storage import patient_repo, appointment_repo, EmailAlreadyRegistered, InvalidCursor, parse_page_params
+from backend.utils import parse_fields, parse_date_range
+from backend.conditional import validators, with_validator_fields, strip_fields, not_modified, add_validators
+from backend.response_cache import cache_response, invalidate
 from datetime import datetime
 import uuid
 from .serializers import (
@@ -14,7 +17,23 @@ from .serializers import (
     PatientProfileSerializer,
     BookAppointmentSerializer
 )
-from doctors.auth import hash_password, verify_password, generate_jwt_token, JWTAuthentication
+from doctors.auth import (
+    hash_password,
+    verify_password,
+    password_needs_rehash,
+    schedule_password_rehash,
+    generate_jwt_token,
+    JWTAuthentication
+)
+from doctors.password_pool import PasswordPoolBusy
+from doctors.booking import book_slot, cancel_booking, BookingError
+
+
+# Patient fields clients may request with ?fields= (never the password hash)
+PATIENT_FIELDS = [
+    'uid', 'email', 'first_name', 'last_name', 'phone_number', 'date_of_birth',
+    'address', 'emergency_contact', 'profile_picture', 'created_at', 'updated_at'
+]
 
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -32,11 +51,6 @@ class PatientRegistrationView(APIView):
         data.pop('password_confirm')
 
         try:
-            patients_ref = db.collection('patients')
-            existing = patients_ref.where('email', '==', email).limit(1).stream()
-            if any(existing):
-                return Response({'error': 'Email already exists'}, status=status.HTTP_400_BAD_REQUEST)
-
             uid = str(uuid.uuid4())
             hashed_password = hash_password(password)
 
@@ -55,8 +69,8 @@ class PatientRegistrationView(APIView):
                 'updated_at': firestore.SERVER_TIMESTAMP
             }
 
-            db.collection('patients').document(uid).set(patient_data)
-            tokens = generate_jwt_token(uid, email)
+            patient_repo.register(uid, patient_data)
+            tokens = generate_jwt_token(uid, email, role='patient')
 
             response_data = {
                 'uid': uid,
@@ -78,6 +92,14 @@ class PatientRegistrationView(APIView):
                 'tokens': tokens
             }, status=status.HTTP_201_CREATED)
 
+        except EmailAlreadyRegistered:
+            return Response({'error': 'Email already exists'}, status=status.HTTP_400_BAD_REQUEST)
+        except PasswordPoolBusy:
+            return Response(
+                {'error': 'Server is busy, please retry shortly'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': '1'}
+            )
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -95,23 +117,18 @@ class PatientLoginView(APIView):
         password = serializer.validated_data['password']
         
         try:
-            patients_ref = db.collection('patients')
-            docs = patients_ref.where('email', '==', email).limit(1).stream()
+            patient_data = patient_repo.find_by_email(email)
             
-            patient_doc = None
-            for doc in docs:
-                patient_doc = doc
-                break
-            
-            if not patient_doc:
+            if not patient_data:
                 return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            patient_data = patient_doc.to_dict()
-            
             if not verify_password(password, patient_data['password']):
                 return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            tokens = generate_jwt_token(patient_data['uid'], email)
+            if password_needs_rehash(patient_data['password']):
+                schedule_password_rehash('patient', patient_data['uid'], password)
+            
+            tokens = generate_jwt_token(patient_data['uid'], email, role='patient')
             patient_data.pop('password')
             
             return Response({
@@ -120,6 +137,12 @@ class PatientLoginView(APIView):
                 'tokens': tokens
             }, status=status.HTTP_200_OK)
             
+        except PasswordPoolBusy:
+            return Response(
+                {'error': 'Server is busy, please retry shortly'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': '1'}
+            )
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -141,7 +164,9 @@ class TokenRefreshView(APIView):
             if payload.get('type') != 'refresh':
                 return Response({'error': 'Invalid token type'}, status=status.HTTP_400_BAD_REQUEST)
             
-            tokens = generate_jwt_token(payload['uid'], payload['email'])
+            tokens = generate_jwt_token(
+                payload['uid'], payload['email'], role=payload.get('role', 'patient')
+            )
             
             return Response({
                 'message': 'Token refreshed successfully',
@@ -157,18 +182,27 @@ class PatientProfileView(APIView):
     permission_classes = [AllowAny]
     authentication_classes = [JWTAuthentication]
 
+    @cache_response(ttl=60, tags=['patient:{uid}'])
     def get(self, request, uid):
         try:
-            patient_ref = db.collection('patients').document(uid)
-            patient_doc = patient_ref.get()
+            fields = parse_fields(request.query_params.get('fields'), PATIENT_FIELDS)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            patient_data = patient_repo.get(uid, fields=with_validator_fields(fields))
             
-            if not patient_doc.exists:
+            if patient_data is None:
                 return Response({'error': 'Patient not found'}, status=status.HTTP_404_NOT_FOUND)
+
+            current = validators([(uid, patient_data.get('updated_at'))], fields)
+            response = not_modified(request, current)
+            if response is not None:
+                return response
             
-            patient_data = patient_doc.to_dict()
             patient_data.pop('password', None)
             
-            return Response(patient_data, status=status.HTTP_200_OK)
+            return add_validators(Response(strip_fields(patient_data, fields), status=status.HTTP_200_OK), current)
             
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -179,20 +213,19 @@ class PatientProfileView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            patient_ref = db.collection('patients').document(uid)
-            patient_doc = patient_ref.get()
+            patient_data = patient_repo.get(uid)
             
-            if not patient_doc.exists:
+            if patient_data is None:
                 return Response({'error': 'Patient not found'}, status=status.HTTP_404_NOT_FOUND)
             
             update_data = {k: v for k, v in serializer.validated_data.items() 
                           if k not in ['uid', 'email', 'created_at', 'password']}
             update_data['updated_at'] = firestore.SERVER_TIMESTAMP
             
-            patient_ref.update(update_data)
+            patient_repo.update(uid, update_data)
+            invalidate(f'patient:{uid}')
             
-            updated_doc = patient_ref.get()
-            updated_data = updated_doc.to_dict()
+            updated_data = patient_repo.get(uid)
             updated_data.pop('password', None)
             
             return Response({
@@ -220,84 +253,38 @@ class PatientBookAppointmentView(APIView):
             return Response({'error': 'patient_uid is required'}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            patient_ref = db.collection('patients').document(patient_uid)
-            patient_doc = patient_ref.get()
+            patient_data = patient_repo.get(patient_uid)
             
-            if not patient_doc.exists:
+            if patient_data is None:
                 return Response({'error': 'Patient not found'}, status=status.HTTP_404_NOT_FOUND)
             
-            patient_data = patient_doc.to_dict()
-            
-            doctor_ref = db.collection('doctors').document(doctor_uid)
-            doctor_doc = doctor_ref.get()
-            
-            if not doctor_doc.exists:
-                return Response({'error': 'Doctor not found'}, status=status.HTTP_404_NOT_FOUND)
-            
-            doctor_data = doctor_doc.to_dict()
-            
-            if not doctor_data.get('is_active', True):
-                return Response({
-                    'error': 'Doctor is currently offline and not accepting appointments'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            availability = doctor_data.get('availability', [])
-            
-            day_index = None
-            for i, day_avail in enumerate(availability):
-                if day_avail['day'] == data['day']:
-                    day_index = i
-                    break
-            
-            if day_index is None:
-                return Response({
-                    'error': f'Doctor has no availability set for {data["day"]}'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            time_slots = availability[day_index].get('time_slots', [])
-            slot_index = None
-            
-            for i, slot in enumerate(time_slots):
-                if slot['start_time'] == data['start_time'] and slot['end_time'] == data['end_time']:
-                    slot_index = i
-                    break
-            
-            if slot_index is None:
-                return Response({'error': 'Requested time slot not found'}, status=status.HTTP_404_NOT_FOUND)
-            
-            if not time_slots[slot_index].get('is_available', True):
-                return Response({'error': 'This time slot is already booked'}, status=status.HTTP_400_BAD_REQUEST)
-            
-            booking_id = str(uuid.uuid4())
-            
-            availability[day_index]['time_slots'][slot_index]['is_available'] = False
-            availability[day_index]['time_slots'][slot_index]['booked_by'] = patient_data['email']
-            availability[day_index]['time_slots'][slot_index]['booking_id'] = booking_id
-            
-            doctor_ref.update({
-                'availability': availability,
-                'updated_at': firestore.SERVER_TIMESTAMP
-            })
-            
-            appointment_data = {
-                'booking_id': booking_id,
-                'doctor_uid': doctor_uid,
-                'doctor_name': f"{doctor_data['first_name']} {doctor_data['last_name']}",
-                'doctor_specialization': doctor_data.get('specialization', ''),
-                'patient_uid': patient_uid,
-                'patient_name': f"{patient_data['first_name']} {patient_data['last_name']}",
-                'patient_email': patient_data['email'],
-                'patient_phone': patient_data.get('phone_number', ''),
-                'day': data['day'],
-                'start_time': data['start_time'],
-                'end_time': data['end_time'],
-                'reason': data.get('reason', ''),
-                'status': 'confirmed',
-                'created_at': firestore.SERVER_TIMESTAMP
-            }
-            
-            db.collection('appointments').document(booking_id).set(appointment_data)
-            
+            def build_appointment(doctor_data, booking_id):
+                return {
+                    'booking_id': booking_id,
+                    'doctor_uid': doctor_uid,
+                    'doctor_name': f"{doctor_data['first_name']} {doctor_data['last_name']}",
+                    'doctor_specialization': doctor_data.get('specialization', ''),
+                    'patient_uid': patient_uid,
+                    'patient_name': f"{patient_data['first_name']} {patient_data['last_name']}",
+                    'patient_email': patient_data['email'],
+                    'patient_phone': patient_data.get('phone_number', ''),
+                    'day': data['day'],
+                    'start_time': data['start_time'],
+                    'end_time': data['end_time'],
+                    'reason': data.get('reason', ''),
+                    'status': 'confirmed',
+                    'created_at': firestore.SERVER_TIMESTAMP
+                }
+
+            # Slot check, slot update and appointment write in one transaction
+            appointment_data = book_slot(
+                doctor_uid, data['day'], data['start_time'], data['end_time'],
+                booked_by=patient_data['email'],
+                build_appointment=build_appointment,
+                slot_date=data.get('date')
+            )
+            booking_id = appointment_data['booking_id']
+
             return Response({
                 'message': 'Appointment booked successfully',
                 'booking_id': booking_id,
@@ -307,12 +294,15 @@ class PatientBookAppointmentView(APIView):
                     'doctor_specialization': appointment_data['doctor_specialization'],
                     'patient_name': appointment_data['patient_name'],
                     'day': data['day'],
+                    'date': appointment_data.get('date'),
                     'start_time': data['start_time'],
                     'end_time': data['end_time'],
                     'status': 'confirmed'
                 }
             }, status=status.HTTP_201_CREATED)
-            
+
+        except BookingError as e:
+            return Response({'error': str(e)}, status=e.status_code)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -321,21 +311,38 @@ class PatientBookAppointmentView(APIView):
 class PatientAppointmentsView(APIView):
     permission_classes = [AllowAny]
 
+    @cache_response(ttl=15, tags=['appointments:patient:{patient_uid}'])
     def get(self, request, patient_uid):
         try:
-            appointments_ref = db.collection('appointments')
-            docs = appointments_ref.where('patient_uid', '==', patient_uid).stream()
-            
-            appointments = []
-            for doc in docs:
-                appointment_data = doc.to_dict()
-                appointments.append(appointment_data)
+            date_from, date_to = parse_date_range(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        appointment_status = request.query_params.get('status')
+        if appointment_status and appointment_status not in appointment_repo.statuses:
+            return Response({
+                'error': f"status must be one of: {', '.join(appointment_repo.statuses)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit, cursor = parse_page_params(request.query_params)
+            page = appointment_repo.page_for_patient(
+                patient_uid,
+                status=appointment_status,
+                date_from=date_from,
+                date_to=date_to,
+                limit=limit,
+                cursor=cursor
+            )
             
             return Response({
-                'count': len(appointments),
-                'appointments': appointments
+                'count': len(page.items),
+                'appointments': page.items,
+                'next_cursor': page.next_cursor
             }, status=status.HTTP_200_OK)
             
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -351,51 +358,14 @@ class PatientCancelAppointmentView(APIView):
             return Response({'error': 'patient_uid is required'}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            appointment_ref = db.collection('appointments').document(booking_id)
-            appointment_doc = appointment_ref.get()
-            
-            if not appointment_doc.exists:
-                return Response({'error': 'Appointment not found'}, status=status.HTTP_404_NOT_FOUND)
-            
-            appointment_data = appointment_doc.to_dict()
-            
-            if appointment_data.get('patient_uid') != patient_uid:
-                return Response({
-                    'error': 'Unauthorized to cancel this appointment'
-                }, status=status.HTTP_403_FORBIDDEN)
-            
-            doctor_ref = db.collection('doctors').document(appointment_data['doctor_uid'])
-            doctor_doc = doctor_ref.get()
-            
-            if doctor_doc.exists:
-                doctor_data = doctor_doc.to_dict()
-                availability = doctor_data.get('availability', [])
-                
-                for day_avail in availability:
-                    if day_avail['day'] == appointment_data['day']:
-                        for slot in day_avail.get('time_slots', []):
-                            if (slot.get('booking_id') == booking_id and
-                                slot['start_time'] == appointment_data['start_time'] and
-                                slot['end_time'] == appointment_data['end_time']):
-                                slot['is_available'] = True
-                                slot.pop('booked_by', None)
-                                slot.pop('booking_id', None)
-                                break
-                
-                doctor_ref.update({
-                    'availability': availability,
-                    'updated_at': firestore.SERVER_TIMESTAMP
-                })
-            
-            appointment_ref.update({
-                'status': 'cancelled',
-                'cancelled_at': firestore.SERVER_TIMESTAMP
-            })
-            
+            cancel_booking(booking_id, patient_uid=patient_uid)
+
             return Response({
                 'message': 'Appointment cancelled successfully',
                 'booking_id': booking_id
             }, status=status.HTTP_200_OK)
-            
+
+        except BookingError as e:
+            return Response({'error': str(e)}, status=e.status_code)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -7,23 +7,29 @@ export const AppointmentContext = createContext();
 
 export const AppointmentProvider = ({ children }) => {
   const [appointments, setAppointments] = useState([]);
+  // Cursor of the next page, null once the last page is loaded
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(false);
 
-  const fetchAppointments = async () => {
+  const fetchPage = async (cursor) => {
     const userData = getUserData();
     const userRole = getUserRole();
-    
-    if (!userData || !userRole) return;
+
+    if (userRole === 'doctor') {
+      return getDoctorAppointments(userData.uid, cursor);
+    }
+    return getPatientAppointments(userData.uid, cursor);
+  };
+
+  // Loads the first page, replacing what was loaded before
+  const fetchAppointments = async () => {
+    if (!getUserData() || !getUserRole()) return;
 
     setLoading(true);
     try {
-      let response;
-      if (userRole === 'doctor') {
-        response = await getDoctorAppointments(userData.uid);
-      } else if (userRole === 'patient') {
-        response = await getPatientAppointments(userData.uid);
-      }
+      const response = await fetchPage(null);
       setAppointments(response.appointments || []);
+      setNextCursor(response.next_cursor || null);
     } catch (error) {
       console.error('Error fetching appointments:', error);
     } finally {
@@ -31,6 +37,18 @@ export const AppointmentProvider = ({ children }) => {
     }
   };
 
+  const loadMoreAppointments = async () => {
+    if (!nextCursor || !getUserData() || !getUserRole()) return;
+
+    try {
+      const response = await fetchPage(nextCursor);
+      setAppointments((loaded) => [...loaded, ...(response.appointments || [])]);
+      setNextCursor(response.next_cursor || null);
+    } catch (error) {
+      console.error('Error loading more appointments:', error);
+    }
+  };
+
   const deleteAppointment = async (bookingId) => {
     const userData = getUserData();
     const userRole = getUserRole();
@@ -50,7 +68,14 @@ export const AppointmentProvider = ({ children }) => {
 
   return (
     <AppointmentContext.Provider
-      value={{ appointments, loading, fetchAppointments, deleteAppointment }}
+      value={{
+        appointments,
+        loading,
+        hasMoreAppointments: Boolean(nextCursor),
+        fetchAppointments,
+        loadMoreAppointments,
+        deleteAppointment,
+      }}
     >
       {children}
     </AppointmentContext.Provider>
@@ -15,8 +15,14 @@ export const HealthGoalsProvider = ({ children }) => {
   const [healthTracking, setHealthTracking] = useState([]);
   const [medicalTests, setMedicalTests] = useState([]);
   const [preventiveCheckups, setPreventiveCheckups] = useState([]);
+  // Cursor of each list's next page, null once its last page is loaded
+  const [cursors, setCursors] = useState({ tracking: null, tests: null, checkups: null });
   const [loading, setLoading] = useState(false);
 
+  const setCursor = (list, cursor) => {
+    setCursors((current) => ({ ...current, [list]: cursor || null }));
+  };
+
   const fetchHealthTracking = async () => {
     const userData = getUserData();
     if (!userData) return;
@@ -25,6 +31,7 @@ export const HealthGoalsProvider = ({ children }) => {
     try {
       const response = await getHealthTracking(userData.uid);
       setHealthTracking(response.tracking || []);
+      setCursor('tracking', response.next_cursor);
     } catch (error) {
       console.error('Error fetching health tracking:', error);
     } finally {
@@ -53,6 +60,7 @@ export const HealthGoalsProvider = ({ children }) => {
     try {
       const response = await getMedicalTests(userData.uid);
       setMedicalTests(response.tests || []);
+      setCursor('tests', response.next_cursor);
     } catch (error) {
       console.error('Error fetching medical tests:', error);
     } finally {
@@ -81,6 +89,7 @@ export const HealthGoalsProvider = ({ children }) => {
     try {
       const response = await getPreventiveCheckups(userData.uid);
       setPreventiveCheckups(response.checkups || []);
+      setCursor('checkups', response.next_cursor);
     } catch (error) {
       console.error('Error fetching preventive checkups:', error);
     } finally {
@@ -101,6 +110,32 @@ export const HealthGoalsProvider = ({ children }) => {
     }
   };
 
+  // Appends the next page of one list: 'tracking', 'tests' or 'checkups'.
+  // The page shows the latest tracking entries only, so it loads no more of those.
+  const loadMore = async (list) => {
+    const userData = getUserData();
+    const cursor = cursors[list];
+    if (!userData || !cursor) return;
+
+    try {
+      if (list === 'tracking') {
+        const response = await getHealthTracking(userData.uid, null, cursor);
+        setHealthTracking((loaded) => [...loaded, ...(response.tracking || [])]);
+        setCursor(list, response.next_cursor);
+      } else if (list === 'tests') {
+        const response = await getMedicalTests(userData.uid, cursor);
+        setMedicalTests((loaded) => [...loaded, ...(response.tests || [])]);
+        setCursor(list, response.next_cursor);
+      } else if (list === 'checkups') {
+        const response = await getPreventiveCheckups(userData.uid, cursor);
+        setPreventiveCheckups((loaded) => [...loaded, ...(response.checkups || [])]);
+        setCursor(list, response.next_cursor);
+      }
+    } catch (error) {
+      console.error(`Error loading more ${list}:`, error);
+    }
+  };
+
   return (
     <HealthGoalsContext.Provider
       value={{
@@ -108,6 +143,12 @@ export const HealthGoalsProvider = ({ children }) => {
         medicalTests,
         preventiveCheckups,
         loading,
+        hasMore: {
+          tracking: Boolean(cursors.tracking),
+          tests: Boolean(cursors.tests),
+          checkups: Boolean(cursors.checkups),
+        },
+        loadMore,
         fetchHealthTracking,
         addHealthTracking,
         fetchMedicalTests,
@@ -7,7 +7,9 @@ import "./DoctorDash.css";
 
 const DoctorDash = () => {
   const navigate = useNavigate();
-  const { appointments, loading, fetchAppointments, deleteAppointment } = useContext(AppointmentContext);
+  const {
+    appointments, loading, hasMoreAppointments, fetchAppointments, loadMoreAppointments, deleteAppointment
+  } = useContext(AppointmentContext);
   const { user, logout } = useContext(AuthContext);
   const [isOnline, setIsOnline] = useState(true);
   const [toggling, setToggling] = useState(false);
@@ -109,6 +111,9 @@ const DoctorDash = () => {
           </tbody>
         </table>
       )}
+      {!loading && hasMoreAppointments && (
+        <button onClick={loadMoreAppointments}>Load more appointments</button>
+      )}
     </div>
   );
 };
@@ -13,6 +13,8 @@ const HealthGoals = () => {
     addMedicalTestRecord,
     fetchPreventiveCheckups,
     addPreventiveCheckupRecord,
+    hasMore,
+    loadMore,
   } = useContext(HealthGoalsContext);
 
   const [activeTab, setActiveTab] = useState('tracking');
@@ -118,7 +120,7 @@ const HealthGoals = () => {
             <button type="submit">Add Tracking</button>
           </form>
 
-          <h3>Recent Tracking ({healthTracking.length})</h3>
+          <h3>Recent Tracking ({healthTracking.length}{hasMore.tracking ? '+' : ''})</h3>
           {healthTracking.slice(0, 10).map((track, idx) => (
             <div key={idx} className="tracking-card">
               <p><strong>Date:</strong> {track.date}</p>
@@ -142,7 +144,7 @@ const HealthGoals = () => {
             <button type="submit">Add Test</button>
           </form>
 
-          <h3>Medical Tests ({medicalTests.length})</h3>
+          <h3>Medical Tests ({medicalTests.length}{hasMore.tests ? '+' : ''})</h3>
           {medicalTests.map((test, idx) => (
             <div key={idx} className="test-card">
               <h4>{test.test_name}</h4>
@@ -152,6 +154,9 @@ const HealthGoals = () => {
               {test.notes && <p><em>{test.notes}</em></p>}
             </div>
           ))}
+          {hasMore.tests && (
+            <button onClick={() => loadMore('tests')}>Load more</button>
+          )}
         </div>
       )}
 
@@ -168,7 +173,7 @@ const HealthGoals = () => {
             <button type="submit">Add Checkup</button>
           </form>
 
-          <h3>Preventive Checkups ({preventiveCheckups.length})</h3>
+          <h3>Preventive Checkups ({preventiveCheckups.length}{hasMore.checkups ? '+' : ''})</h3>
           {preventiveCheckups.map((checkup, idx) => (
             <div key={idx} className="checkup-card">
               <h4>{checkup.checkup_type}</h4>
@@ -179,6 +184,9 @@ const HealthGoals = () => {
               {checkup.notes && <p><em>{checkup.notes}</em></p>}
             </div>
           ))}
+          {hasMore.checkups && (
+            <button onClick={() => loadMore('checkups')}>Load more</button>
+          )}
         </div>
       )}
     </div>
@@ -8,10 +8,13 @@ import "./PatientDash.css";
 
 const PatientDash = () => {
   const navigate = useNavigate();
-  const { appointments, fetchAppointments, deleteAppointment } = useContext(AppointmentContext);
+  const {
+    appointments, hasMoreAppointments, fetchAppointments, loadMoreAppointments, deleteAppointment
+  } = useContext(AppointmentContext);
   const { isLoggedIn, user, logout } = useContext(AuthContext);
   const [showPopup, setShowPopup] = useState(false);
   const [doctors, setDoctors] = useState([]);
+  const [doctorsCursor, setDoctorsCursor] = useState(null);
   const [availableSlots, setAvailableSlots] = useState([]);
   const [form, setForm] = useState({
     doctor_uid: "",
@@ -29,10 +32,12 @@ const PatientDash = () => {
     }
   }, [user]);
 
-  const loadDoctors = async () => {
+  // With a cursor, appends the next page of doctors to those loaded
+  const loadDoctors = async (cursor = null) => {
     try {
-      const response = await getDoctorList(true); // active only
-      setDoctors(response.doctors || []);
+      const response = await getDoctorList(true, cursor); // active only
+      setDoctors((loaded) => (cursor ? [...loaded, ...(response.doctors || [])] : response.doctors || []));
+      setDoctorsCursor(response.next_cursor || null);
     } catch (error) {
       console.error('Error loading doctors:', error);
     }
@@ -123,6 +128,12 @@ const PatientDash = () => {
                   ))}
                 </select>
 
+                {doctorsCursor && (
+                  <button type="button" onClick={() => loadDoctors(doctorsCursor)}>
+                    More doctors
+                  </button>
+                )}
+
                 {form.doctor_uid && (
                   <select
                     value={form.day}
@@ -217,6 +228,9 @@ const PatientDash = () => {
             </tbody>
           </table>
         )}
+        {hasMoreAppointments && (
+          <button onClick={loadMoreAppointments}>Load more appointments</button>
+        )}
       </div>
 
       <div className="patient-sidebar">
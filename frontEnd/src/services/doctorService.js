@@ -34,9 +34,18 @@ export const toggleDoctorStatus = async (uid) => {
 };
 
 // Doctor List
-export const getDoctorList = async (activeOnly = false) => {
+// List endpoints return one page; pass the response's next_cursor to load the next one
+export const getDoctorList = async (activeOnly = false, cursor = null) => {
     const response = await api.get('/doctors/list/', {
-        params: { active_only: activeOnly },
+        params: { active_only: activeOnly, cursor },
+    });
+    return response.data;
+};
+
+// Doctor Search (typeahead with specialization facets)
+export const searchDoctors = async (q, { specialization, activeOnly = false, limit } = {}) => {
+    const response = await api.get('/doctors/search/', {
+        params: { q, specialization, active_only: activeOnly, limit },
     });
     return response.data;
 };
@@ -70,7 +79,7 @@ export const cancelAppointment = async (bookingId) => {
     return response.data;
 };
 
-export const getDoctorAppointments = async (doctorUid) => {
-    const response = await api.get(`/doctors/appointments/${doctorUid}/`);
+export const getDoctorAppointments = async (doctorUid, cursor = null) => {
+    const response = await api.get(`/doctors/appointments/${doctorUid}/`, { params: { cursor } });
     return response.data;
 };
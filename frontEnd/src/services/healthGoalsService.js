@@ -6,8 +6,9 @@ export const trackHealthGoals = async (patientUid, data) => {
     return response.data;
 };
 
-export const getHealthTracking = async (patientUid, date = null) => {
-    const params = date ? { date } : {};
+// The lists return one page; pass the response's next_cursor to load the next one
+export const getHealthTracking = async (patientUid, date = null, cursor = null) => {
+    const params = date ? { date } : { cursor };
     const response = await api.get(`/health-goals/track/${patientUid}/`, { params });
     return response.data;
 };
@@ -18,8 +19,8 @@ export const addMedicalTest = async (patientUid, data) => {
     return response.data;
 };
 
-export const getMedicalTests = async (patientUid) => {
-    const response = await api.get(`/health-goals/medical-tests/${patientUid}/`);
+export const getMedicalTests = async (patientUid, cursor = null) => {
+    const response = await api.get(`/health-goals/medical-tests/${patientUid}/`, { params: { cursor } });
     return response.data;
 };
 
@@ -29,8 +30,8 @@ export const addPreventiveCheckup = async (patientUid, data) => {
     return response.data;
 };
 
-export const getPreventiveCheckups = async (patientUid) => {
-    const response = await api.get(`/health-goals/preventive-checkups/${patientUid}/`);
+export const getPreventiveCheckups = async (patientUid, cursor = null) => {
+    const response = await api.get(`/health-goals/preventive-checkups/${patientUid}/`, { params: { cursor } });
     return response.data;
 };
 
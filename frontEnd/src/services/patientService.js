@@ -33,8 +33,9 @@ export const patientBookAppointment = async (doctorUid, appointmentData) => {
     return response.data;
 };
 
-export const getPatientAppointments = async (patientUid) => {
-    const response = await api.get(`/patients/appointments/${patientUid}/`);
+// One page of appointments; pass the response's next_cursor to load the next one
+export const getPatientAppointments = async (patientUid, cursor = null) => {
+    const response = await api.get(`/patients/appointments/${patientUid}/`, { params: { cursor } });
     return response.data;
 };
 